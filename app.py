@@ -2,60 +2,99 @@ import streamlit as st
 import plotly.graph_objects as go
 from datetime import timedelta, date
 import joblib
-from machine_learning.predict import forecast_energy, predict_energy
+import metrics
+from machine_learning.predict import (
+    PredictionClient,
+    forecast_energy,
+    predict_energy,
+)
+from machine_learning.registry import ModelRegistry
 from streamlit_autorefresh import st_autorefresh
-from data_aquisition.db_operations import load_historical_data, load_real_time_data
-from config import MODEL
+from data_aquisition.db_operations import (
+    load_date_range,
+    load_station_list,
+)
+from data_aquisition.da_config import pool_stats
+from data_aquisition.downsample import downsample, visible_range
+from data_aquisition.frame_cache import FrameCache
+from data_aquisition.realtime_cache import RealTimeCache
+from data_aquisition.rollups import query_history
+from config import (
+    CACHE_MAX_BYTES,
+    CACHE_TTL,
+    CHART_MAX_POINTS,
+    PREDICTION_SERVER,
+    REAL_TIME_TTL,
+)
 import pandas as pd
 
 # Set page configuration
 st.set_page_config(page_title="Operational Energy Dashboard", layout="wide")
 
 
-# Function to remove duplicate timestamps and average the data
-def remove_duplicate_timestamps(data: pd.DataFrame) -> pd.DataFrame:
-    """Remove duplicate timestamps by averaging the data."""
-    data = (
-        data.groupby("Timestamp")
-        .agg(
-            {
-                "Station": "first",
-                "Voltage": "mean",
-                "Current": "mean",
-                "Power": "mean",
-                "Energy": "mean",
-                "Frequency": "mean",
-                "PF": "mean",
-            }
-        )
-        .reset_index()
-    )
-    return data
-
-
 # Load the machine learning model
 @st.cache_resource()
+def load_model_source():
+    """Return a prediction server client, or the registry of local models."""
+    if PREDICTION_SERVER:
+        return PredictionClient(PREDICTION_SERVER)
+    return ModelRegistry()
+
+
 def load_model() -> joblib:
-    """Load and return the machine learning model."""
-    return joblib.load(MODEL)
+    """Return the model to predict with, switching to a newly activated version."""
+    source = load_model_source()
+    if isinstance(source, ModelRegistry):
+        # The new version warms in the background; until then the old one serves
+        source.refresh()
+        return source.get()
+    return source
 
 
 model = load_model()
 
 
+# One cache for every session: each station and window is queried once per TTL
+@st.cache_resource()
+def load_frame_cache() -> FrameCache:
+    return FrameCache(ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
+
+
+frame_cache = load_frame_cache()
+
+
 # Load historical and real-time data
-@st.cache_data
-def load_historical_df():
-    return load_historical_data()
+def load_historical_df(station=None, start_date=None, end_date=None):
+    return frame_cache.get(
+        ("historical", station, start_date, end_date),
+        lambda: query_history(station, start_date, end_date),
+    )
+
+
+# Station list and date range come from cheap metadata queries, not the full table
+@st.cache_data(ttl=600)
+def load_historical_metadata():
+    return load_station_list(), load_date_range()
+
+
+# Shared by every session, each refresh only fetches rows newer than the last seen
+@st.cache_resource()
+def load_real_time_cache() -> RealTimeCache:
+    return RealTimeCache()
+
 
+real_time_cache = load_real_time_cache()
 
-def load_real_time_df():
-    return load_real_time_data()
+
+def load_real_time_df(station=None):
+    return frame_cache.get(
+        ("real_time", station),
+        lambda: real_time_cache.get(station),
+        ttl=REAL_TIME_TTL,
+    )
 
 
-historical_data = load_historical_df()
-real_time_data = load_real_time_df()
-station_list = historical_data["Station"].unique().tolist()
+station_list, historical_range = load_historical_metadata()
 
 
 # Create a Plotly gauge chart
@@ -90,23 +129,26 @@ def update_dashboard(station: str, mode: str, start_date: date, end_date: date)
 
     # Filter data based on mode and station
     if mode == "Historical":
-        data = historical_data[
-            (historical_data["Timestamp"].dt.date >= start_date)
-            & (historical_data["Timestamp"].dt.date <= end_date)
-        ]
-        data = remove_duplicate_timestamps(data)
-        if station != "Overall":
-            data = data[data["Station"] == station]
+        # A box selection on the chart zooms in, refetching that range in detail
+        view = (station, start_date, end_date)
+        zoom = st.session_state.get("energy_zoom")
+        if zoom is None or zoom[0] != view:
+            zoom = None
+            st.session_state.pop("energy_zoom", None)
+        start, end = zoom[1] if zoom else (start_date, end_date)
+        data = load_historical_df(None if station == "Overall" else station, start, end)
+        if data.empty and zoom:
+            # Nothing in the selected range, go back to the whole range
+            st.session_state.pop("energy_zoom", None)
+            st.rerun()
         # Generate predictions for the historical data
         historical_predictions = predict_energy(model, data)
     else:
-        data = load_real_time_data()
-        if station != "Overall":
-
-            data = data[data["Process_ID"] == station].tail(120)
+        data = load_real_time_df(None if station == "Overall" else station)
 
-        # Add predicted energy for real-time data
-        data["Predicted_Energy"] = predict_energy(model, data)["Predicted_Energy"]
+        # Add predicted energy for real-time data, predicted once per refresh
+        predictions = predict_energy(model, data)
+        data["Predicted_Energy"] = predictions["Predicted_Energy"]
 
     # Display current energy metrics
     current_data = data.loc[data["Timestamp"] == data["Timestamp"].max()].iloc[0]
@@ -132,10 +174,11 @@ def update_dashboard(station: str, mode: str, start_date: date, end_date: date)
 
     # Plot actual vs predicted energy
     energy_figure = go.Figure()
+    chart_data = downsample(data, CHART_MAX_POINTS)
     energy_figure.add_trace(
         go.Scatter(
-            x=data["Timestamp"],
-            y=data["Energy"],
+            x=chart_data["Timestamp"],
+            y=chart_data["Energy"],
             mode="lines",
             name="Actual Energy",
             line=dict(color="blue"),
@@ -152,7 +195,6 @@ def update_dashboard(station: str, mode: str, start_date: date, end_date: date)
         #     )
         # )
 
-        predictions = predict_energy(model, data)
         energy_figure.add_trace(
             go.Scatter(
                 x=predictions["Timestamp"],
@@ -165,10 +207,13 @@ def update_dashboard(station: str, mode: str, start_date: date, end_date: date)
         )
 
     elif mode == "Historical":
+        chart_predictions = downsample(
+            historical_predictions, CHART_MAX_POINTS, y="Predicted_Energy"
+        )
         energy_figure.add_trace(
             go.Scatter(
-                x=historical_predictions["Timestamp"],
-                y=historical_predictions["Predicted_Energy"],
+                x=chart_predictions["Timestamp"],
+                y=chart_predictions["Predicted_Energy"],
                 mode="lines",
                 name="Predicted Energy",
                 line=dict(color="red", dash="dash"),
@@ -181,7 +226,24 @@ def update_dashboard(station: str, mode: str, start_date: date, end_date: date)
         title=f"{mode} Energy Usage for {station}",
         legend=dict(x=0, y=1),
     )
-    st.plotly_chart(energy_figure, use_container_width=True)
+    if mode == "Historical":
+        selection = st.plotly_chart(
+            energy_figure,
+            use_container_width=True,
+            # A new key per zoom level starts each view with no selection
+            key=f"energy_chart_{zoom[1] if zoom else ''}",
+            on_select="rerun",
+            selection_mode="box",
+        )
+        selected = visible_range(selection)
+        if selected:
+            st.session_state["energy_zoom"] = (view, selected)
+            st.rerun()
+        if zoom and st.button("Reset zoom"):
+            st.session_state.pop("energy_zoom", None)
+            st.rerun()
+    else:
+        st.plotly_chart(energy_figure, use_container_width=True)
     st.divider()
 
     # Display current values using gauges
@@ -223,7 +285,7 @@ def update_dashboard(station: str, mode: str, start_date: date, end_date: date)
         figure = go.Figure()
 
         # Plot future predictions
-        future_df = forecast_energy(model, data)
+        future_df = future_predictions
         figure.add_trace(
             go.Scatter(
                 x=future_df["Timestamp"],
@@ -283,6 +345,47 @@ def display_about() -> None:
     )
 
 
+def display_diagnostics() -> None:
+    """Display model, cache, connection pool and timing metrics."""
+    st.subheader("Diagnostics")
+    st.write("Model version:", getattr(model, "version", None))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Data cache")
+        st.json(frame_cache.stats())
+    with col2:
+        st.caption("Connection pool")
+        st.json(pool_stats())
+
+    rows = []
+    for name, values in metrics.snapshot().items():
+        if values["type"] == "counter":
+            rows.append({"Metric": name, "Count": values["value"]})
+        else:
+            rows.append(
+                {
+                    "Metric": name,
+                    "Count": values["count"],
+                    "Mean (ms)": values["mean"] * 1000,
+                    "p50 (ms)": values["p50"] * 1000,
+                    "p99 (ms)": values["p99"] * 1000,
+                    "Max (ms)": values["max"] * 1000,
+                }
+            )
+    st.caption("Metrics for this dashboard process")
+    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    st.download_button(
+        "Download Prometheus metrics", metrics.prometheus_text(), "metrics.txt"
+    )
+
+
+def display_settings() -> None:
+    """Display the Settings section, with diagnostics hidden until asked for."""
+    st.header("Settings")
+    if st.checkbox("Show diagnostics"):
+        display_diagnostics()
+
+
 def main() -> None:
     """Main function to run the Streamlit app."""
     logo_path = "icons/logo.jpg"
@@ -304,8 +407,7 @@ def main() -> None:
         # Date range selector for historical data
         start_date, end_date = None, None
         if data_mode == "Historical":
-            min_date = historical_data["Timestamp"].min().date()
-            max_date = historical_data["Timestamp"].max().date()
+            min_date, max_date = (timestamp.date() for timestamp in historical_range)
             start_date = st.sidebar.date_input(
                 "Start Date", min_date, min_value=min_date, max_value=max_date
             )
@@ -326,6 +428,9 @@ def main() -> None:
     elif option == "About":
         display_about()
 
+    elif option == "Settings":
+        display_settings()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+"""Compare append_to_csv against CsvWriter for per-reading CSV writes.
+
+Run from the repository root: python -m benchmarks.bench_csv --rows 5000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from data_aquisition import file_operations
+from data_aquisition.data_acquisition import generate_mock_data
+from data_aquisition.file_operations import CsvWriter
+
+
+def bench_append_to_csv(rows, directory):
+    file_operations.TEMP_DATA_FILE = os.path.join(directory, "append_to_csv.csv")
+    start = time.perf_counter()
+    for data in rows:
+        file_operations.append_to_csv(data)
+    return time.perf_counter() - start
+
+
+def bench_csv_writer(rows, directory):
+    start = time.perf_counter()
+    with CsvWriter(os.path.join(directory, "csv_writer.csv")) as writer:
+        for data in rows:
+            writer.write(data)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = [generate_mock_data(i) for i in range(1, args.rows + 1)]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, bench in [
+            ("append_to_csv", bench_append_to_csv),
+            ("CsvWriter", bench_csv_writer),
+        ]:
+            elapsed = bench(rows, directory)
+            print(
+                f"{name:>14}: {args.rows / elapsed:>10.0f} rows/s "
+                f"({elapsed / args.rows * 1e6:.1f} us/row)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare the pickled RandomForestRegressor with its CompiledForest export.
+
+Reports load time, memory and predict latency at several batch sizes. With no
+model given, a 100-tree forest is trained on machine_learning/sample_data.csv.
+A given model is fed the features it was fitted on, as in predict.py.
+
+Run from the repository root: python -m benchmarks.bench_forest [model.pkl]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from machine_learning.forest import CompiledForest
+from machine_learning.features import make_features
+from machine_learning.predict import feature_matrix, model_input
+
+
+def measure_load(load, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = load(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, elapsed, peak
+
+
+def median_latency(predict, X, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("model", nargs="?", help="pickled RandomForestRegressor")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv("machine_learning/sample_data.csv")
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = args.model
+        if pickle_path is None:
+            pickle_path = os.path.join(directory, "forest.pkl")
+            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            X = make_features(df).to_numpy(dtype=float)
+            joblib.dump(model.fit(X, df["Energy"]), pickle_path)
+        compiled_path = os.path.join(directory, "forest.npz")
+        CompiledForest.from_sklearn(joblib.load(pickle_path)).save(compiled_path)
+
+        model, pickle_load, pickle_memory = measure_load(joblib.load, pickle_path)
+        forest, compiled_load, compiled_memory = measure_load(
+            CompiledForest.load, compiled_path
+        )
+        print(f"{'':>12} {'file MB':>8} {'load ms':>8} {'load MB':>8}")
+        for name, path, load, memory in [
+            ("sklearn", pickle_path, pickle_load, pickle_memory),
+            ("compiled", compiled_path, compiled_load, compiled_memory),
+        ]:
+            print(
+                f"{name:>12} {os.path.getsize(path) / 1e6:>8.2f} "
+                f"{load * 1000:>8.1f} {memory / 1e6:>8.2f}"
+            )
+
+    X = feature_matrix(model, df)
+
+    def predict(rows):
+        return model.predict(model_input(model, rows))
+
+    difference = np.abs(predict(X) - forest.predict(X)).max()
+    print(f"\nmax abs difference: {difference:.2e}\n")
+    print(f"{'batch':>6} {'sklearn ms':>11} {'compiled ms':>12}")
+    rng = np.random.default_rng(0)
+    for batch in [1, 10, 100, 1000]:
+        rows = X[rng.integers(0, len(X), batch)]
+        print(
+            f"{batch:>6} {median_latency(predict, rows, args.repeats) * 1000:>11.3f} "
+            f"{median_latency(forest.predict, rows, args.repeats) * 1000:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Throwaway SQLite database standing in for PostgreSQL in the benchmarks.
+
+``create_standin`` points da_config's engine at a SQLite file, creates the
+readings, historical and rollup tables through the SQLite backend and fills
+them with synthetic readings, so the unmodified ingest and query functions
+run against it.
+"""
+
+import math
+from itertools import islice
+import pandas as pd
+from sqlalchemy import text
+from config import DatabaseConfig
+from data_aquisition import da_config
+from data_aquisition.da_config import HISTORICAL_TABLE
+from data_aquisition.db_operations import (
+    append_rows_to_temp_table,
+    create_historical_indexes,
+    create_readings_table,
+)
+from data_aquisition.loadgen import synthetic_readings
+from data_aquisition.rollups import (
+    RollupWriter,
+    create_rollup_tables,
+    rebuild_rollups,
+)
+
+
+def create_standin(path, rows, stations=4, interval=10.0, start=None):
+    """Create a stand-in database of ``rows`` readings and switch to it."""
+    engine = DatabaseConfig(f"sqlite:///{path}").create_engine()
+    da_config.engine = engine
+    readings = list(
+        islice(synthetic_readings(stations, interval, start=start, seed=0), rows)
+    )
+    create_readings_table()
+    append_rows_to_temp_table(readings)
+    # The historical table is loaded by an external export, here a copy
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {HISTORICAL_TABLE}"))
+    pd.DataFrame(readings).to_sql(
+        HISTORICAL_TABLE, engine, index=False, chunksize=10_000
+    )
+    create_historical_indexes()
+    create_rollup_tables()
+    with RollupWriter(max_delay=math.inf) as rollup_writer:
+        for reading in readings:
+            rollup_writer.write(reading)
+    create_rollup_tables(HISTORICAL_TABLE)
+    rebuild_rollups(HISTORICAL_TABLE)
+    return engine
@@ -0,0 +1,267 @@
+"""End-to-end benchmarks for ingest, queries, inference and dashboard refresh.
+
+Everything runs locally: a throwaway SQLite file stands in for PostgreSQL
+(see benchmarks.standin) and a pty stands in for the serial device.
+
+    ingest     readings/s from a pty through SerialReader and the pipeline
+               into the CSV and batched database sinks, as read_serial_data
+               does, plus the worst queue lag
+    queries    load_real_time_data and load_historical_data latency by
+               table size
+    inference  predict_energy and forecast_energy latency by batch size
+    dashboard  app.py run time per refresh in Real-time and Historical mode
+
+Each run is appended to benchmarks/history.json and compared with the
+previous one; changes worse than --threshold are reported as regressions.
+
+Run from the repository root:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --only inference,queries --quick
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from itertools import islice
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from benchmarks.standin import create_standin
+from data_aquisition.data_acquisition import SerialReader
+from data_aquisition.db_operations import (
+    BatchWriter,
+    load_historical_data,
+    load_real_time_data,
+)
+from data_aquisition.file_operations import CsvWriter
+from data_aquisition.loadgen import PtyDevices, synthetic_readings
+from data_aquisition.pipeline import Pipeline
+from machine_learning.features import make_features
+from machine_learning.predict import (
+    clear_forecast_cache,
+    forecast_energy,
+    predict_energy,
+)
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+SAMPLE_DATA = "machine_learning/sample_data.csv"
+
+
+def median_ms(function, repeats, setup=None):
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def bench_ingest(args, directory):
+    rows = 2_000 if args.quick else 20_000
+    create_standin(os.path.join(directory, "ingest.db"), rows=1)
+    readings = list(islice(synthetic_readings(1, seed=0), rows))
+    with PtyDevices() as devices:
+        with SerialReader(devices.open("station01"), timeout=1) as reader:
+            reader.open()
+            feeder = threading.Thread(
+                target=lambda: [devices.write(reading) for reading in readings],
+                daemon=True,
+            )
+            start = time.perf_counter()
+            feeder.start()
+            with ExitStack() as stack:
+                batch_writer = stack.enter_context(BatchWriter())
+                csv_writer = stack.enter_context(
+                    CsvWriter(os.path.join(directory, "ingest.csv"))
+                )
+                pipeline = stack.enter_context(
+                    Pipeline(
+                        {"csv": csv_writer.write, "db": batch_writer.append},
+                        spill_dir=directory,
+                    )
+                )
+                for record in islice(reader.records(), rows):
+                    pipeline.put(record)
+            # Leaving the stack drains the queues and flushes the last batch
+            elapsed = time.perf_counter() - start
+    stats = pipeline.stats()
+    return {
+        "ingest.samples_per_second": rows / elapsed,
+        "ingest.max_lag_ms": max(sink["max_lag_ms"] for sink in stats.values()),
+    }
+
+
+def bench_queries(args, directory):
+    results = {}
+    sizes = [10_000] if args.quick else [10_000, 100_000, 500_000]
+    stations, interval = 4, 10.0
+    for size in sizes:
+        start = datetime.now() - timedelta(seconds=interval * size / stations)
+        create_standin(
+            os.path.join(directory, f"queries_{size}.db"),
+            rows=size,
+            stations=stations,
+            interval=interval,
+            start=start,
+        )
+        results[f"queries.load_real_time_data.{size}_rows_ms"] = median_ms(
+            lambda: load_real_time_data("station01"), args.repeats
+        )
+        results[f"queries.load_historical_data.{size}_rows_ms"] = median_ms(
+            load_historical_data, max(1, args.repeats // 10)
+        )
+    return results
+
+
+def bench_inference(args, directory):
+    df = pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"])
+    if args.model:
+        model = joblib.load(args.model)
+    else:
+        model = RandomForestRegressor(n_estimators=100, random_state=42)
+        model.fit(make_features(df), df["Energy"])
+    rng = np.random.default_rng(0)
+    results = {}
+    for batch in [1, 10, 100, 1_000] + ([] if args.quick else [10_000]):
+        rows = df.iloc[rng.integers(0, len(df), batch)].reset_index(drop=True)
+        rows["Timestamp"] = pd.date_range("2024-11-01", periods=batch, freq="15s")
+        results[f"inference.predict_energy.{batch}_rows_ms"] = median_ms(
+            lambda: predict_energy(model, rows), args.repeats
+        )
+        results[f"inference.forecast_energy.{batch}_rows_ms"] = median_ms(
+            lambda: forecast_energy(model, rows),
+            args.repeats,
+            setup=clear_forecast_cache,
+        )
+    return results
+
+
+def bench_dashboard(args, directory):
+    import config
+    from streamlit.testing.v1 import AppTest
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    rows, stations, interval = 20_000, 4, 10.0
+    create_standin(
+        os.path.join(directory, "dashboard.db"),
+        rows=rows,
+        stations=stations,
+        interval=interval,
+        start=datetime.now() - timedelta(seconds=interval * rows / stations),
+    )
+    # Expire cached frames at once, so every refresh queries as a lone session would
+    config.CACHE_TTL = config.REAL_TIME_TTL = 0
+    app = AppTest.from_file(os.path.abspath("app.py"), default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    results = {"dashboard.first_run_ms": (time.perf_counter() - start) * 1000}
+    for mode in ["Real-time", "Historical"]:
+        app.sidebar.selectbox[2].select(mode)
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"{mode} dashboard failed: {app.exception[0].value}")
+        key = mode.lower().replace("-", "_")
+        results[f"dashboard.{key}_refresh_ms"] = median_ms(
+            app.run, max(1, args.repeats // 5)
+        )
+    return results
+
+
+BENCHMARKS = {
+    "ingest": bench_ingest,
+    "queries": bench_queries,
+    "inference": bench_inference,
+    "dashboard": bench_dashboard,
+}
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as history_file:
+        return json.load(history_file)
+
+
+def compare(results, history, threshold):
+    """Return (metric, previous, current, change) for every regression."""
+    previous = {}
+    for run in history:
+        previous.update(run["results"])
+    regressions = []
+    for metric, value in results.items():
+        if metric not in previous or not previous[metric]:
+            continue
+        change = value / previous[metric] - 1
+        # Throughputs regress when they fall, latencies when they rise
+        worse = -change if metric.endswith("_per_second") else change
+        if worse > threshold:
+            regressions.append((metric, previous[metric], value, change))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--only", help="comma-separated benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--model", help="pickled model for the inference benchmark")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            print(f"Running {name}...")
+            results.update(BENCHMARKS[name](args, directory))
+
+    width = max(len(metric) for metric in results)
+    for metric, value in results.items():
+        print(f"{metric:<{width}} {value:>12.3f}")
+
+    history = load_history(args.history)
+    for metric, before, after, change in compare(results, history, args.threshold):
+        print(f"REGRESSION {metric}: {before:.3f} -> {after:.3f} ({change:+.0%})")
+    if not args.no_save:
+        history.append(
+            {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "quick": args.quick,
+                "results": results,
+            }
+        )
+        with open(args.history, "w") as history_file:
+            json.dump(history, history_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
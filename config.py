@@ -1,18 +1,56 @@
-from sqlalchemy import create_engine
-from env import *
+import os
+from sqlalchemy import create_engine, event
+
+try:
+    from env import *
+except ImportError:  # Without env.py the settings come from the environment
+    DB_USER = os.getenv("DB_USER")
+    DB_PASSWORD = os.getenv("DB_PASSWORD")
+    DB_HOST = os.getenv("DB_HOST", "localhost")
+    DB_NAME = os.getenv("DB_NAME", "energy")
+
+# SQLAlchemy URL overriding the PostgreSQL settings, e.g. sqlite:///energy.db
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """Let readers run alongside the writer and wait out its locks."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
 
 
 class DatabaseConfig:
-    def __init__(self):
+    def __init__(self, url=DATABASE_URL):
+        self.url = url
         self.db_user = DB_USER
         self.db_password = DB_PASSWORD
         self.db_host = DB_HOST
         self.db_name = DB_NAME
 
-    def create_engine(self):
-        return create_engine(
-            f"postgresql+psycopg2://{self.db_user}:{self.db_password}@{self.db_host}/{self.db_name}"
+    def create_engine(self, **pool_options):
+        url = (
+            self.url
+            or f"postgresql+psycopg2://{self.db_user}:{self.db_password}@{self.db_host}/{self.db_name}"
         )
+        engine = create_engine(url, **pool_options)
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _sqlite_pragmas)
+        return engine
+
+
+# Model used when model/ACTIVE does not name one, see machine_learning.registry
+MODEL = os.getenv("MODEL", "model/random_forest_energy_model_20241113_203659.pkl")
+
+# Optional machine_learning.server URL; when set the dashboard predicts through it
+PREDICTION_SERVER = os.getenv("PREDICTION_SERVER")
 
+# Most points drawn per chart trace; longer series are downsampled for display
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", 1500))
 
-MODEL = "model/random_forest_energy_model_20241124_184151.pkl"
+# Dashboard data cache shared by all sessions, TTLs in seconds
+CACHE_TTL = float(os.getenv("CACHE_TTL", 600))
+REAL_TIME_TTL = float(os.getenv("REAL_TIME_TTL", 5))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 512 * 2**20))
@@ -0,0 +1,266 @@
+"""Online alerting on live readings.
+
+Every reading updates constant-size state per station and metric: an
+exponentially weighted mean and variance, and the previous value. From these
+the rules below are checked in O(1) per sample:
+
+    low / high  the value is outside a fixed limit
+    zscore      the value is far from the EWMA in EW standard deviations
+    rate        the value changed faster than a limit per second
+
+A rule that keeps firing is reported once, then again only every
+``cooldown`` seconds of reading time, so a sagging supply does not flood the
+alerts table.
+"""
+
+import json
+import threading
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+import metrics
+from data_aquisition.da_config import (
+    ALERT_COOLDOWN,
+    ALERTS_FILE,
+    ALERTS_TABLE,
+    FLUSH_INTERVAL,
+    get_db_connection,
+)
+
+# Per metric: (low limit, high limit, max change per second), None disables
+RULES = {
+    "Voltage": (220.0, 240.0, 10.0),
+    "Frequency": (49.0, 51.0, 0.5),
+    "PF": (0.75, None, 0.2),
+}
+ALERT_COLUMNS = ["Timestamp", "Process_ID", "Metric", "Rule", "Value", "Limit"]
+
+_alerts_dropped = metrics.counter("alerts_dropped_total")
+
+
+class MetricState:
+    """Running statistics of one metric at one station."""
+
+    __slots__ = ("mean", "var", "count", "last_value", "last_time")
+
+    def __init__(self, value, timestamp):
+        self.mean = value
+        self.var = 0.0
+        self.count = 1
+        self.last_value = value
+        self.last_time = timestamp
+
+
+class AlertEngine:
+    """Check each reading against the rules and batch the alerts raised.
+
+    ``alpha`` is the EWMA smoothing factor and ``z_limit`` the z-score that
+    raises an alert once ``warmup`` samples have been seen. Memory grows only
+    with the number of stations, never with the number of readings: alerts
+    from failed writes are kept up to ``max_pending``, then the oldest are
+    dropped.
+    """
+
+    def __init__(
+        self,
+        rules=RULES,
+        alpha=0.05,
+        z_limit=4.0,
+        warmup=30,
+        cooldown=ALERT_COOLDOWN,
+        max_delay=FLUSH_INTERVAL,
+        max_pending=10_000,
+        write_alerts=None,
+    ):
+        self.rules = rules
+        self.alpha = alpha
+        self.z_limit = z_limit
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.write_alerts = write_alerts or (
+            append_alerts_to_file if ALERTS_FILE else insert_alerts
+        )
+        self.readings = 0
+        self.raised = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self._states = {}
+        # (station, metric, rule) -> reading time of the last alert
+        self._firing = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, data):
+        """Check one reading, queueing any alerts it raises."""
+        with self._lock:
+            for metric in self.rules:
+                self._check(data, metric, float(data[metric]))
+            self.readings += 1
+
+    def _check(self, data, metric, value):
+        station, timestamp = data["Process_ID"], data["Timestamp"]
+        low, high, max_rate = self.rules[metric]
+        too_low = low is not None and value < low
+        too_high = high is not None and value > high
+        self._update(data, metric, "low", too_low, value, low)
+        self._update(data, metric, "high", too_high, value, high)
+        state = self._states.get((station, metric))
+        if state is None:
+            self._states[station, metric] = MetricState(value, timestamp)
+            return
+
+        std = state.var**0.5
+        z_fired = state.count >= self.warmup and std > 0
+        z_fired = z_fired and abs(value - state.mean) > self.z_limit * std
+        self._update(data, metric, "zscore", z_fired, value, state.mean)
+
+        if max_rate is not None:
+            seconds = (timestamp - state.last_time).total_seconds()
+            rate = abs(value - state.last_value) / seconds if seconds > 0 else 0.0
+            self._update(data, metric, "rate", rate > max_rate, rate, max_rate)
+
+        # Exponentially weighted mean and variance, updated in place
+        delta = value - state.mean
+        state.mean += self.alpha * delta
+        state.var = (1 - self.alpha) * (state.var + self.alpha * delta * delta)
+        state.count += 1
+        state.last_value = value
+        state.last_time = timestamp
+
+    def _update(self, data, metric, rule, fired, value, limit):
+        station = data["Process_ID"]
+        key = (station, metric, rule)
+        if not fired:
+            self._firing.pop(key, None)
+            return
+        now = data["Timestamp"]
+        last = self._firing.get(key)
+        if last is not None and (now - last).total_seconds() < self.cooldown:
+            self.suppressed += 1
+            return
+        self._firing[key] = now
+        self.raised += 1
+        self._pending.append(
+            {
+                "Timestamp": data["Timestamp"],
+                "Process_ID": station,
+                "Metric": metric,
+                "Rule": rule,
+                "Value": value,
+                "Limit": limit,
+            }
+        )
+
+    def flush(self):
+        """Write the queued alerts."""
+        with self._flush_lock:
+            with self._lock:
+                alerts, self._pending = self._pending, []
+            if alerts and not self.write_alerts(alerts):
+                # Keep the failed alerts so the next flush writes them again
+                with self._lock:
+                    self._pending[:0] = alerts
+                    overflow = len(self._pending) - self.max_pending
+                    if overflow > 0:
+                        del self._pending[:overflow]
+                        self.dropped += overflow
+                        _alerts_dropped.inc(overflow)
+
+    def _run(self):
+        # Flush on a timer, so a station that goes quiet still gets its alerts
+        while not self._stopped.wait(self.max_delay):
+            self.flush()
+
+    def stats(self):
+        """Return reading, alert and state counts."""
+        with self._lock:
+            return {
+                "readings": self.readings,
+                "raised": self.raised,
+                "suppressed": self.suppressed,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+                "firing": len(self._firing),
+                "tracked": len(self._states),
+            }
+
+    def close(self):
+        """Stop the background flusher and write any queued alerts."""
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+
+
+def create_alerts_table():
+    """Create the alerts table if it does not exist."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        conn.execute(
+            text(
+                f"""CREATE TABLE IF NOT EXISTS {ALERTS_TABLE} (
+                "Timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                "Process_ID" VARCHAR(50) NOT NULL,
+                "Metric" VARCHAR(20) NOT NULL,
+                "Rule" VARCHAR(20) NOT NULL,
+                "Value" DOUBLE PRECISION,
+                "Limit" DOUBLE PRECISION
+            );"""
+            )
+        )
+        conn.execute(
+            text(
+                f"""CREATE INDEX IF NOT EXISTS {ALERTS_TABLE}_station_time_idx
+                ON {ALERTS_TABLE} ("Process_ID", "Timestamp");"""
+            )
+        )
+        conn.commit()
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+    finally:
+        conn.close()
+
+
+def insert_alerts(alerts):
+    """Insert alerts into the alerts table. Returns True on success."""
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    columns = ", ".join(f'"{column}"' for column in ALERT_COLUMNS)
+    values = ", ".join(f":{column}" for column in ALERT_COLUMNS)
+    try:
+        conn.execute(
+            text(f"INSERT INTO {ALERTS_TABLE} ({columns}) VALUES ({values});"), alerts
+        )
+        conn.commit()
+        return True
+    except SQLAlchemyError as e:
+        print(f"Database alert error: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def append_alerts_to_file(alerts, path=None):
+    """Append alerts to a JSON-lines file. Returns True on success."""
+    try:
+        with open(path or ALERTS_FILE, "a") as file:
+            for alert in alerts:
+                file.write(json.dumps(alert, default=str) + "\n")
+        return True
+    except OSError as e:
+        print(f"Error writing alerts: {e}")
+        return False
@@ -0,0 +1,210 @@
+import os
+import time
+from datetime import datetime
+import pandas as pd
+from data_aquisition.da_config import ARCHIVE_DIR, COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed when the archive is enabled
+    pa = ds = pq = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet archive requires pyarrow: pip install pyarrow")
+
+
+def reading_schema():
+    """Return the Arrow schema for one archived reading."""
+    _require_pyarrow()
+    return pa.schema(
+        [
+            ("Process_ID", pa.string()),
+            ("ID", pa.int64()),
+            ("Timestamp", pa.timestamp("us")),
+            ("Voltage", pa.float64()),
+            ("Current", pa.float64()),
+            ("Power", pa.float64()),
+            ("Energy", pa.float64()),
+            ("Frequency", pa.float64()),
+            ("PF", pa.float64()),
+        ]
+    )
+
+
+class _PartFile:
+    """An open part file, written under a hidden name until it is closed."""
+
+    __slots__ = ("writer", "directory", "name", "rows")
+
+    def __init__(self, writer, directory, name):
+        self.writer = writer
+        self.directory = directory
+        self.name = name
+        self.rows = 0
+
+    @property
+    def temporary_path(self):
+        return os.path.join(self.directory, f".{self.name}.tmp")
+
+
+class ParquetArchive:
+    """Archive readings as compressed Parquet, partitioned by station and date.
+
+    Readings are buffered as columns and written as one row group every
+    ``row_group_size`` rows per partition. Files live under
+    ``root/station=<Process_ID>/date=<YYYY-MM-DD>/`` as ``part-<n>.parquet``.
+    A part file is closed, and so becomes readable, once it holds
+    ``rows_per_file`` rows, once ``file_seconds`` have passed since its first
+    reading, when a reading for a later day arrives, or on flush and close.
+    Until then it is written under a hidden name that readers skip, so a
+    crash loses at most one part file per partition.
+    """
+
+    def __init__(
+        self,
+        root=ARCHIVE_DIR,
+        row_group_size=10000,
+        compression="zstd",
+        rows_per_file=100_000,
+        file_seconds=600,
+        clock=time.monotonic,
+    ):
+        _require_pyarrow()
+        self.root = root
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.rows_per_file = rows_per_file
+        self.file_seconds = file_seconds
+        self.clock = clock
+        self.schema = reading_schema()
+        self.rows_written = 0
+        self.files_written = 0
+        self._columns = {}
+        self._writers = {}
+        self._started = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, data):
+        """Buffer one reading, writing a row group when the batch is full."""
+        partition = (data["Process_ID"], data["Timestamp"].date())
+        if partition not in self._columns:
+            self._close_earlier_days(partition[1])
+            self._columns[partition] = {column: [] for column in COLUMNS}
+        columns = self._columns[partition]
+        for column in COLUMNS:
+            columns[column].append(data[column])
+        started = self._started.setdefault(partition, self.clock())
+        if self.clock() - started >= self.file_seconds:
+            self._roll(partition)
+        elif len(columns["ID"]) >= self.row_group_size:
+            self._write_row_group(partition)
+
+    def _write_row_group(self, partition):
+        columns = self._columns[partition]
+        if not columns["ID"]:
+            return
+        batch = pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        part = self._writers.get(partition)
+        if part is None:
+            station, day = partition
+            directory = os.path.join(
+                self.root, f"station={station}", f"date={day.isoformat()}"
+            )
+            os.makedirs(directory, exist_ok=True)
+            name = f"part-{time.time_ns()}.parquet"
+            part = self._writers[partition] = _PartFile(None, directory, name)
+            part.writer = pq.ParquetWriter(
+                part.temporary_path, self.schema, compression=self.compression
+            )
+        part.writer.write_batch(batch)
+        part.rows += batch.num_rows
+        self.rows_written += batch.num_rows
+        self._columns[partition] = {column: [] for column in COLUMNS}
+        if part.rows >= self.rows_per_file:
+            self._close_file(partition)
+
+    def _close_file(self, partition):
+        # The footer is written on close; only then is the file renamed into
+        # the name readers look for
+        part = self._writers.pop(partition, None)
+        self._started.pop(partition, None)
+        if part is None:
+            return
+        part.writer.close()
+        os.replace(part.temporary_path, os.path.join(part.directory, part.name))
+        self.files_written += 1
+
+    def _roll(self, partition):
+        self._write_row_group(partition)
+        self._close_file(partition)
+
+    def _close_partition(self, partition):
+        self._roll(partition)
+        del self._columns[partition]
+
+    def _close_earlier_days(self, day):
+        for partition in [p for p in self._columns if p[1] < day]:
+            self._close_partition(partition)
+
+    def flush(self):
+        """Write every buffered reading and close the open part files."""
+        for partition in list(self._columns):
+            self._roll(partition)
+
+    def close(self):
+        for partition in list(self._columns):
+            self._close_partition(partition)
+
+
+def _as_datetime(value, default_time):
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, default_time)
+
+
+def read_archive(root=ARCHIVE_DIR, columns=None, start=None, end=None, stations=None):
+    """Read archived readings as a DataFrame.
+
+    Only the requested ``columns`` are decoded, and partitions outside the
+    ``start``/``end`` range or the given ``stations`` are skipped unread.
+    """
+    _require_pyarrow()
+    columns = list(columns) if columns is not None else COLUMNS
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns)
+    partitioning = ds.partitioning(
+        pa.schema([("station", pa.string()), ("date", pa.string())]), flavor="hive"
+    )
+    # Part files still being written have hidden names and are skipped
+    dataset = ds.dataset(
+        root,
+        format="parquet",
+        partitioning=partitioning,
+        ignore_prefixes=[".", "_"],
+    )
+
+    conditions = []
+    if start is not None:
+        start = _as_datetime(start, datetime.min.time())
+        conditions.append(ds.field("date") >= start.date().isoformat())
+        conditions.append(ds.field("Timestamp") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        end = _as_datetime(end, datetime.max.time())
+        conditions.append(ds.field("date") <= end.date().isoformat())
+        conditions.append(ds.field("Timestamp") <= pa.scalar(end, pa.timestamp("us")))
+    if stations is not None:
+        conditions.append(ds.field("station").isin(list(stations)))
+
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
@@ -0,0 +1,80 @@
+"""SQL that differs between the supported databases.
+
+PostgreSQL is the default. Point DATABASE_URL at a file, for example
+``sqlite:///energy.db``, to run a single site or the benchmarks without a
+database server. SQLite then keeps the readings in one indexed table instead
+of daily partitions, and runs in WAL mode so the dashboard can read while the
+acquisition process writes.
+"""
+
+from data_aquisition import da_config
+
+
+class PostgresBackend:
+    """SQL fragments for PostgreSQL, the reference backend."""
+
+    name = "postgresql"
+    partitioned = True
+
+    def partition_clause(self):
+        """Return the clause that partitions the readings table by day."""
+        return 'PARTITION BY RANGE ("Timestamp")'
+
+    def time_bucket(self, resolution, column='"Timestamp"'):
+        """Return an expression truncating ``column`` to a resolution."""
+        return f"date_trunc('{resolution}', {column})"
+
+    def least(self, *expressions):
+        return f"LEAST({', '.join(expressions)})"
+
+    def greatest(self, *expressions):
+        return f"GREATEST({', '.join(expressions)})"
+
+    def last_value(self, column, order='"Timestamp"'):
+        """Return an aggregate picking ``column`` from the row latest by ``order``."""
+        return f"(ARRAY_AGG({column} ORDER BY {order} DESC))[1]"
+
+
+class SQLiteBackend(PostgresBackend):
+    """SQL fragments for an embedded SQLite file."""
+
+    name = "sqlite"
+    partitioned = False
+
+    # Timestamps are stored as ISO text, so buckets are formatted prefixes
+    BUCKET_FORMATS = {
+        "minute": "%Y-%m-%d %H:%M:00",
+        "hour": "%Y-%m-%d %H:00:00",
+        "day": "%Y-%m-%d 00:00:00",
+    }
+
+    def partition_clause(self):
+        return ""
+
+    def time_bucket(self, resolution, column='"Timestamp"'):
+        if resolution not in self.BUCKET_FORMATS:
+            raise ValueError(f"Unknown resolution {resolution!r}")
+        return f"strftime('{self.BUCKET_FORMATS[resolution]}', {column})"
+
+    def least(self, *expressions):
+        return f"MIN({', '.join(expressions)})"
+
+    def greatest(self, *expressions):
+        return f"MAX({', '.join(expressions)})"
+
+    def last_value(self, column, order='"Timestamp"'):
+        # ISO text padded to a fixed width sorts in time order, so the maximum
+        # of "<timestamp><value>" carries the latest value after the padding
+        return f"CAST(SUBSTR(MAX(printf('%-26s%s', {order}, {column})), 27) AS REAL)"
+
+
+BACKENDS = {backend.name: backend for backend in [PostgresBackend(), SQLiteBackend()]}
+
+
+def get_backend(engine=None):
+    """Return the backend for ``engine``, by default the configured engine."""
+    name = (engine or da_config.engine).dialect.name
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported database {name!r}") from None
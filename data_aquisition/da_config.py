@@ -1,40 +1,154 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from config import DatabaseConfig
 from sqlalchemy.exc import SQLAlchemyError
+import metrics
 
 # Serial Port Configuration
 SERIAL_PORT = os.getenv("SERIAL_PORT", "/dev/ttyACM0")
 BAUD_RATE = int(os.getenv("BAUD_RATE", 9600))
 
+# Readings Table Configuration, one table range-partitioned by day
+READINGS_TABLE = os.getenv("READINGS_TABLE", "readings")
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 0))  # 0 keeps every partition
+
+# Historical Data Configuration
+HISTORICAL_TABLE = os.getenv("HISTORICAL_TABLE", "historical_timeseries")
+
+# Ingest Batching Configuration
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 500))
+FLUSH_INTERVAL = float(os.getenv("FLUSH_INTERVAL", 1.0))
+
+# Acquisition Pipeline Configuration
+QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", 10000))
+OVERFLOW_POLICY = os.getenv("OVERFLOW_POLICY", "block")  # block, drop_oldest, spill
+SPILL_DIR = os.getenv("SPILL_DIR", "spill")
+
+# Parquet Archive Configuration, the archive sink is enabled when this is set
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")
+
+# Alert Configuration, alerts go to ALERTS_FILE as JSON lines when it is set
+ALERTS_TABLE = os.getenv("ALERTS_TABLE", "alerts")
+ALERTS_FILE = os.getenv("ALERTS_FILE")
+ALERT_COOLDOWN = float(os.getenv("ALERT_COOLDOWN", 300))  # seconds between repeats
+
+# Metrics Configuration, the acquisition process serves /metrics on this port
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0)) or None
+
 # Database Configuration
-# Create the database engine
-engine = DatabaseConfig().create_engine()
+POOL_SIZE = int(os.getenv("POOL_SIZE", 5))
+POOL_MAX_OVERFLOW = int(os.getenv("POOL_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = float(os.getenv("POOL_TIMEOUT", 30))
+POOL_RECYCLE = int(os.getenv("POOL_RECYCLE", 1800))
 
-# Global persistent connection
-persistent_connection = None
+# Create the database engine, connections are pooled and checked before use
+engine = DatabaseConfig().create_engine(
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_recycle=POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+_pool_stats_lock = threading.Lock()
+_pool_stats = {"checkouts": 0, "errors": 0, "wait_seconds": 0.0, "max_wait": 0.0}
+_connect_seconds = metrics.histogram("db_connect_seconds")
+_connect_errors = metrics.counter("db_errors_total", operation="connect")
 
 
 def get_db_connection():
-    """Get a persistent database connection, reconnecting if necessary."""
-    global persistent_connection
-    print("Getting a database connection")
+    """Check a connection out of the pool, or return None if that fails.
+
+    Closing the returned connection hands it back to the pool, so each
+    caller, thread or Streamlit session gets a connection of its own.
+    """
+    start = time.perf_counter()
     try:
-        # Check if the connection is inactive or closed
-        if persistent_connection is None or persistent_connection.closed:
-            print("Establishing a new connection")
-            persistent_connection = engine.connect()
-            print("Database connection established or reconnected successfully.")
-        else:
-            print("Using existing connection")
+        conn = engine.connect()
     except SQLAlchemyError as e:
         print(f"Database connection error: {e}")
-        persistent_connection = None
-    return persistent_connection
+        _connect_errors.inc()
+        with _pool_stats_lock:
+            _pool_stats["errors"] += 1
+        return None
+    wait = time.perf_counter() - start
+    _connect_seconds.observe(wait)
+    with _pool_stats_lock:
+        _pool_stats["checkouts"] += 1
+        _pool_stats["wait_seconds"] += wait
+        _pool_stats["max_wait"] = max(_pool_stats["max_wait"], wait)
+    return conn
+
+
+@contextmanager
+def db_connection():
+    """Yield a pooled connection and return it to the pool afterwards."""
+    conn = get_db_connection()
+    if conn is None:
+        raise SQLAlchemyError("Database connection failed.")
+    try:
+        yield conn
+    finally:
+        conn.close()
 
 
+def pool_stats():
+    """Return checkout counts, wait times and the current pool occupancy."""
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    checkouts = stats.pop("checkouts")
+    return {
+        "checkouts": checkouts,
+        "errors": stats["errors"],
+        "avg_wait_ms": stats["wait_seconds"] / checkouts * 1000 if checkouts else 0.0,
+        "max_wait_ms": stats["max_wait"] * 1000,
+        "checked_out": engine.pool.checkedout(),
+        "pool_size": engine.pool.size(),
+        "overflow": engine.pool.overflow(),
+    }
+
+
+# Reading Columns, in table and file order
+COLUMNS = [
+    "Process_ID",
+    "ID",
+    "Timestamp",
+    "Voltage",
+    "Current",
+    "Power",
+    "Energy",
+    "Frequency",
+    "PF",
+]
+
 # Station Name and Data File Path
 STATION = os.getenv("STATION", "station01")
-TEMP_DATA_FILE = os.getenv(
-    "TEMP_DATA_FILE", f"{STATION}_{datetime.now().strftime('%d_%m_%y')}_temp.csv"
-)
+
+
+def parse_stations(spec):
+    """Parse "station01=/dev/ttyACM0,station02=/dev/ttyACM1" into a dict."""
+    stations = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, port = entry.partition("=")
+        if not port:
+            raise ValueError(f"Station entry {entry!r} should look like name=port")
+        stations[name.strip()] = port.strip()
+    return stations
+
+
+# Stations read by the acquisition supervisor, one serial port each
+STATIONS = parse_stations(os.getenv("STATIONS", f"{STATION}={SERIAL_PORT}"))
+
+
+def temp_data_file(day=None, station=STATION):
+    """Return the temp CSV file name for a station on a given day."""
+    day = day or datetime.now()
+    return f"{station}_{day.strftime('%d_%m_%y')}_temp.csv"
+
+
+# A fixed temp CSV file shared by every station, instead of dated files
+CSV_FILE = os.getenv("TEMP_DATA_FILE")
+TEMP_DATA_FILE = CSV_FILE or temp_data_file()
@@ -1,38 +1,268 @@
 import serial
 import random
+import time
+from contextlib import ExitStack
 from datetime import datetime
-from db_operations import append_to_temp_table
-from data_aquisition.file_operations import append_to_csv
-from data_aquisition.da_config import SERIAL_PORT, BAUD_RATE
+import metrics
+from data_aquisition.alerts import AlertEngine
+from data_aquisition.archive import ParquetArchive
+from data_aquisition.db_operations import BatchWriter
+from data_aquisition.file_operations import CsvWriter
+from data_aquisition.pipeline import Pipeline
+from data_aquisition.rollups import RollupWriter
+from data_aquisition.da_config import (
+    ARCHIVE_DIR,
+    BAUD_RATE,
+    CSV_FILE,
+    SERIAL_PORT,
+    STATION,
+)
+
+
+def open_pipeline(stack):
+    """Enter the acquisition sinks on ``stack`` and return the pipeline feeding them.
+
+    Readings of every station share the one batched database writer; the CSV
+    sink keeps a temp file per station, or one writer for the fixed
+    TEMP_DATA_FILE when that is set.
+    """
+    writer = stack.enter_context(BatchWriter())
+    rollup_writer = stack.enter_context(RollupWriter())
+    alert_engine = stack.enter_context(AlertEngine())
+    csv_writers = {}
+
+    def write_csv(data):
+        station = data["Process_ID"] if CSV_FILE is None else None
+        if station not in csv_writers:
+            csv_writers[station] = CsvWriter(station=station)
+        csv_writers[station].write(data)
+
+    stack.callback(lambda: [csv_writer.close() for csv_writer in csv_writers.values()])
+    sinks = {
+        "csv": write_csv,
+        "db": writer.append,
+        "rollups": rollup_writer.write,
+        "alerts": alert_engine.write,
+    }
+    if ARCHIVE_DIR:
+        sinks["archive"] = stack.enter_context(ParquetArchive()).write
+    return stack.enter_context(Pipeline(sinks))
 
 
 def read_serial_data(mock=False):
     id_counter = 1
-    while True:
+    with ExitStack() as stack:
+        pipeline = open_pipeline(stack)
+        while True:
+            try:
+                data = (
+                    generate_mock_data(id_counter)
+                    if mock
+                    else get_serial_data(id_counter)
+                )
+                if data is None:
+                    continue
+                pipeline.put(data)
+                id_counter += 1
+            except Exception as e:
+                print(f"Data acquisition error: {e}")
+
+
+class SerialReader:
+    """Hold a serial port open and stream CSV frames from it.
+
+    Bytes are read in bulk and split into lines, so many frames are handled per
+    read. If the device disappears the port is reopened with exponential
+    backoff. A partial line longer than ``MAX_LINE_BYTES`` is dropped, so a
+    device that never sends a newline cannot grow the buffer without bound.
+    ``port`` may be a device path or any pyserial URL such as ``loop://``,
+    which makes the reader usable against a pty or loopback.
+    """
+
+    FIELD_COUNT = 7
+    MAX_LINE_BYTES = 4096
+
+    def __init__(
+        self,
+        port=SERIAL_PORT,
+        baud_rate=BAUD_RATE,
+        timeout=1,
+        backoff=0.5,
+        max_backoff=30,
+    ):
+        self.port = port
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.frames_read = 0
+        self.malformed = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self._serial = None
+        self._buffer = b""
+        self._closed = False
+        self._bytes_total = metrics.counter("serial_bytes_total", port=port)
+        self._frames_total = metrics.counter("serial_frames_total", port=port)
+        self._malformed_total = metrics.counter("serial_malformed_total", port=port)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open_once(self):
+        """Open the port, raising serial.SerialException if that fails."""
+        self._serial = serial.serial_for_url(
+            self.port, self.baud_rate, timeout=self.timeout
+        )
+        return self._serial
+
+    def open(self):
+        """Open the port, retrying with exponential backoff until it succeeds."""
+        delay = self.backoff
+        while not self._closed:
+            try:
+                return self.open_once()
+            except serial.SerialException as e:
+                print(f"Serial open error on {self.port}: {e}, retrying in {delay}s")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+        return None
+
+    def close(self):
+        """Close the port and stop any running generators."""
+        self._closed = True
+        self.disconnect()
+
+    def disconnect(self):
+        """Close the port, dropping any partial frame, so it can be reopened."""
+        if self._buffer:
+            self.dropped += 1
+            self._buffer = b""
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    def _reconnect(self):
+        self.disconnect()
+        self.reconnects += 1
+        metrics.counter("serial_reconnects_total", port=self.port).inc()
+        return self.open()
+
+    def fileno(self):
+        return self._serial.fileno()
+
+    def read_available(self):
+        """Read whatever bytes are waiting, or wait for one up to the timeout."""
+        port = self._serial
+        if port is None:
+            raise serial.SerialException(f"{self.port} is not open")
+        chunk = port.read(max(1, port.in_waiting))
+        self._bytes_total.inc(len(chunk))
+        return chunk
+
+    def lines(self):
+        """Yield decoded lines from the port as they arrive."""
+        if self._serial is None and self.open() is None:
+            return  # Closed before the port could be opened
+        while not self._closed:
+            try:
+                chunk = self.read_available()
+            except (serial.SerialException, OSError) as e:
+                if self._closed:
+                    return
+                print(f"Serial read error on {self.port}: {e}, reconnecting")
+                if self._reconnect() is None:
+                    return
+                continue
+            if not chunk:
+                continue
+            yield from self.split_lines(chunk)
+
+    def split_lines(self, chunk):
+        """Return the complete lines in ``chunk``, keeping any partial line."""
+        *complete, self._buffer = (self._buffer + chunk).split(b"\n")
+        if len(self._buffer) > self.MAX_LINE_BYTES:
+            self.dropped += 1
+            self._buffer = b""
+        lines = []
+        for raw_line in complete:
+            try:
+                line = raw_line.decode("utf-8").strip()
+            except UnicodeDecodeError:
+                self.dropped += 1
+                continue
+            if line:
+                lines.append(line)
+        return lines
+
+    def parse_frame(self, line):
+        """Return the fields of a well-formed 7-field CSV frame, or None."""
+        components = line.split(",")
+        if len(components) != self.FIELD_COUNT:
+            self.malformed += 1
+            self._malformed_total.inc()
+            return None
         try:
-            data = (
-                generate_mock_data(id_counter) if mock else get_serial_data(id_counter)
-            )
-            append_to_csv(data)
-            append_to_temp_table(data)
+            for value in components[1:]:
+                float(value)
+        except ValueError:
+            self.malformed += 1
+            self._malformed_total.inc()
+            return None
+        self.frames_read += 1
+        self._frames_total.inc()
+        return components
+
+    def frames(self):
+        """Yield the fields of every well-formed 7-field CSV frame."""
+        for line in self.lines():
+            components = self.parse_frame(line)
+            if components is not None:
+                yield components
+
+    def records(self, id_counter=1):
+        """Yield formatted readings, numbering them from ``id_counter``."""
+        for components in self.frames():
+            yield format_data(id_counter, components)
             id_counter += 1
-        except Exception as e:
-            print(f"Data acquisition error: {e}")
+
+    def stats(self):
+        """Return frame counters for this reader."""
+        return {
+            "frames": self.frames_read,
+            "malformed": self.malformed,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+_serial_frames = None
 
 
 def get_serial_data(id_counter):
-    with serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1) as ser:
-        raw_data = ser.readline().decode("utf-8").strip()
-        components = raw_data.split(",")
-        if len(components) == 7:
-            return format_data(id_counter, components)
+    """Return the next reading from a shared, long-lived serial reader.
+
+    If the reader stops, for example because its port was closed, a new one
+    takes its place.
+    """
+    global _serial_frames
+    while True:
+        if _serial_frames is None:
+            _serial_frames = SerialReader().frames()
+        try:
+            return format_data(id_counter, next(_serial_frames))
+        except StopIteration:
+            _serial_frames = None
 
 
-def generate_mock_data(id_counter):
+def generate_mock_data(id_counter, station=STATION):
     return format_data(
         id_counter,
         [
-            "station01",
+            station,
             round(random.uniform(220, 230), 2),
             round(random.uniform(0.01, 0.05), 2),
             round(random.uniform(0, 5), 2),
@@ -45,7 +275,7 @@ def generate_mock_data(id_counter):
 
 def format_data(id_counter, components):
     return {
-        "Process_ID": "station01",
+        "Process_ID": components[0],
         "ID": id_counter,
         "Timestamp": datetime.now(),
         "Voltage": float(components[1]),
@@ -1,49 +1,197 @@
-from datetime import datetime
+import csv
+import io
+import threading
+import time
+from datetime import datetime, timedelta
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-from data_aquisition.da_config import get_db_connection
+import metrics
+from data_aquisition.archive import read_archive
+from data_aquisition.backends import get_backend
+from data_aquisition.da_config import (
+    BATCH_SIZE,
+    COLUMNS,
+    FLUSH_INTERVAL,
+    HISTORICAL_TABLE,
+    READINGS_TABLE,
+    RETENTION_DAYS,
+    get_db_connection,
+)
 import pandas as pd
 import streamlit as st
 
 
+def partition_name(day):
+    """Return the name of the readings partition holding a given day."""
+    return f"{READINGS_TABLE}_{day.strftime('%Y%m%d')}"
+
+
+def partition_day(name):
+    """Return the day held by a partition name, or None if it is not one."""
+    try:
+        return datetime.strptime(name.rsplit("_", 1)[1], "%Y%m%d").date()
+    except (IndexError, ValueError):
+        return None
+
+
+# Days whose partitions are known to exist, so inserts skip the DDL round-trip
+_known_partitions = set()
+
+_flush_seconds = metrics.histogram("db_flush_seconds")
+_rows_written = metrics.counter("db_rows_written_total")
+_rows_dropped = metrics.counter("db_rows_dropped_total")
+_insert_errors = metrics.counter("db_errors_total", operation="insert")
+
+
+def create_readings_table(days_ahead=1):
+    """Create the readings table, its index and upcoming partitions.
+
+    Backends without partitioning, such as SQLite, get one plain table.
+    """
+    backend = get_backend()
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        conn.execute(
+            text(
+                f"""CREATE TABLE IF NOT EXISTS {READINGS_TABLE} (
+                "Process_ID" VARCHAR(50),
+                "ID" INTEGER,
+                "Timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                "Voltage" NUMERIC(6,2),
+                "Current" NUMERIC(6,2),
+                "Power" NUMERIC(8,2),
+                "Energy" NUMERIC(8,3),
+                "Frequency" NUMERIC(5,2),
+                "PF" NUMERIC(3,2)
+            ) {backend.partition_clause()};"""
+            )
+        )
+        conn.execute(
+            text(
+                f"""CREATE INDEX IF NOT EXISTS {READINGS_TABLE}_station_time_idx
+                ON {READINGS_TABLE} ("Process_ID", "Timestamp");"""
+            )
+        )
+        conn.commit()
+        print(f"Table {READINGS_TABLE} is ready.")
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+    finally:
+        conn.close()
+    today = datetime.now().date()
+    ensure_partitions(today + timedelta(days=i) for i in range(days_ahead + 1))
+
+
 def create_temp_table():
+    """Create the readings table; kept for callers of the old daily tables."""
+    create_readings_table()
+
+
+def ensure_partitions(days):
+    """Create any missing daily partitions, retiring expired ones afterwards."""
+    missing = sorted(set(days) - _known_partitions)
+    if not missing:
+        return
+    if not get_backend().partitioned:
+        # One table holds every day; only retention runs when a new day starts
+        _known_partitions.update(missing)
+        retire_partitions()
+        return
     conn = get_db_connection()
-    date_formatted = datetime.now().strftime("%d_%m_%y")
-    table_name = f"temp_data_table_{date_formatted}"
+    if conn is None:
+        return  # Retried with the next insert, which fails on its own
     try:
-        query = text(f"SELECT to_regclass('{table_name}');")
-        result = conn.execute(query)
-        if result.scalar() is None:
+        for day in missing:
             conn.execute(
                 text(
-                    f"""CREATE TABLE {table_name} (
-                    "Process_ID" VARCHAR(50),
-                    "ID" INTEGER,
-                    "Timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
-                    "Voltage" NUMERIC(6,2),
-                    "Current" NUMERIC(6,2),
-                    "Power" NUMERIC(8,2),
-                    "Energy" NUMERIC(8,3),
-                    "Frequency" NUMERIC(5,2),
-                    "PF" NUMERIC(3,2)
-                );"""
+                    f"""CREATE TABLE IF NOT EXISTS {partition_name(day)}
+                    PARTITION OF {READINGS_TABLE}
+                    FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}');"""
                 )
             )
-            print(f"Table {table_name} created successfully.")
-            conn.commit()
+        conn.commit()
+        _known_partitions.update(missing)
     except SQLAlchemyError as e:
-        print(f"Database error: {e}")
+        print(f"Database partition error: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+    retire_partitions()
+
+
+def retire_partitions(retention_days=RETENTION_DAYS):
+    """Drop partitions older than ``retention_days`` and return their names.
+
+    Without partitions the expired rows are deleted instead, and no names
+    are returned.
+    """
+    if not retention_days:
+        return []
+    cutoff = datetime.now().date() - timedelta(days=retention_days)
+    if not get_backend().partitioned:
+        retire_rows(cutoff)
+        return []
+    retired = []
+    conn = get_db_connection()
+    if conn is None:
+        return retired
+    try:
+        result = conn.execute(
+            text(
+                """SELECT child.relname FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :table;"""
+            ),
+            {"table": READINGS_TABLE},
+        )
+        for (name,) in result.fetchall():
+            day = partition_day(name)
+            if day is not None and day < cutoff:
+                conn.execute(text(f"DROP TABLE {name};"))
+                _known_partitions.discard(day)
+                retired.append(name)
+        conn.commit()
+        if retired:
+            print(f"Retired partitions: {', '.join(retired)}")
+    except SQLAlchemyError as e:
+        print(f"Database partition error: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+    return retired
+
+
+def retire_rows(cutoff):
+    """Delete readings from before ``cutoff`` and return the number deleted."""
+    conn = get_db_connection()
+    if conn is None:
+        return 0
+    try:
+        result = conn.execute(
+            text(f'DELETE FROM {READINGS_TABLE} WHERE "Timestamp" < :cutoff;'),
+            {"cutoff": datetime.combine(cutoff, datetime.min.time())},
+        )
+        conn.commit()
+        if result.rowcount:
+            print(f"Retired {result.rowcount} readings from before {cutoff}")
+        return result.rowcount
+    except SQLAlchemyError as e:
+        print(f"Database retention error: {e}")
+        conn.rollback()
+        return 0
     finally:
         conn.close()
 
 
 def append_to_temp_table(data):
+    ensure_partitions([data["Timestamp"].date()])
     conn = get_db_connection()
-    date_formatted = datetime.now().strftime("%d_%m_%y")
-    table_name = f"temp_data_table_{date_formatted}"
     try:
         query = text(
-            f"""INSERT INTO {table_name} ("Process_ID", "ID", "Timestamp", "Voltage", 
+            f"""INSERT INTO {READINGS_TABLE} ("Process_ID", "ID", "Timestamp", "Voltage", 
                         "Current", "Power", "Energy", "Frequency", "PF") 
                         VALUES (:Process_ID, :ID, :Timestamp, :Voltage, :Current, :Power, 
                         :Energy, :Frequency, :PF);"""
@@ -56,11 +204,189 @@ def append_to_temp_table(data):
         conn.close()
 
 
+@metrics.timed("db_insert_seconds", table=READINGS_TABLE)
+def append_rows_to_temp_table(rows, use_copy=False):
+    """Write many readings to the readings table in a single transaction.
+
+    Uses a multi-row INSERT by default, or ``COPY FROM STDIN`` when ``use_copy``
+    is set and the connection is PostgreSQL. Returns True on success.
+    """
+    ensure_partitions({row["Timestamp"].date() for row in rows})
+    conn = get_db_connection()
+    if conn is None:
+        _insert_errors.inc()
+        return False
+    table_name = READINGS_TABLE
+    try:
+        if use_copy and conn.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([row[column] for column in COLUMNS])
+            buffer.seek(0)
+            columns = ", ".join(f'"{column}"' for column in COLUMNS)
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            query = text(
+                f"""INSERT INTO {table_name} ("Process_ID", "ID", "Timestamp", "Voltage", 
+                            "Current", "Power", "Energy", "Frequency", "PF") 
+                            VALUES (:Process_ID, :ID, :Timestamp, :Voltage, :Current, :Power, 
+                            :Energy, :Frequency, :PF);"""
+            )
+            conn.execute(query, rows)
+        conn.commit()
+        return True
+    except SQLAlchemyError as e:
+        _insert_errors.inc()
+        print(f"Database bulk insert error: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+class BatchWriter:
+    """Collect readings in memory and flush them to the readings table in bulk.
+
+    A flush happens when ``max_rows`` readings are buffered or ``max_delay``
+    seconds have passed since the last one, whichever comes first, and again
+    when the writer is closed. Rows from a failed flush are kept for the next
+    attempt, up to ``max_pending`` rows after which the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        max_rows=BATCH_SIZE,
+        max_delay=FLUSH_INTERVAL,
+        max_pending=None,
+        use_copy=False,
+        write_rows=None,
+    ):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending or max_rows * 10
+        self.use_copy = use_copy
+        self.write_rows = write_rows or append_rows_to_temp_table
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.flush_seconds = 0.0
+        self.last_flush_latency = 0.0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, data):
+        """Buffer one reading, flushing if the size limit is reached."""
+        with self._lock:
+            self._buffer.append(data)
+            full = len(self._buffer) >= self.max_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered readings and return the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            try:
+                ok = self.write_rows(rows, use_copy=self.use_copy)
+            except Exception as e:
+                print(f"Batch writer flush error: {e}")
+                ok = False
+            latency = time.perf_counter() - start
+            _flush_seconds.observe(latency)
+            self.flush_seconds += latency
+            self.last_flush_latency = latency
+            if ok is False:
+                self.failed_flushes += 1
+                self._requeue(rows)
+                return 0
+            self.flush_count += 1
+            self.rows_written += len(rows)
+            _rows_written.inc(len(rows))
+            return len(rows)
+
+    def _requeue(self, rows):
+        with self._lock:
+            self._buffer = rows + self._buffer
+            overflow = len(self._buffer) - self.max_pending
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.rows_dropped += overflow
+                _rows_dropped.inc(overflow)
+
+    def _run(self):
+        while not self._stopped.wait(self.max_delay):
+            self.flush()
+
+    def pending(self):
+        """Return the number of readings waiting to be flushed."""
+        with self._lock:
+            return len(self._buffer)
+
+    def stats(self):
+        """Return throughput and flush latency figures for this writer."""
+        elapsed = time.monotonic() - self._started_at
+        attempts = self.flush_count + self.failed_flushes
+        return {
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "rows_pending": self.pending(),
+            "flushes": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "rows_per_second": self.rows_written / elapsed if elapsed else 0.0,
+            "avg_flush_latency_ms": (
+                self.flush_seconds / attempts * 1000 if attempts else 0.0
+            ),
+            "last_flush_latency_ms": self.last_flush_latency * 1000,
+        }
+
+    def close(self):
+        """Stop the background flusher and write any remaining readings."""
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+        stats = self.stats()
+        print(
+            f"Batch writer closed: {stats['rows_written']} rows in "
+            f"{stats['flushes']} flushes, {stats['rows_per_second']:.1f} rows/s, "
+            f"avg flush {stats['avg_flush_latency_ms']:.1f} ms"
+        )
+
+
 # @st.cache_data
-def load_historical_data():
-    """Load historical data from the database and format it."""
+@metrics.timed("db_query_seconds", query="load_historical_data")
+def load_historical_data(archive_dir=None, start=None, end=None):
+    """Load historical data from the database and format it.
+
+    When ``archive_dir`` is given the readings are read from the Parquet
+    archive instead, limited to the ``start``/``end`` range.
+    """
+    if archive_dir:
+        df = read_archive(archive_dir, start=start, end=end)
+        df["Station"] = df["Process_ID"]
+        return df
+
     conn = get_db_connection()
-    query = "SELECT * FROM historical_timeseries"
+    query = f"SELECT * FROM {HISTORICAL_TABLE}"
     df = pd.read_sql(query, conn)
     conn.close()
 
@@ -68,25 +394,202 @@ def load_historical_data():
     return df
 
 
-def load_real_time_data():
-    """Load real-time data for a specific station from the temporary data table."""
+# Chart resolutions, finest first, with their bucket width
+RESOLUTIONS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def pick_resolution(start, end, max_points=2000):
+    """Return the finest resolution that keeps a range under ``max_points``."""
+    span = end - start
+    for resolution, width in RESOLUTIONS.items():
+        if span / width <= max_points:
+            return resolution
+    return "day"
+
+
+def day_bounds(start, end):
+    """Turn a date range into datetimes, with an exclusive end for whole days."""
+    if start is not None and not isinstance(start, datetime):
+        start = datetime.combine(start, datetime.min.time())
+    if end is not None and not isinstance(end, datetime):
+        end = datetime.combine(end, datetime.min.time()) + timedelta(days=1)
+    return start, end
+
+
+@metrics.timed("db_query_seconds", query="query_historical_data")
+def query_historical_data(station=None, start=None, end=None, resolution="auto"):
+    """Return historical readings averaged per time bucket, filtered in SQL.
+
+    ``station`` of None averages all stations together. ``resolution`` is
+    "raw" (one row per timestamp), "minute", "hour", "day" or "auto", which
+    picks the finest resolution that keeps the range chartable. Dates are
+    treated as whole days, so ``end`` is inclusive.
+    """
+    start, end = day_bounds(start, end)
+    if resolution == "auto":
+        if start is None or end is None:
+            start_bound, end_bound = load_date_range()
+            start, end = start or start_bound, end or end_bound
+        resolution = pick_resolution(start, end) if start and end else "day"
+    if resolution == "raw":
+        bucket = '"Timestamp"'
+    elif resolution in RESOLUTIONS:
+        bucket = get_backend().time_bucket(resolution)
+    else:
+        raise ValueError(f"Unknown resolution {resolution!r}")
+
+    conditions, params = [], {"station": station or "Overall"}
+    if station is not None:
+        conditions.append('"Process_ID" = :station')
+    if start is not None:
+        conditions.append('"Timestamp" >= :start')
+        params["start"] = start
+    if end is not None:
+        conditions.append('"Timestamp" < :end')
+        params["end"] = end
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    averages = ", ".join(
+        f'CAST(AVG("{column}") AS DOUBLE PRECISION) AS "{column}"'
+        for column in ["Voltage", "Current", "Power", "Energy", "Frequency", "PF"]
+    )
+    query = text(
+        f"""SELECT {bucket} AS "Timestamp", CAST(:station AS VARCHAR) AS "Station",
+        {averages}
+        FROM {HISTORICAL_TABLE} {where}
+        GROUP BY 1 ORDER BY 1;"""
+    )
+
     conn = get_db_connection()
-    date_formatted = datetime.now().strftime("%d_%m_%y")
+    try:
+        return pd.read_sql(query, conn, params=params, parse_dates=["Timestamp"])
+    finally:
+        conn.close()
 
-    if conn:
-        try:
-            query = text(
-                f"""
-                SELECT * FROM temp_data_table_{date_formatted}
-                ORDER BY "Timestamp" DESC
-                LIMIT 120;
-            """
+
+def create_historical_indexes():
+    """Index the historical table for station/time filters and range lookups."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        conn.execute(
+            text(
+                f"""CREATE INDEX IF NOT EXISTS {HISTORICAL_TABLE}_station_time_idx
+                ON {HISTORICAL_TABLE} ("Process_ID", "Timestamp");"""
+            )
+        )
+        conn.execute(
+            text(
+                f"""CREATE INDEX IF NOT EXISTS {HISTORICAL_TABLE}_time_idx
+                ON {HISTORICAL_TABLE} ("Timestamp");"""
             )
-            real_time_df = pd.read_sql(query, conn)
+        )
+        conn.commit()
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+    finally:
+        conn.close()
+
+
+@metrics.timed("db_query_seconds", query="load_station_list")
+def load_station_list():
+    """Return the stations present in the historical data."""
+    conn = get_db_connection()
+    try:
+        result = conn.execute(
+            text(
+                f'SELECT DISTINCT "Process_ID" FROM {HISTORICAL_TABLE} '
+                'ORDER BY "Process_ID";'
+            )
+        )
+        return [station for (station,) in result.fetchall()]
+    finally:
+        conn.close()
+
+
+@metrics.timed("db_query_seconds", query="load_date_range")
+def load_date_range(station=None, start=None, end=None):
+    """Return the first and last timestamps in the historical data.
 
-            return real_time_df
+    ``station``, ``start`` and an exclusive ``end`` narrow the rows looked at.
+    """
+    conditions, params = [], {"station": station, "start": start, "end": end}
+    if station is not None:
+        conditions.append('"Process_ID" = :station')
+    if start is not None:
+        conditions.append('"Timestamp" >= :start')
+    if end is not None:
+        conditions.append('"Timestamp" < :end')
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    conn = get_db_connection()
+    try:
+        result = conn.execute(
+            text(
+                f'SELECT MIN("Timestamp"), MAX("Timestamp") '
+                f"FROM {HISTORICAL_TABLE} {where};"
+            ),
+            params,
+        )
+        # Drivers without a timestamp type, such as SQLite, return text
+        return tuple(pd.to_datetime(list(result.one())))
+    finally:
+        conn.close()
+
+
+@metrics.timed("db_query_seconds", query="load_readings")
+def load_readings(
+    station=None, start=None, end=None, latest=None, after=None, limit=None
+):
+    """Load readings for one station, or all, within a time window.
+
+    The window bounds let PostgreSQL skip partitions outside the range, and
+    the ("Process_ID", "Timestamp") index serves both the filter and the
+    ordering. ``after`` is an exclusive lower bound, for fetching only rows
+    newer than the last one seen. With ``latest`` only the newest that many
+    rows are returned, with ``limit`` only the oldest that many, for paging
+    through a backlog. Rows come back oldest first.
+    """
+    conditions, params = [], {}
+    if station is not None:
+        conditions.append('"Process_ID" = :station')
+        params["station"] = station
+    if start is not None:
+        conditions.append('"Timestamp" >= :start')
+        params["start"] = start
+    if after is not None:
+        conditions.append('"Timestamp" > :after')
+        params["after"] = after
+    if end is not None:
+        conditions.append('"Timestamp" <= :end')
+        params["end"] = end
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Bind plain datetimes; not every driver adapts pandas Timestamps
+    for name, value in params.items():
+        if isinstance(value, pd.Timestamp):
+            params[name] = value.to_pydatetime()
+    if latest is not None:
+        order = 'ORDER BY "Timestamp" DESC LIMIT :latest'
+        params["latest"] = latest
+    elif limit is not None:
+        order = 'ORDER BY "Timestamp" LIMIT :limit'
+        params["limit"] = limit
+    else:
+        order = 'ORDER BY "Timestamp"'
+
+    conn = get_db_connection()
+    if conn:
+        try:
+            query = text(f"SELECT * FROM {READINGS_TABLE} {where} {order};")
+            df = pd.read_sql(query, conn, params=params, parse_dates=["Timestamp"])
+            if latest is not None:
+                df = df.iloc[::-1].reset_index(drop=True)
+            return df
         except SQLAlchemyError as db_error:
-            print(f"Database error occurred while loading real-time data: {db_error}")
+            print(f"Database error occurred while loading readings: {db_error}")
             return None
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -98,5 +601,11 @@ def load_real_time_data():
         return None
 
 
+def load_real_time_data(station=None, limit=120, window=timedelta(days=1)):
+    """Load the latest readings for a station from the readings table."""
+    return load_readings(station=station, start=datetime.now() - window, latest=limit)
+
+
 if __name__ == "__main__":
-    create_temp_table()
+    create_readings_table()
+    create_historical_indexes()
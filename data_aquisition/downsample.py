@@ -0,0 +1,87 @@
+"""Reduce a time series to a fixed number of points for charting.
+
+A chart cannot show more points than it has pixels, so traces are cut down
+on the server before they are sent to the browser. Two methods are offered:
+
+    lttb    Largest-Triangle-Three-Buckets, which keeps the points that
+            preserve the visual shape of the line
+    minmax  the minimum and maximum of each bucket, which never hides a peak
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, n_out):
+    """Return the indices of the ``n_out`` points LTTB keeps, in order."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # The first and last points are kept; the rest fill n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    next_x = np.append(np.add.reduceat(x[: n - 1], edges[:-1])[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[: n - 1], edges[:-1])[1:] / counts[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        # Twice the area of the triangle (previous, candidate, next bucket mean)
+        area = np.abs(
+            (x[previous] - next_x[bucket]) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (next_y[bucket] - y[previous])
+        )
+        previous = lo + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Return the indices of each bucket's minimum and maximum, in order."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    # Lay the buckets out as rows of a matrix, padding the shorter ones
+    width = int(np.diff(edges).max())
+    positions = edges[:-1, None] + np.arange(width)
+    inside = positions < edges[1:, None]
+    values = y[np.minimum(positions, n - 1)]
+    lows = np.where(inside, values, np.inf).argmin(axis=1)
+    highs = np.where(inside, values, -np.inf).argmax(axis=1)
+    return np.unique(np.concatenate([edges[:-1] + lows, edges[:-1] + highs]))
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def downsample(df, max_points, x="Timestamp", y="Energy", method="lttb"):
+    """Return at most ``max_points`` rows of ``df``, chosen from column ``y``."""
+    if len(df) <= max_points:
+        return df
+    df = df.dropna(subset=[y])
+    if method == "lttb":
+        indices = lttb_indices(_as_float(df[x]), df[y].to_numpy(), max_points)
+    elif method == "minmax":
+        indices = minmax_indices(df[y].to_numpy(), max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}")
+    return df.iloc[indices]
+
+
+def visible_range(selection):
+    """Return the (start, end) timestamps of a Plotly box selection, or None."""
+    boxes = getattr(getattr(selection, "selection", None), "box", None) or []
+    if not boxes or len(boxes[0].get("x", [])) != 2:
+        return None
+    start, end = sorted(pd.to_datetime(boxes[0]["x"]))
+    return start.to_pydatetime(), end.to_pydatetime()
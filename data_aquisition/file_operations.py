@@ -1,6 +1,18 @@
+import csv
 import os
+import threading
+import time
+from datetime import datetime
 import pandas as pd
-from data_aquisition.da_config import TEMP_DATA_FILE
+import metrics
+from data_aquisition.da_config import (
+    COLUMNS,
+    CSV_FILE,
+    FLUSH_INTERVAL,
+    STATION,
+    TEMP_DATA_FILE,
+    temp_data_file,
+)
 
 
 def append_to_csv(data):
@@ -9,3 +21,97 @@ def append_to_csv(data):
     df.to_csv(
         TEMP_DATA_FILE, mode="a", header=not os.path.exists(TEMP_DATA_FILE), index=False
     )
+
+
+_csv_rows = metrics.counter("csv_rows_total")
+
+
+class CsvWriter:
+    """Append readings to the temp CSV through one open, buffered file handle.
+
+    Rows are flushed to disk every ``flush_interval`` seconds, by a
+    background thread when no new rows arrive, and on close. Unless a fixed
+    ``filename`` is given, by argument or the TEMP_DATA_FILE setting, the
+    writer rolls over to a new dated file when the day changes.
+    """
+
+    def __init__(
+        self,
+        filename=None,
+        station=STATION,
+        flush_interval=FLUSH_INTERVAL,
+        buffer_size=64 * 1024,
+        now=datetime.now,
+    ):
+        self.filename = CSV_FILE if filename is None else filename
+        self.station = station
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.now = now
+        self.rows_written = 0
+        self.path = None
+        self._file = None
+        self._writer = None
+        self._day = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self, day):
+        self._close_file()
+        self.path = self.filename or temp_data_file(day, self.station)
+        self._file = open(
+            self.path, "a", newline="", buffering=self.buffer_size, encoding="utf-8"
+        )
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=COLUMNS, extrasaction="ignore"
+        )
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+        self._day = day
+
+    def write(self, data):
+        """Write one reading, rolling over or flushing when due."""
+        day = self.now().date()
+        with self._lock:
+            if self._file is None or (self.filename is None and day != self._day):
+                self._open(day)
+            self._writer.writerow(data)
+            self.rows_written += 1
+            _csv_rows.inc()
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                with metrics.timer("csv_flush_seconds"):
+                    self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        with self._lock:
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
@@ -0,0 +1,122 @@
+"""Process-wide cache of query results for the dashboard.
+
+Every Streamlit session runs in the same process, so one cache serves all of
+them: a frame is loaded once per key and TTL, and concurrent requests for a
+key that is already loading wait for that load instead of starting their own.
+Callers get a shallow copy sharing the cached data, which pandas'
+copy-on-write keeps read-only: editing it copies only the touched columns.
+Copy-on-write is always on from pandas 3, which requirement.txt pins.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ("frame", "expires", "nbytes")
+
+    def __init__(self, frame, expires, nbytes):
+        self.frame = frame
+        self.expires = expires
+        self.nbytes = nbytes
+
+
+class FrameCache:
+    """TTL cache of DataFrames with single-flight loading and a memory bound.
+
+    Keys are any hashable, typically (kind, station, window). When the cached
+    frames exceed ``max_bytes`` the least recently used are evicted.
+    """
+
+    def __init__(self, ttl=600, max_bytes=512 * 2**20, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.errors = 0
+        self._entries = OrderedDict()
+        self._loading = {}  # key -> Event set once the load finishes
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, load, ttl=None):
+        """Return the frame for ``key``, calling ``load()`` if it is missing.
+
+        A ``load`` returning None is passed through and not cached.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.frame.copy(deep=False)
+                done = self._loading.get(key)
+                if done is None:
+                    done = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+                self.waits += 1
+            # Another caller is loading this key; use its result when it lands
+            done.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry.frame.copy(deep=False)
+            # The load failed or was not cacheable, so try it ourselves
+
+        try:
+            frame = load()
+            if frame is not None:
+                self._store(key, frame, self.ttl if ttl is None else ttl)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            # Wake the waiters only once the frame is stored
+            with self._lock:
+                del self._loading[key]
+            done.set()
+        return None if frame is None else frame.copy(deep=False)
+
+    def _store(self, key, frame, ttl):
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[key] = _Entry(frame, self.clock() + ttl, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._nbytes = 0
+            else:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._nbytes -= entry.nbytes
+
+    def stats(self):
+        """Return hit rate, load counts and the memory held."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "errors": self.errors,
+                "hit_rate": self.hits / requests if requests else 0.0,
+            }
@@ -0,0 +1,264 @@
+"""Generate or replay readings at a controlled rate to load-test ingest.
+
+Readings are either synthetic, for any number of stations, or replayed from a
+recorded CSV file or Parquet archive. They are paced by their timestamps at
+``--speed`` times real time (0 sends as fast as possible) and either put on
+the real acquisition pipeline, or written as serial frames to one pty per
+station for the supervisor or read_serial_data to read. Writes to a pty
+block once its buffer is full, so the reader's pace limits the generator.
+Synthetic stations get their ptys before anything is sent, and ``--wait``
+holds off sending until a reader has opened every one of them.
+
+Examples, run from the repository root:
+    python -m data_aquisition.loadgen --stations 20 --rate 10 --duration 60
+    python -m data_aquisition.loadgen --replay data_aquisition/cleaned_45.csv --speed 10
+    python -m data_aquisition.loadgen --stations 4 --speed 0 --target pty --wait
+"""
+
+import argparse
+import os
+import pty
+import random
+import select
+import time
+import tty
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from itertools import islice, takewhile
+import pandas as pd
+from data_aquisition.da_config import COLUMNS
+
+
+def station_names(count):
+    return [f"station{number:02d}" for number in range(1, count + 1)]
+
+
+def synthetic_readings(stations, interval=1.0, start=None, seed=None):
+    """Yield readings for every station each ``interval`` seconds, forever."""
+    rng = random.Random(seed)
+    names = station_names(stations)
+    energy = {name: 0.0 for name in names}
+    timestamp = start or datetime.now()
+    reading_id = 1
+    while True:
+        for name in names:
+            voltage = rng.gauss(230, 2)
+            current = abs(rng.gauss(1.0, 0.3))
+            pf = min(1.0, max(0.5, rng.gauss(0.9, 0.05)))
+            power = voltage * current * pf
+            energy[name] += power * interval / 3.6e6
+            yield {
+                "Process_ID": name,
+                "ID": reading_id,
+                "Timestamp": timestamp,
+                "Voltage": round(voltage, 2),
+                "Current": round(current, 3),
+                "Power": round(power, 2),
+                "Energy": round(energy[name], 6),
+                "Frequency": round(rng.gauss(50, 0.03), 3),
+                "PF": round(pf, 3),
+            }
+        reading_id += 1
+        timestamp += timedelta(seconds=interval)
+
+
+def replay_readings(path, chunk_rows=10_000):
+    """Yield the readings of a CSV file or Parquet archive in file order."""
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        from data_aquisition.archive import ds
+
+        if ds is None:
+            raise ImportError("Replaying a Parquet archive requires pyarrow")
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        chunks = (
+            batch.to_pandas()
+            for batch in dataset.to_batches(columns=COLUMNS, batch_size=chunk_rows)
+        )
+    else:
+        chunks = pd.read_csv(
+            path, usecols=COLUMNS, parse_dates=["Timestamp"], chunksize=chunk_rows
+        )
+    for chunk in chunks:
+        for record in chunk.to_dict("records"):
+            record["Timestamp"] = record["Timestamp"].to_pydatetime()
+            yield record
+
+
+def paced(readings, speed=1.0, retime=False, sleep=time.sleep, clock=time.monotonic):
+    """Yield readings when their timestamps fall due at ``speed`` x real time.
+
+    A ``speed`` of 0 yields without waiting. With ``retime`` each reading is
+    restamped with the current time, so replayed data looks live.
+    """
+    first = started = None
+    for reading in readings:
+        if speed:
+            if first is None:
+                first, started = reading["Timestamp"], clock()
+            due = started + (reading["Timestamp"] - first).total_seconds() / speed
+            delay = due - clock()
+            if delay > 0:
+                sleep(delay)
+        if retime:
+            reading = {**reading, "Timestamp": datetime.now()}
+        yield reading
+
+
+def format_frame(reading):
+    """Return the serial frame a device would send for a reading."""
+    return (
+        f"{reading['Process_ID']},{reading['Voltage']},{reading['Current']},"
+        f"{reading['Power']},{reading['Energy']},{reading['Frequency']},"
+        f"{reading['PF']}\n"
+    ).encode("utf-8")
+
+
+class PtyDevices:
+    """One pseudo-terminal per station, standing in for its serial device.
+
+    The ptys of ``stations`` are created up front; any other station gets one
+    when its first reading is written.
+    """
+
+    def __init__(self, stations=()):
+        self.ports = {}
+        self._fds = {}
+        for station in stations:
+            self.open(station)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self, station):
+        """Create the station's pty if needed and return its device path."""
+        if station not in self._fds:
+            master, slave = pty.openpty()
+            # Raw mode, so the line discipline neither echoes nor edits frames
+            tty.setraw(slave)
+            self.ports[station] = os.ttyname(slave)
+            # Only readers hold the device open, so a hangup means none has it
+            os.close(slave)
+            self._fds[station] = master
+            print(f"{station} frames on {self.ports[station]}")
+        return self.ports[station]
+
+    def waiting(self):
+        """Return the stations whose pty no reader has open."""
+        poller = select.poll()
+        for master in self._fds.values():
+            poller.register(master, select.POLLHUP)
+        hung_up = {fd for fd, events in poller.poll(0) if events & select.POLLHUP}
+        return [station for station, fd in self._fds.items() if fd in hung_up]
+
+    def wait_for_readers(self, timeout=None, interval=0.1):
+        """Wait until every pty has a reader; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.waiting():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def write(self, reading):
+        station = reading["Process_ID"]
+        self.open(station)
+        os.write(self._fds[station], format_frame(reading))
+
+    def close(self):
+        for master in self._fds.values():
+            os.close(master)
+        self._fds.clear()
+
+
+def run(readings, put, report_interval=5.0, stats=None):
+    """Send readings to ``put``, printing the achieved rate; returns the count."""
+    sent = 0
+    started = last_report = time.monotonic()
+    for reading in readings:
+        put(reading)
+        sent += 1
+        now = time.monotonic()
+        if report_interval and now - last_report >= report_interval:
+            last_report = now
+            print(f"{sent} readings, {sent / (now - started):.0f}/s")
+            if stats is not None:
+                print(stats())
+    elapsed = time.monotonic() - started
+    print(f"Sent {sent} readings in {elapsed:.1f}s ({sent / max(elapsed, 1e-9):.0f}/s)")
+    return sent
+
+
+def positive_float(value):
+    """argparse type for a float that must be above zero."""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--replay", help="CSV file or Parquet archive to replay")
+    parser.add_argument("--stations", type=int, default=1, help="synthetic stations")
+    parser.add_argument(
+        "--rate",
+        type=positive_float,
+        default=1.0,
+        help="synthetic readings/s per station",
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="times real time, 0 for max"
+    )
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--limit", type=int, help="stop after this many readings")
+    parser.add_argument("--retime", action="store_true", help="stamp with now")
+    parser.add_argument("--target", choices=["pipeline", "pty"], default="pipeline")
+    parser.add_argument(
+        "--wait", action="store_true", help="send once every pty has a reader"
+    )
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        readings = replay_readings(args.replay)
+    else:
+        readings = synthetic_readings(args.stations, interval=1 / args.rate)
+    readings = paced(readings, args.speed, retime=args.retime)
+    if args.duration:
+        deadline = time.monotonic() + args.duration
+        readings = takewhile(lambda _: time.monotonic() < deadline, readings)
+    if args.limit:
+        readings = islice(readings, args.limit)
+
+    with ExitStack() as stack:
+        if args.target == "pty":
+            stations = [] if args.replay else station_names(args.stations)
+            devices = stack.enter_context(PtyDevices(stations))
+            if args.wait:
+                print("Waiting for a reader on every pty")
+                try:
+                    devices.wait_for_readers()
+                except KeyboardInterrupt:
+                    return
+            put, stats = devices.write, None
+        else:
+            from data_aquisition.data_acquisition import open_pipeline
+
+            pipeline = open_pipeline(stack)
+            put, stats = pipeline.put, pipeline.stats
+        try:
+            run(readings, put, args.report_interval, stats)
+        except KeyboardInterrupt:
+            pass
+    if stats is not None:
+        # The pipeline has drained, so lag figures cover every reading
+        print(stats())
+
+
+if __name__ == "__main__":
+    main()
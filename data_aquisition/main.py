@@ -1,6 +1,15 @@
-from db_operations import create_temp_table
-from data_acquisition import read_serial_data
+import metrics
+from data_aquisition.alerts import create_alerts_table
+from data_aquisition.da_config import HISTORICAL_TABLE, METRICS_PORT
+from data_aquisition.db_operations import create_readings_table
+from data_aquisition.data_acquisition import read_serial_data
+from data_aquisition.rollups import create_rollup_tables
 
 if __name__ == "__main__":
-    create_temp_table()  # Ensures the table is created at startup
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)  # Prometheus scrapes /metrics here
+    create_readings_table()  # Ensures the table and partitions exist at startup
+    create_rollup_tables()
+    create_rollup_tables(HISTORICAL_TABLE)  # Filled by the rollups backfill
+    create_alerts_table()
     read_serial_data(mock=True)  # Set mock=False for real serial data
@@ -0,0 +1,110 @@
+"""Copy the old per-day temp_data_table_DD_MM_YY tables into the readings table.
+
+Readings already in the readings table, matched on Process_ID, Timestamp and
+ID, are skipped, so an interrupted or repeated run copies nothing twice.
+
+Run from the repository root:
+    python -m data_aquisition.migrate_tables [--dry-run] [--drop]
+"""
+
+import argparse
+import re
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from data_aquisition.da_config import COLUMNS, READINGS_TABLE, get_db_connection
+from data_aquisition.db_operations import create_readings_table, ensure_partitions
+
+DAILY_TABLE = re.compile(r"^temp_data_table_(\d{2}_\d{2}_\d{2})$")
+
+
+def daily_table_day(name):
+    """Return the day encoded in a daily table name, or None if it is not one."""
+    match = DAILY_TABLE.match(name)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%d_%m_%y").date()
+
+
+def find_daily_tables(conn):
+    """Return the daily tables in the database with the days their rows span."""
+    tables = {}
+    for name in inspect(conn).get_table_names():
+        if daily_table_day(name) is None:
+            continue
+        first, last = conn.execute(
+            text(f'SELECT MIN("Timestamp"), MAX("Timestamp") FROM {name};')
+        ).one()
+        if first is not None:
+            # SQLite returns the timestamps as text
+            tables[name] = (pd.Timestamp(first).date(), pd.Timestamp(last).date())
+    return dict(sorted(tables.items(), key=lambda item: daily_table_day(item[0])))
+
+
+def migrate(dry_run=False, drop=False):
+    """Move every daily table into the readings table and return rows copied."""
+    conn = get_db_connection()
+    try:
+        tables = find_daily_tables(conn)
+    finally:
+        conn.close()
+    if not tables:
+        print("No daily tables found.")
+        return 0
+
+    for name, (first, last) in tables.items():
+        print(f"{name}: {first} to {last}")
+    if dry_run:
+        return 0
+
+    create_readings_table()
+    days = set()
+    for first, last in tables.values():
+        days.update(first + timedelta(days=i) for i in range((last - first).days + 1))
+    ensure_partitions(days)
+
+    columns = ", ".join(f'"{column}"' for column in COLUMNS)
+    copied = 0
+    conn = get_db_connection()
+    try:
+        for name in tables:
+            try:
+                result = conn.execute(
+                    text(
+                        f"INSERT INTO {READINGS_TABLE} ({columns}) "
+                        f"SELECT {columns} FROM {name} AS source "
+                        f"WHERE NOT EXISTS (SELECT 1 FROM {READINGS_TABLE} AS target "
+                        'WHERE target."Process_ID" = source."Process_ID" '
+                        'AND target."Timestamp" = source."Timestamp" '
+                        'AND target."ID" = source."ID");'
+                    )
+                )
+                if drop:
+                    conn.execute(text(f"DROP TABLE {name};"))
+                conn.commit()
+                copied += result.rowcount
+                print(f"Migrated {result.rowcount} rows from {name}.")
+            except SQLAlchemyError as e:
+                conn.rollback()
+                print(f"Database error migrating {name}: {e}")
+    finally:
+        conn.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only list the tables to migrate"
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="drop each daily table once copied"
+    )
+    args = parser.parse_args()
+    copied = migrate(dry_run=args.dry_run, drop=args.drop)
+    print(f"Copied {copied} rows into {READINGS_TABLE}.")
+
+
+if __name__ == "__main__":
+    main()
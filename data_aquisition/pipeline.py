@@ -0,0 +1,222 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from data_aquisition.da_config import OVERFLOW_POLICY, QUEUE_SIZE, SPILL_DIR
+
+POLICIES = ("block", "drop_oldest", "spill")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot spill value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class SinkWorker:
+    """Drain a bounded queue of records into one sink on a background thread.
+
+    When the queue is full, ``policy`` decides what happens to a new record:
+    ``block`` waits for space, ``drop_oldest`` discards the oldest queued
+    record, and ``spill`` appends it to a file under ``spill_dir``. While a
+    spill file exists, new records are appended to it as well, and it is
+    replayed as soon as the older records queued before it are processed, so
+    the sink sees records in the order they were put. A spill left by a
+    previous run is replayed on start. Enqueue times are wall-clock, so lag
+    figures stay meaningful for spilled records across a restart.
+    """
+
+    def __init__(
+        self,
+        name,
+        sink,
+        maxsize=QUEUE_SIZE,
+        policy=OVERFLOW_POLICY,
+        spill_dir=SPILL_DIR,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy {policy!r}, use one of {POLICIES}"
+            )
+        self.name = name
+        self.sink = sink
+        self.policy = policy
+        self.queue = queue.Queue(maxsize)
+        self.spill_path = os.path.join(spill_dir, f"{name}_spill.jsonl")
+        self.replay_path = f"{self.spill_path}.replay"
+        self.processed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._spill_lock = threading.Lock()
+        self._spilling = os.path.exists(self.spill_path) or os.path.exists(
+            self.replay_path
+        )
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"sink-{name}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, record):
+        """Queue a record for the sink, applying the overflow policy if full."""
+        item = (time.time(), record)
+        if self.policy == "block":
+            self.queue.put(item)
+            return
+        if self.policy == "spill":
+            with self._spill_lock:
+                if self._spilling:
+                    # Queued behind records already spilled, to keep the order
+                    self._write_spill(item)
+                    return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if self.policy == "drop_oldest":
+                self._drop_oldest(item)
+            else:
+                self._spill(item)
+
+    def _drop_oldest(self, item):
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                continue
+
+    def _spill(self, item):
+        with self._spill_lock:
+            self._write_spill(item)
+
+    def _write_spill(self, item):
+        enqueued, record = item
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(self.spill_path, "a") as spill_file:
+            spill_file.write(
+                json.dumps({"enqueued": enqueued, "record": record}, default=_encode)
+                + "\n"
+            )
+        self.spilled += 1
+        self._spilling = True
+
+    def _replay_spill(self):
+        with self._spill_lock:
+            # A replay interrupted by a crash is finished before a newer spill
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.spill_path):
+                    self._spilling = False
+                    return False
+                os.replace(self.spill_path, self.replay_path)
+            # Records put from now on are newer than every replayed one
+            self._spilling = os.path.exists(self.spill_path)
+        with open(self.replay_path) as spill_file:
+            for line in spill_file:
+                entry = json.loads(line, object_hook=_decode)
+                self._process(entry["enqueued"], entry["record"])
+        os.remove(self.replay_path)
+        return True
+
+    def _process(self, enqueued, record):
+        lag = time.time() - enqueued
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        try:
+            self.sink(record)
+            self.processed += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Sink {self.name} error: {e}")
+
+    def _run(self):
+        while True:
+            # Queued records predate the spill, so it is replayed once they are done
+            if self._spilling and self.queue.empty():
+                self._replay_spill()
+                continue
+            try:
+                enqueued, record = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set() and not self._spilling:
+                    return
+                continue
+            self._process(enqueued, record)
+
+    def close(self):
+        """Process everything still queued or spilled, then stop the worker."""
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def stats(self):
+        """Return queue depth, lag and record counters for this sink."""
+        return {
+            "depth": self.queue.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "errors": self.errors,
+            "last_lag_ms": self.last_lag * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+        }
+
+
+class Pipeline:
+    """Fan records out from the acquisition loop to independent sink workers.
+
+    ``sinks`` maps a name to a callable taking one record. Each sink has its
+    own bounded queue and thread, so a stalled database does not hold up the
+    serial reader or the CSV file.
+    """
+
+    def __init__(self, sinks, **worker_options):
+        self.workers = [
+            SinkWorker(name, sink, **worker_options) for name, sink in sinks.items()
+        ]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    @property
+    def may_block(self):
+        """Whether ``put`` can wait for queue space, under the block policy."""
+        return any(worker.policy == "block" for worker in self.workers)
+
+    def put(self, record):
+        """Hand a record to every sink."""
+        for worker in self.workers:
+            worker.put(record)
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+    def stats(self):
+        """Return per-sink metrics keyed by sink name."""
+        return {worker.name: worker.stats() for worker in self.workers}
@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+import pandas as pd
+from data_aquisition.da_config import COLUMNS, FLUSH_INTERVAL
+from data_aquisition.db_operations import load_readings
+
+
+class RealTimeCache:
+    """Keep the latest readings per station and fetch only new rows on refresh.
+
+    The first request for a station loads its newest ``size`` rows; later
+    requests query only rows after the last timestamp seen, append them to a
+    bounded ring buffer and evict the oldest. Because readings are written in
+    batches, each refresh looks back ``overlap`` before the last timestamp and
+    skips rows it already holds, so late-committed rows are not missed.
+    """
+
+    def __init__(
+        self,
+        size=120,
+        window=timedelta(days=1),
+        overlap=timedelta(seconds=FLUSH_INTERVAL * 5),
+        load=load_readings,
+    ):
+        self.size = size
+        self.window = window
+        self.overlap = overlap
+        self.load = load
+        self.rows_fetched = 0
+        self.refreshes = 0
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def get(self, station=None):
+        """Return the buffered readings for a station, or all stations if None."""
+        with self._lock:
+            buffer = self._buffers.get(station)
+            if buffer is None:
+                df = self.load(
+                    station=station,
+                    start=datetime.now() - self.window,
+                    latest=self.size,
+                )
+                if df is None:
+                    return None
+                buffer = deque(df.to_dict("records"), maxlen=self.size)
+                self._buffers[station] = buffer
+                self.rows_fetched += len(df)
+            else:
+                self._refresh(station, buffer)
+            self.refreshes += 1
+            self._evict(buffer)
+            columns = list(buffer[0]) if buffer else COLUMNS
+            return pd.DataFrame.from_records(list(buffer), columns=columns)
+
+    def _refresh(self, station, buffer):
+        if not buffer:
+            df = self.load(station=station, start=datetime.now() - self.window)
+            since = None
+        else:
+            since = buffer[-1]["Timestamp"] - self.overlap
+            df = self.load(station=station, after=since)
+        if df is None or df.empty:
+            return
+        seen = {
+            (row["Process_ID"], row["ID"], row["Timestamp"])
+            for row in buffer
+            if since is not None and row["Timestamp"] > since
+        }
+        new_rows = [
+            row
+            for row in df.to_dict("records")
+            if (row["Process_ID"], row["ID"], row["Timestamp"]) not in seen
+        ]
+        if not new_rows:
+            return
+        self.rows_fetched += len(new_rows)
+        merged = sorted([*buffer, *new_rows], key=lambda row: row["Timestamp"])
+        buffer.clear()
+        buffer.extend(merged[-self.size :])
+
+    def _evict(self, buffer):
+        cutoff = datetime.now() - self.window
+        while buffer and buffer[0]["Timestamp"] < cutoff:
+            buffer.popleft()
+
+    def clear(self):
+        with self._lock:
+            self._buffers.clear()
@@ -0,0 +1,409 @@
+"""Per-station rollups of readings at 1-minute, 1-hour and 1-day resolution.
+
+Each rollup row holds the count, sum, min, max and last value of every metric
+for one station and time bucket. Because these merge, live readings are folded
+in with an upsert as they land, and charts read a bounded number of buckets
+whatever the raw row count.
+
+Every source table has rollup tables of its own, named after it: the live
+readings table is rolled up as readings arrive, and the historical table by
+rebuilding whole days, so neither overwrites the other. Rebuild with:
+    python -m data_aquisition.rollups --source historical_timeseries
+"""
+
+import argparse
+import threading
+import time
+from datetime import date, datetime, timedelta
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+import metrics
+from data_aquisition.backends import get_backend
+from data_aquisition.da_config import (
+    FLUSH_INTERVAL,
+    HISTORICAL_TABLE,
+    READINGS_TABLE,
+    get_db_connection,
+)
+from data_aquisition.db_operations import (
+    day_bounds,
+    load_date_range,
+    pick_resolution,
+    query_historical_data,
+)
+
+METRICS = ["Voltage", "Current", "Power", "Energy", "Frequency", "PF"]
+AGGREGATES = ["sum", "min", "max", "last"]
+RESOLUTIONS = ["minute", "hour", "day"]
+
+
+def rollup_table(resolution, source=READINGS_TABLE):
+    """Return the name of the rollup table of ``source`` for a resolution."""
+    return f"{source}_rollup_{resolution}"
+
+
+def truncate(timestamp, resolution):
+    """Return the start of the bucket holding ``timestamp``."""
+    if resolution == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown resolution {resolution!r}")
+
+
+def _aggregate_columns():
+    return [f"{metric}_{aggregate}" for metric in METRICS for aggregate in AGGREGATES]
+
+
+def create_rollup_tables(source=READINGS_TABLE):
+    """Create the rollup tables of ``source`` if they do not exist."""
+    columns = ",\n".join(
+        f'"{column}" DOUBLE PRECISION' for column in _aggregate_columns()
+    )
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        for resolution in RESOLUTIONS:
+            conn.execute(
+                text(
+                    f"""CREATE TABLE IF NOT EXISTS {rollup_table(resolution, source)} (
+                    "Process_ID" VARCHAR(50) NOT NULL,
+                    "Bucket" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                    "Count" BIGINT NOT NULL,
+                    "Last_Timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                    {columns},
+                    PRIMARY KEY ("Process_ID", "Bucket")
+                );"""
+                )
+            )
+        conn.commit()
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+    finally:
+        conn.close()
+
+
+def _upsert_query(resolution):
+    backend = get_backend()
+    columns = ["Process_ID", "Bucket", "Count", "Last_Timestamp"] + _aggregate_columns()
+    updates = ['"Count" = t."Count" + EXCLUDED."Count"']
+    for metric in METRICS:
+        updates += [
+            f'"{metric}_sum" = t."{metric}_sum" + EXCLUDED."{metric}_sum"',
+            f'"{metric}_min" = '
+            + backend.least(f't."{metric}_min"', f'EXCLUDED."{metric}_min"'),
+            f'"{metric}_max" = '
+            + backend.greatest(f't."{metric}_max"', f'EXCLUDED."{metric}_max"'),
+            f'"{metric}_last" = CASE WHEN EXCLUDED."Last_Timestamp" >= '
+            f't."Last_Timestamp" THEN EXCLUDED."{metric}_last" '
+            f'ELSE t."{metric}_last" END',
+        ]
+    updates.append(
+        '"Last_Timestamp" = '
+        + backend.greatest('t."Last_Timestamp"', 'EXCLUDED."Last_Timestamp"')
+    )
+    return text(
+        f"""INSERT INTO {rollup_table(resolution)} AS t
+        ({", ".join(f'"{column}"' for column in columns)})
+        VALUES ({", ".join(f":{column}" for column in columns)})
+        ON CONFLICT ("Process_ID", "Bucket") DO UPDATE SET {", ".join(updates)};"""
+    )
+
+
+@metrics.timed("db_insert_seconds", table="rollups")
+def merge_rollup_rows(resolution, rows):
+    """Fold partial rollup rows into a rollup table. Returns True on success."""
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    try:
+        conn.execute(_upsert_query(resolution), rows)
+        conn.commit()
+        return True
+    except SQLAlchemyError as e:
+        print(f"Database rollup error: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def partial_rollup(data, resolution):
+    """Return the rollup row of a single reading for one resolution."""
+    row = {
+        "Process_ID": data["Process_ID"],
+        "Bucket": truncate(data["Timestamp"], resolution),
+        "Count": 1,
+        "Last_Timestamp": data["Timestamp"],
+    }
+    for metric in METRICS:
+        value = float(data[metric])
+        for aggregate in AGGREGATES:
+            row[f"{metric}_{aggregate}"] = value
+    return row
+
+
+def merge_partial(target, row):
+    """Fold the partial rollup ``row`` into ``target`` in place."""
+    later = row["Last_Timestamp"] >= target["Last_Timestamp"]
+    target["Count"] += row["Count"]
+    for metric in METRICS:
+        target[f"{metric}_sum"] += row[f"{metric}_sum"]
+        target[f"{metric}_min"] = min(target[f"{metric}_min"], row[f"{metric}_min"])
+        target[f"{metric}_max"] = max(target[f"{metric}_max"], row[f"{metric}_max"])
+        if later:
+            target[f"{metric}_last"] = row[f"{metric}_last"]
+    if later:
+        target["Last_Timestamp"] = row["Last_Timestamp"]
+
+
+class RollupWriter:
+    """Aggregate live readings into partial rollups and merge them periodically.
+
+    Partial rollups for every bucket touched since the last flush are kept in
+    memory and merged into the rollup tables every ``max_delay`` seconds and on
+    close, so each flush writes one row per station and bucket.
+    """
+
+    def __init__(
+        self, resolutions=RESOLUTIONS, max_delay=FLUSH_INTERVAL, write_rows=None
+    ):
+        self.resolutions = resolutions
+        self.max_delay = max_delay
+        self.write_rows = write_rows or merge_rollup_rows
+        self.readings = 0
+        self._pending = {resolution: {} for resolution in resolutions}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, data):
+        """Fold one reading into the pending rollups."""
+        with self._lock:
+            for resolution in self.resolutions:
+                self._merge(resolution, partial_rollup(data, resolution))
+            self.readings += 1
+        if time.monotonic() - self._last_flush >= self.max_delay:
+            self.flush()
+
+    def _merge(self, resolution, row):
+        key = (row["Process_ID"], row["Bucket"])
+        pending = self._pending[resolution]
+        if key in pending:
+            merge_partial(pending[key], row)
+        else:
+            pending[key] = row
+
+    def flush(self):
+        """Merge the pending rollups into the rollup tables."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {resolution: {} for resolution in self.resolutions}
+            self._last_flush = time.monotonic()
+        for resolution, rows in pending.items():
+            if rows and not self.write_rows(resolution, list(rows.values())):
+                # Keep the failed rows so the next flush merges them again
+                with self._lock:
+                    for row in rows.values():
+                        self._merge(resolution, row)
+
+    def pending(self):
+        """Return the number of bucket rows waiting to be merged."""
+        with self._lock:
+            return sum(len(rows) for rows in self._pending.values())
+
+    def close(self):
+        self.flush()
+
+
+def rebuild_rollups(source=HISTORICAL_TABLE, start=None, end=None):
+    """Recompute the rollups of ``source`` for a range of whole days.
+
+    Only the rollup tables of ``source`` are replaced, so rebuilding the
+    historical rollups leaves those of the live readings alone.
+    """
+    start, end = day_bounds(start, end)
+    conditions, params = [], {}
+    if start is not None:
+        conditions.append('"Timestamp" >= :start')
+        params["start"] = start
+    if end is not None:
+        conditions.append('"Timestamp" < :end')
+        params["end"] = end
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    backend = get_backend()
+    aggregates = ", ".join(
+        f'SUM("{metric}"), MIN("{metric}"), MAX("{metric}"), '
+        + backend.last_value(f'"{metric}"')
+        for metric in METRICS
+    )
+    columns = ["Process_ID", "Bucket", "Count", "Last_Timestamp"] + _aggregate_columns()
+
+    conn = get_db_connection()
+    try:
+        for resolution in RESOLUTIONS:
+            table = rollup_table(resolution, source)
+            # Whole-day bounds align with every bucket, so no bucket is split
+            bucket_where = where.replace('"Timestamp"', '"Bucket"')
+            conn.execute(text(f"DELETE FROM {table} {bucket_where};"), params)
+            conn.execute(
+                text(
+                    f"""INSERT INTO {table}
+                    ({", ".join(f'"{column}"' for column in columns)})
+                    SELECT "Process_ID", {backend.time_bucket(resolution)},
+                    COUNT(*), MAX("Timestamp"), {aggregates}
+                    FROM {source} {where}
+                    GROUP BY 1, 2;"""
+                ),
+                params,
+            )
+        conn.commit()
+        print(f"Rebuilt rollups from {source}.")
+    except SQLAlchemyError as e:
+        print(f"Database rollup error: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+@metrics.timed("db_query_seconds", query="query_rollups")
+def query_rollups(
+    station=None, start=None, end=None, resolution="auto", source=READINGS_TABLE
+):
+    """Return per-bucket mean, min, max and last values from the rollups.
+
+    Columns are named like the raw readings for the means, with ``_min``,
+    ``_max`` and ``_last`` suffixes for the other aggregates. ``station`` of
+    None combines all stations, and "auto" picks the resolution that keeps the
+    range under a fixed number of buckets. ``source`` picks whose rollups
+    are read.
+    """
+    start, end = day_bounds(start, end)
+    if resolution == "auto":
+        resolution = pick_resolution(start, end) if start and end else "day"
+    table = rollup_table(resolution, source)
+
+    conditions, params = [], {"station": station or "Overall"}
+    if station is not None:
+        conditions.append('"Process_ID" = :station')
+    if start is not None:
+        conditions.append('"Bucket" >= :start')
+        params["start"] = start
+    if end is not None:
+        conditions.append('"Bucket" < :end')
+        params["end"] = end
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    selects = []
+    for metric in METRICS:
+        selects += [
+            f'SUM("{metric}_sum") / SUM("Count") AS "{metric}"',
+            f'MIN("{metric}_min") AS "{metric}_min"',
+            f'MAX("{metric}_max") AS "{metric}_max"',
+            f'AVG("{metric}_last") AS "{metric}_last"',
+        ]
+    query = text(
+        f"""SELECT "Bucket" AS "Timestamp", CAST(:station AS VARCHAR) AS "Station",
+        SUM("Count") AS "Count", {", ".join(selects)}
+        FROM {table} {where}
+        GROUP BY 1 ORDER BY 1;"""
+    )
+
+    conn = get_db_connection()
+    try:
+        return pd.read_sql(query, conn, params=params, parse_dates=["Timestamp"])
+    finally:
+        conn.close()
+
+
+def rolled_up_days(start, end, source=HISTORICAL_TABLE):
+    """Return the days in [start, end) whose rollups of ``source`` were built."""
+    conn = get_db_connection()
+    if conn is None:
+        return set()
+    try:
+        result = conn.execute(
+            text(
+                f'SELECT DISTINCT "Bucket" FROM {rollup_table("day", source)} '
+                'WHERE "Bucket" >= :start AND "Bucket" < :end;'
+            ),
+            {"start": datetime.combine(start.date(), datetime.min.time()), "end": end},
+        )
+        # Drivers without a timestamp type, such as SQLite, return text
+        return {pd.Timestamp(bucket).date() for (bucket,) in result}
+    finally:
+        conn.close()
+
+
+def query_history(station=None, start=None, end=None, resolution="auto"):
+    """Return bucketed history from the historical rollups and readings.
+
+    Days whose rollups have been rebuilt are read from the rollups; the other
+    days are aggregated from the historical table at the same resolution, so
+    each day comes from exactly one place. Buckets from the raw table have no
+    ``Count``, ``_min``, ``_max`` or ``_last`` values.
+    """
+    start, end = day_bounds(start, end)
+    if start is None or end is None:
+        first, last = load_date_range(station)
+        if pd.isna(first):
+            return query_historical_data(station, start, end, resolution)
+        start = start or first.to_pydatetime()
+        end = end or last.to_pydatetime() + timedelta(microseconds=1)
+    if resolution == "auto":
+        resolution = pick_resolution(start, end)
+
+    covered = rolled_up_days(start, end)
+    parts = []
+    if covered:
+        parts.append(
+            query_rollups(station, start, end, resolution, source=HISTORICAL_TABLE)
+        )
+    # Consecutive days missing from the rollups are read in one query
+    day, gap_start = start.date(), None
+    while True:
+        day_start = max(start, datetime.combine(day, datetime.min.time()))
+        if day_start >= end or day in covered:
+            if gap_start is not None:
+                gap_end = min(day_start, end)
+                parts.append(
+                    query_historical_data(station, gap_start, gap_end, resolution)
+                )
+                gap_start = None
+            if day_start >= end:
+                break
+        elif gap_start is None:
+            gap_start = day_start
+        day += timedelta(days=1)
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return query_historical_data(station, start, end, resolution)
+    if len(parts) == 1:
+        return parts[0]
+    return (
+        pd.concat(parts, ignore_index=True)
+        .sort_values("Timestamp", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=HISTORICAL_TABLE)
+    parser.add_argument("--start", type=date.fromisoformat, help="first day")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day, inclusive")
+    args = parser.parse_args()
+    create_rollup_tables(args.source)
+    rebuild_rollups(args.source, args.start, args.end)
+
+
+if __name__ == "__main__":
+    main()
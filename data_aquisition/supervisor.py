@@ -0,0 +1,241 @@
+"""Read many stations' serial ports concurrently from one process.
+
+Every port is registered with a single asyncio event loop and read only when
+it has data, so one thread serves any number of devices. Readings from all
+stations go into one pipeline, and so into one shared batched writer. Ports
+that fail are reopened with exponential backoff without affecting the rest.
+
+Readings keep the station named in each frame. The configured name labels
+the port in reports; frames naming another station are still stored, but
+counted as mismatched and reported once per port.
+
+Configure the stations with STATIONS="station01=/dev/ttyACM0,station02=..."
+and run from the repository root:
+    python -m data_aquisition.supervisor
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+import metrics
+from data_aquisition.da_config import (
+    BAUD_RATE,
+    METRICS_PORT,
+    STATIONS,
+    parse_stations,
+)
+from data_aquisition.data_acquisition import SerialReader, format_data, open_pipeline
+
+
+class StationChannel:
+    """Non-blocking reader state and health counters for one station."""
+
+    def __init__(self, station, port, baud_rate=BAUD_RATE):
+        self.station = station
+        self.reader = SerialReader(port, baud_rate, timeout=0)
+        self.next_id = 1
+        self.connected = False
+        self.errors = 0
+        self.mismatched = 0
+        self.delivering = False
+        self.last_frame = None
+        self.rate = 0.0
+        self.delay = self.reader.backoff
+        self._counted = (time.monotonic(), 0)
+
+    def update_rate(self):
+        """Recompute frames per second since the previous call."""
+        now, frames = time.monotonic(), self.reader.frames_read
+        since, counted = self._counted
+        if now > since:
+            self.rate = (frames - counted) / (now - since)
+        self._counted = (now, frames)
+
+    def health(self, stale_after):
+        if not self.connected:
+            return "disconnected"
+        if self.last_frame is None or time.monotonic() - self.last_frame > stale_after:
+            return "stale"
+        return "ok"
+
+
+class AcquisitionSupervisor:
+    """Drive the serial ports of ``stations`` (name -> port) on one event loop.
+
+    Each parsed reading is passed to ``sink``. A ``blocking_sink`` is called
+    on an executor thread instead of the event loop; the port is not read
+    again until its readings are delivered, so backpressure reaches that
+    station alone. A station is reported "stale" when it has sent no frame
+    for ``stale_after`` seconds, and a summary is printed every
+    ``report_interval`` seconds (0 disables it).
+    """
+
+    def __init__(
+        self,
+        stations,
+        sink,
+        baud_rate=BAUD_RATE,
+        stale_after=5.0,
+        report_interval=30.0,
+        blocking_sink=False,
+    ):
+        self.channels = [
+            StationChannel(station, port, baud_rate)
+            for station, port in stations.items()
+        ]
+        self.sink = sink
+        self.blocking_sink = blocking_sink
+        self.stale_after = stale_after
+        self.report_interval = report_interval
+        self._loop = None
+        self._stopped = None
+
+    async def run(self):
+        """Read every station until ``stop`` is called."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        for channel in self.channels:
+            self._connect(channel)
+        reporter = None
+        if self.report_interval:
+            reporter = asyncio.create_task(self._report())
+        try:
+            await self._stopped.wait()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            for channel in self.channels:
+                self._disconnect(channel)
+                channel.reader.close()
+
+    def stop(self):
+        """Stop ``run``; safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def _connect(self, channel):
+        reader = channel.reader
+        try:
+            reader.open_once()
+            self._loop.add_reader(reader.fileno(), self._on_readable, channel)
+        except Exception as e:
+            channel.errors += 1
+            print(
+                f"Cannot open {reader.port} for {channel.station}: {e}, "
+                f"retrying in {channel.delay}s"
+            )
+            self._loop.call_later(channel.delay, self._connect, channel)
+            channel.delay = min(channel.delay * 2, reader.max_backoff)
+            return
+        channel.connected = True
+        channel.delay = reader.backoff
+
+    def _disconnect(self, channel):
+        if channel.connected:
+            self._loop.remove_reader(channel.reader.fileno())
+            channel.connected = False
+        channel.reader.disconnect()
+
+    def _on_readable(self, channel):
+        reader = channel.reader
+        try:
+            chunk = reader.read_available()
+        except (OSError, ValueError) as e:
+            print(f"Serial read error on {reader.port}: {e}, reconnecting")
+            channel.errors += 1
+            reader.reconnects += 1
+            metrics.counter("serial_reconnects_total", port=reader.port).inc()
+            self._disconnect(channel)
+            self._loop.call_later(channel.delay, self._connect, channel)
+            return
+        readings = []
+        for line in reader.split_lines(chunk):
+            components = reader.parse_frame(line)
+            if components is None:
+                continue
+            if components[0] != channel.station:
+                if not channel.mismatched:
+                    print(
+                        f"{reader.port} is configured as {channel.station} but "
+                        f"sends frames for {components[0]}"
+                    )
+                channel.mismatched += 1
+            channel.last_frame = time.monotonic()
+            readings.append(format_data(channel.next_id, components))
+            channel.next_id += 1
+        if not readings:
+            return
+        if not self.blocking_sink:
+            self._deliver(readings)
+            return
+        channel.delivering = True
+        self._loop.remove_reader(reader.fileno())
+        delivery = self._loop.run_in_executor(None, self._deliver, readings)
+        delivery.add_done_callback(lambda done: self._resume(channel, done))
+
+    def _deliver(self, readings):
+        for reading in readings:
+            self.sink(reading)
+
+    def _resume(self, channel, delivery):
+        channel.delivering = False
+        if not delivery.cancelled() and delivery.exception() is not None:
+            print(f"Error delivering {channel.station}: {delivery.exception()}")
+        if channel.connected and not self._stopped.is_set():
+            self._loop.add_reader(channel.reader.fileno(), self._on_readable, channel)
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            for station, stats in self.stats().items():
+                print(
+                    f"{station}: {stats['health']}, {stats['frames_per_second']:.1f} "
+                    f"frames/s, {stats['frames']} frames, {stats['malformed']} "
+                    f"malformed, {stats['reconnects']} reconnects"
+                )
+
+    def stats(self):
+        """Return throughput and health per station."""
+        stats = {}
+        for channel in self.channels:
+            channel.update_rate()
+            stats[channel.station] = {
+                "port": channel.reader.port,
+                "health": channel.health(self.stale_after),
+                "frames_per_second": channel.rate,
+                "errors": channel.errors,
+                "mismatched": channel.mismatched,
+                **channel.reader.stats(),
+            }
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--stations", type=parse_stations, help="name=port,... (default STATIONS)"
+    )
+    parser.add_argument("--report-interval", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    with ExitStack() as stack:
+        pipeline = open_pipeline(stack)
+        supervisor = AcquisitionSupervisor(
+            args.stations or STATIONS,
+            pipeline.put,
+            report_interval=args.report_interval,
+            blocking_sink=pipeline.may_block,
+        )
+        try:
+            asyncio.run(supervisor.run())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
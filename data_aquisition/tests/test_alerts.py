@@ -0,0 +1,141 @@
+import json
+import threading
+from datetime import datetime, timedelta
+import pytest
+from data_aquisition.alerts import AlertEngine, append_alerts_to_file
+
+START = datetime(2024, 11, 12, 13, 0)
+
+
+def make_reading(seconds, voltage=230.0, frequency=50.0, pf=0.95, station="station01"):
+    return {
+        "Process_ID": station,
+        "ID": seconds,
+        "Timestamp": START + timedelta(seconds=seconds),
+        "Voltage": voltage,
+        "Current": 0.02,
+        "Power": 1.2,
+        "Energy": 0.003,
+        "Frequency": frequency,
+        "PF": pf,
+    }
+
+
+@pytest.fixture
+def written():
+    alerts = []
+
+    def write_alerts(batch):
+        alerts.extend(batch)
+        return True
+
+    return alerts, write_alerts
+
+
+def rules_of(alerts):
+    return [(alert["Process_ID"], alert["Metric"], alert["Rule"]) for alert in alerts]
+
+
+def test_threshold_alert_is_deduplicated(written):
+    alerts, write_alerts = written
+    with AlertEngine(max_delay=60, write_alerts=write_alerts) as engine:
+        for second in range(10):
+            engine.write(make_reading(second, voltage=215.0))
+        engine.write(make_reading(30))
+        engine.write(make_reading(31, voltage=215.0, station="station02"))
+    # Still sagging after the first alert: suppressed until it clears
+    assert rules_of(alerts) == [
+        ("station01", "Voltage", "low"),
+        ("station02", "Voltage", "low"),
+    ]
+    assert engine.stats()["suppressed"] == 9
+
+
+def test_alert_repeats_after_clearing(written):
+    alerts, write_alerts = written
+    with AlertEngine(max_delay=60, write_alerts=write_alerts) as engine:
+        for second, pf in enumerate([0.5, 0.95, 0.5]):
+            engine.write(make_reading(second * 10, pf=pf))
+    assert rules_of(alerts) == [("station01", "PF", "low")] * 2
+
+
+def test_zscore_and_rate_of_change(written):
+    alerts, write_alerts = written
+    with AlertEngine(max_delay=60, write_alerts=write_alerts) as engine:
+        for second in range(100):
+            engine.write(make_reading(second, frequency=50.0 + 0.01 * (second % 2)))
+        # Within the limits, but far outside the recent spread and changing fast
+        engine.write(make_reading(100, frequency=50.8))
+    assert sorted(rule for _, _, rule in rules_of(alerts)) == ["rate", "zscore"]
+    assert alerts[0]["Metric"] == "Frequency"
+
+
+def test_state_is_bounded_by_stations(written):
+    _, write_alerts = written
+    engine = AlertEngine(max_delay=60, write_alerts=write_alerts)
+    for second in range(5000):
+        engine.write(make_reading(second, station=f"station0{second % 3}"))
+    stats = engine.stats()
+    assert stats["readings"] == 5000
+    assert stats["tracked"] == 9
+    assert stats["firing"] == 0
+
+
+def test_failed_write_keeps_alerts():
+    results = [False, True]
+    batches = []
+
+    def write_alerts(batch):
+        batches.append(list(batch))
+        return results.pop(0)
+
+    engine = AlertEngine(max_delay=60, write_alerts=write_alerts)
+    engine.write(make_reading(0, voltage=250.0))
+    engine.flush()
+    assert engine.stats()["pending"] == 1
+    engine.flush()
+    assert engine.stats()["pending"] == 0
+    assert batches[0] == batches[1]
+
+
+def test_cooldown_follows_reading_time(written):
+    alerts, write_alerts = written
+    with AlertEngine(cooldown=60, max_delay=60, write_alerts=write_alerts) as engine:
+        for second in range(0, 150, 10):
+            engine.write(make_reading(second, voltage=215.0))
+    assert [alert["Timestamp"] for alert in alerts] == [
+        START,
+        START + timedelta(seconds=60),
+        START + timedelta(seconds=120),
+    ]
+
+
+def test_pending_alerts_are_bounded():
+    engine = AlertEngine(max_delay=60, max_pending=3, write_alerts=lambda _: False)
+    for second in range(5):
+        engine.write(make_reading(second, voltage=250.0, station=f"station{second}"))
+        engine.flush()
+    stats = engine.stats()
+    assert stats["pending"] == 3
+    assert stats["dropped"] == 2
+
+
+def test_alert_is_flushed_without_a_later_reading():
+    written = threading.Event()
+    engine = AlertEngine(max_delay=0.05, write_alerts=lambda _: written.set() or True)
+    try:
+        engine.write(make_reading(0, voltage=215.0))
+        # The station goes quiet: the timer still writes its alert
+        assert written.wait(2)
+        assert engine.stats()["pending"] == 0
+    finally:
+        engine.close()
+
+
+def test_append_alerts_to_file(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    alert = {"Timestamp": START, "Process_ID": "station01", "Metric": "PF"}
+    assert append_alerts_to_file([alert, alert], path)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["Timestamp"] == str(START)
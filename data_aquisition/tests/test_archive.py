@@ -0,0 +1,92 @@
+import os
+import pytest
+from datetime import date, datetime, timedelta
+
+pytest.importorskip("pyarrow")
+
+from data_aquisition.archive import ParquetArchive, read_archive
+
+
+def make_reading(station, timestamp, reading_id):
+    return {
+        "Process_ID": station,
+        "ID": reading_id,
+        "Timestamp": timestamp,
+        "Voltage": 220.0,
+        "Current": 0.02,
+        "Power": 1.2,
+        "Energy": 0.003 * reading_id,
+        "Frequency": 50.0,
+        "PF": 0.99,
+    }
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    start = datetime(2024, 11, 12, 23, 0)
+    with ParquetArchive(str(tmp_path), row_group_size=50) as archive:
+        for i in range(240):
+            for station in ["station01", "station02"]:
+                archive.write(make_reading(station, start + timedelta(minutes=i), i))
+    return str(tmp_path)
+
+
+def test_archive_is_partitioned_by_station_and_date(archive_dir):
+    partitions = sorted(
+        os.path.relpath(root, archive_dir)
+        for root, _, files in os.walk(archive_dir)
+        if files
+    )
+    assert partitions == [
+        "station=station01/date=2024-11-12",
+        "station=station01/date=2024-11-13",
+        "station=station02/date=2024-11-12",
+        "station=station02/date=2024-11-13",
+    ]
+
+
+def test_read_archive_filters_columns_time_and_station(archive_dir):
+    df = read_archive(
+        archive_dir,
+        columns=["Timestamp", "Energy"],
+        start=datetime(2024, 11, 13, 0, 0),
+        end=datetime(2024, 11, 13, 0, 59),
+        stations=["station02"],
+    )
+    assert df.columns.tolist() == ["Timestamp", "Energy"]
+    assert len(df) == 60
+    assert df["Timestamp"].min() == datetime(2024, 11, 13, 0, 0)
+
+
+def test_read_archive_accepts_dates(archive_dir):
+    df = read_archive(archive_dir, start=date(2024, 11, 12), end=date(2024, 11, 12))
+    assert len(df) == 2 * 60
+
+
+def test_archive_is_readable_while_open(tmp_path):
+    start = datetime(2024, 11, 12, 8, 0)
+    archive = ParquetArchive(str(tmp_path), row_group_size=10, rows_per_file=30)
+    for i in range(70):
+        archive.write(make_reading("station01", start + timedelta(minutes=i), i))
+
+    # Two full part files are closed; the rows of the third are still open
+    assert archive.files_written == 2
+    assert len(read_archive(str(tmp_path))) == 60
+    archive.close()
+    assert len(read_archive(str(tmp_path))) == 70
+    names = os.listdir(tmp_path / "station=station01" / "date=2024-11-12")
+    assert len(names) == 3 and all(name.startswith("part-") for name in names)
+
+
+def test_archive_rolls_part_files_on_time(tmp_path):
+    now = [0.0]
+    start = datetime(2024, 11, 12, 8, 0)
+    archive = ParquetArchive(str(tmp_path), file_seconds=60, clock=lambda: now[0])
+    for i in range(3):
+        archive.write(make_reading("station01", start + timedelta(minutes=i), i))
+        now[0] += 45
+
+    # The third reading arrived 90 seconds after the first and closed the file
+    assert archive.files_written == 1
+    assert len(read_archive(str(tmp_path))) == 3
+    archive.close()
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from config import DatabaseConfig
+from data_aquisition import da_config, db_operations
+from data_aquisition.backends import SQLiteBackend, get_backend
+from data_aquisition.db_operations import (
+    append_rows_to_temp_table,
+    create_readings_table,
+    load_readings,
+    query_historical_data,
+    retire_rows,
+)
+from data_aquisition.migrate_tables import migrate
+from data_aquisition.rollups import (
+    RollupWriter,
+    create_rollup_tables,
+    query_history,
+    query_rollups,
+    rebuild_rollups,
+)
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch, tmp_path):
+    engine = DatabaseConfig(f"sqlite:///{tmp_path / 'energy.db'}").create_engine()
+    monkeypatch.setattr(da_config, "engine", engine)
+    monkeypatch.setattr(db_operations, "_known_partitions", set())
+    yield engine
+    engine.dispose()
+
+
+def make_readings(start, count, step=timedelta(seconds=30)):
+    return [
+        {
+            "Process_ID": f"station0{i % 2 + 1}",
+            "ID": i,
+            "Timestamp": start + i * step,
+            "Voltage": 220.0 + i,
+            "Current": 0.02,
+            "Power": 1.2,
+            "Energy": 0.003,
+            "Frequency": 50.0,
+            "PF": 0.99,
+        }
+        for i in range(count)
+    ]
+
+
+def test_sqlite_engine_uses_wal(sqlite_db):
+    assert isinstance(get_backend(), SQLiteBackend)
+    with sqlite_db.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+def test_readings_round_trip(sqlite_db):
+    start = datetime(2024, 11, 12, 13, 0)
+    create_readings_table()
+    assert append_rows_to_temp_table(make_readings(start, 10))
+
+    df = load_readings(station="station01", start=start)
+    assert len(df) == 5
+    assert df["Timestamp"].is_monotonic_increasing
+    latest = load_readings(latest=3)
+    assert latest["ID"].tolist() == [7, 8, 9]
+    # Paging from the oldest: the next page starts after the last one
+    page = load_readings(after=start, limit=3)
+    assert page["ID"].tolist() == [1, 2, 3]
+    page = load_readings(after=page["Timestamp"].iloc[-1], limit=3)
+    assert page["ID"].tolist() == [4, 5, 6]
+
+    assert retire_rows((start + timedelta(minutes=2)).date()) == 0
+    assert retire_rows(start.date() + timedelta(days=1)) == 10
+
+
+def test_historical_buckets(sqlite_db):
+    start = datetime(2024, 11, 12, 13, 0)
+    pd.DataFrame(make_readings(start, 240)).to_sql(
+        da_config.HISTORICAL_TABLE, sqlite_db, index=False
+    )
+    df = query_historical_data(start=start.date(), end=start.date(), resolution="hour")
+    assert df["Timestamp"].tolist() == [
+        pd.Timestamp("2024-11-12 13:00"),
+        pd.Timestamp("2024-11-12 14:00"),
+    ]
+    assert df["Voltage"].tolist() == [220.0 + 59.5, 220.0 + 179.5]
+
+
+def test_rollup_upsert_matches_rebuild(sqlite_db):
+    start = datetime(2024, 11, 12, 13, 0)
+    readings = make_readings(start, 240)
+    create_readings_table()
+    append_rows_to_temp_table(readings)
+    create_rollup_tables()
+    # Two writers land in the same buckets, so the second merges into the first
+    for half in (readings[:100], readings[100:]):
+        with RollupWriter(max_delay=60) as writer:
+            for reading in half:
+                writer.write(reading)
+    incremental = query_rollups(
+        station="station02", start=start.date(), end=start.date(), resolution="hour"
+    )
+
+    rebuild_rollups(da_config.READINGS_TABLE, start.date(), start.date())
+    rebuilt = query_rollups(
+        station="station02", start=start.date(), end=start.date(), resolution="hour"
+    )
+    pd.testing.assert_frame_equal(incremental, rebuilt)
+    assert incremental["Count"].tolist() == [60, 60]
+    assert incremental["Voltage_max"].tolist() == [339.0, 459.0]
+    assert incremental["Voltage_last"].tolist() == [339.0, 459.0]
+
+
+def test_migrate_is_idempotent(sqlite_db):
+    start = datetime(2024, 11, 12, 13, 0)
+    pd.DataFrame(make_readings(start, 20)).to_sql(
+        "temp_data_table_12_11_24", sqlite_db, index=False
+    )
+    assert migrate() == 20
+    assert migrate() == 0
+    assert len(load_readings()) == 20
+
+
+def test_query_history_reads_days_missing_from_the_rollups(sqlite_db):
+    start = datetime(2024, 11, 12, 13, 0)
+    readings = make_readings(start, 3, step=timedelta(days=1))
+    pd.DataFrame(readings).to_sql(da_config.HISTORICAL_TABLE, sqlite_db, index=False)
+    create_rollup_tables(da_config.HISTORICAL_TABLE)
+    # The middle day has not been rebuilt, so it comes from the raw table
+    for day in [start.date(), start.date() + timedelta(days=2)]:
+        rebuild_rollups(da_config.HISTORICAL_TABLE, day, day)
+
+    df = query_history(
+        start=start.date(), end=start.date() + timedelta(days=2), resolution="day"
+    )
+    assert df["Timestamp"].dt.day.tolist() == [12, 13, 14]
+    assert df["Voltage"].tolist() == [220.0, 221.0, 222.0]
+    assert df["Count"].isna().tolist() == [False, True, False]
+
+
+def test_rebuild_keeps_the_live_rollups(sqlite_db):
+    start = datetime(2024, 11, 12, 13, 0)
+    readings = make_readings(start, 10)
+    pd.DataFrame(readings[:5]).to_sql(
+        da_config.HISTORICAL_TABLE, sqlite_db, index=False
+    )
+    create_rollup_tables()
+    create_rollup_tables(da_config.HISTORICAL_TABLE)
+    with RollupWriter() as writer:
+        for reading in readings:
+            writer.write(reading)
+
+    rebuild_rollups(da_config.HISTORICAL_TABLE, start.date(), start.date())
+    live = query_rollups(start=start.date(), end=start.date(), resolution="day")
+    historical = query_rollups(
+        start=start.date(),
+        end=start.date(),
+        resolution="day",
+        source=da_config.HISTORICAL_TABLE,
+    )
+    assert live["Count"].tolist() == [10]
+    assert historical["Count"].tolist() == [5]
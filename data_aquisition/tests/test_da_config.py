@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from data_aquisition import da_config
+
+
+@pytest.fixture
+def sqlite_engine(monkeypatch, tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=2
+    )
+    monkeypatch.setattr(da_config, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def test_db_connection_returns_connection_to_pool(sqlite_engine):
+    before = da_config.pool_stats()["checkouts"]
+    with da_config.db_connection() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert da_config.pool_stats()["checked_out"] == 1
+    stats = da_config.pool_stats()
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == before + 1
+
+
+def test_get_db_connection_gives_each_caller_its_own_connection(sqlite_engine):
+    first = da_config.get_db_connection()
+    second = da_config.get_db_connection()
+    assert first is not second
+    first.close()
+    second.close()
+    assert da_config.pool_stats()["checked_out"] == 0
@@ -0,0 +1,79 @@
+import os
+import pty
+from itertools import islice
+import pytest
+from data_aquisition import data_acquisition
+from data_aquisition.data_acquisition import SerialReader, generate_mock_data
+
+
+@pytest.fixture
+def fake_device():
+    # A pty stands in for the serial device: write to master, read from slave
+    master, slave = pty.openpty()
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+def test_generate_mock_data():
+    data = generate_mock_data(1)
+    assert data["ID"] == 1
+    assert 220 <= data["Voltage"] <= 230
+
+
+def test_serial_reader_streams_records(fake_device):
+    master, port = fake_device
+    with SerialReader(port, timeout=0.1) as reader:
+        reader.open()
+        os.write(
+            master,
+            b"station01,220.1,0.02,1.2,0.003,50.0,0.99\n"
+            b"station01,221.5,0.03,1.4,0.004,49.9,0.98\n",
+        )
+        records = list(islice(reader.records(), 2))
+    assert [record["ID"] for record in records] == [1, 2]
+    assert records[1]["Voltage"] == 221.5
+    assert reader.stats()["frames"] == 2
+
+
+def test_serial_reader_counts_malformed_frames(fake_device):
+    master, port = fake_device
+    with SerialReader(port, timeout=0.1) as reader:
+        reader.open()
+        os.write(
+            master,
+            b"station01,220.1,0.02\n"
+            b"station01,abc,0.02,1.2,0.003,50.0,0.99\n"
+            b"station01,220.1,0.02,1.2,0.003,50.0,0.99\n",
+        )
+        frames = list(islice(reader.frames(), 1))
+    assert frames[0][1] == "220.1"
+    assert reader.stats()["malformed"] == 2
+
+
+def test_serial_reader_joins_partial_lines():
+    reader = SerialReader("loop://", timeout=0.1)
+    reader.open()
+    reader._serial.write(b"station01,220.1,0.02,1.2,")
+    lines = reader.lines()
+    reader._serial.write(b"0.003,50.0,0.99\n")
+    assert next(lines) == "station01,220.1,0.02,1.2,0.003,50.0,0.99"
+    reader.close()
+
+
+def test_serial_reader_drops_overlong_partial_line():
+    reader = SerialReader("loop://")
+    reader.split_lines(b"x" * (SerialReader.MAX_LINE_BYTES + 1))
+    assert reader.stats()["dropped"] == 1
+    assert reader.split_lines(b"station01\n") == ["station01"]
+
+
+def test_get_serial_data_replaces_a_stopped_reader(monkeypatch):
+    class FreshReader:
+        def frames(self):
+            yield ["station01", 220.1, 0.02, 1.2, 0.003, 50.0, 0.99]
+
+    monkeypatch.setattr(data_acquisition, "SerialReader", FreshReader)
+    # An exhausted generator, as left behind by a reader whose port closed
+    monkeypatch.setattr(data_acquisition, "_serial_frames", iter([]))
+    assert data_acquisition.get_serial_data(7)["ID"] == 7
@@ -1,6 +1,20 @@
+import time
 import pytest
-from data_aquisition.db_operations import create_temp_table, append_to_temp_table
-from datetime import datetime
+from sqlalchemy import create_engine
+from data_aquisition import da_config, db_operations
+from data_aquisition.db_operations import (
+    BatchWriter,
+    append_to_temp_table,
+    create_temp_table,
+    partition_day,
+    partition_name,
+    pick_resolution,
+    query_historical_data,
+)
+from data_aquisition.alerts import create_alerts_table
+from data_aquisition.migrate_tables import daily_table_day
+from data_aquisition.rollups import create_rollup_tables
+from datetime import datetime, timedelta
 
 
 @pytest.fixture
@@ -34,3 +48,110 @@ def test_append_to_temp_table(sample_data):
         assert True
     except Exception as e:
         pytest.fail(f"Data append failed: {e}")
+
+
+def test_batch_writer_flushes_in_bulk(sample_data):
+    # Check that readings are written in batches of max_rows
+    batches = []
+
+    def write_rows(rows, use_copy=False):
+        batches.append(list(rows))
+        return True
+
+    writer = BatchWriter(max_rows=3, max_delay=60, write_rows=write_rows)
+    for _ in range(7):
+        writer.append(sample_data)
+    assert [len(batch) for batch in batches] == [3, 3]
+    writer.close()
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert writer.stats()["rows_written"] == 7
+
+
+def test_batch_writer_flushes_on_interval(sample_data):
+    # Check that a partial batch is written once max_delay has passed
+    batches = []
+
+    def write_rows(rows, use_copy=False):
+        batches.append(list(rows))
+        return True
+
+    with BatchWriter(max_rows=100, max_delay=0.05, write_rows=write_rows) as writer:
+        writer.append(sample_data)
+        time.sleep(0.3)
+        assert len(batches) == 1
+
+
+def test_batch_writer_keeps_rows_after_failed_flush(sample_data):
+    # Check that rows from a failed flush are retried on the next one
+    results = [False, True]
+
+    def write_rows(rows, use_copy=False):
+        return results.pop(0)
+
+    writer = BatchWriter(max_rows=100, max_delay=60, write_rows=write_rows)
+    writer.append(sample_data)
+    assert writer.flush() == 0
+    assert writer.pending() == 1
+    writer.close()
+    assert writer.stats()["rows_written"] == 1
+
+
+def test_batch_writer_keeps_rows_while_database_is_down(monkeypatch, tmp_path):
+    # A database that cannot be opened makes get_db_connection return None
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'energy.db'}")
+    monkeypatch.setattr(da_config, "engine", engine)
+    monkeypatch.setattr(db_operations, "_known_partitions", set())
+    rows = [
+        {"Process_ID": "station01", "ID": i, "Timestamp": datetime.now()}
+        for i in range(3)
+    ]
+
+    writer = BatchWriter(max_rows=100, max_delay=0.05, max_pending=2)
+    for row in rows:
+        writer.append(row)
+    assert writer.flush() == 0
+    assert writer.pending() == 2
+    assert writer.stats()["rows_dropped"] == 1
+    time.sleep(0.2)
+    # The background flusher keeps retrying instead of dying
+    assert writer._thread.is_alive()
+    assert writer.stats()["failed_flushes"] >= 2
+    writer.close()
+
+
+def test_table_setup_skips_an_unreachable_database(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'energy.db'}")
+    monkeypatch.setattr(da_config, "engine", engine)
+    monkeypatch.setattr(db_operations, "_known_partitions", set())
+    # Each returns quietly instead of raising AttributeError on None
+    db_operations.create_readings_table()
+    db_operations.create_historical_indexes()
+    create_rollup_tables()
+    create_alerts_table()
+
+
+def test_partition_names_round_trip():
+    day = datetime(2024, 11, 12).date()
+    name = partition_name(day)
+    assert name.endswith("_20241112")
+    assert partition_day(name) == day
+    assert partition_day("readings_station_time_idx") is None
+
+
+def test_daily_table_day():
+    assert daily_table_day("temp_data_table_12_11_24") == datetime(2024, 11, 12).date()
+    assert daily_table_day("historical_timeseries") is None
+
+
+def test_pick_resolution():
+    start = datetime(2024, 11, 1)
+    assert pick_resolution(start, start + timedelta(hours=6)) == "minute"
+    assert pick_resolution(start, start + timedelta(days=30)) == "hour"
+    assert pick_resolution(start, start + timedelta(days=365)) == "day"
+
+
+def test_query_historical_data_rejects_unknown_resolution():
+    with pytest.raises(ValueError):
+        query_historical_data(
+            start=datetime(2024, 11, 1), end=datetime(2024, 11, 2), resolution="week"
+        )
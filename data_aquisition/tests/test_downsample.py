@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_aquisition.downsample import (
+    downsample,
+    lttb_indices,
+    minmax_indices,
+    visible_range,
+)
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 50.0
+    indices = lttb_indices(x, y, 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == 9_999
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+
+def test_lttb_matches_reference_on_small_input():
+    x = np.arange(8, dtype=float)
+    y = np.array([0, 1, 0, 5, 0, 1, 0, 0], dtype=float)
+    # Buckets [1, 4) and [4, 7) between the fixed endpoints
+    assert lttb_indices(x, y, 4).tolist() == [0, 3, 4, 7]
+    assert lttb_indices(x, y, 20).tolist() == list(range(8))
+
+
+def test_minmax_keeps_every_extreme():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=5_000)
+    indices = minmax_indices(y, 100)
+    assert len(indices) <= 100
+    assert y.argmax() in indices and y.argmin() in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_downsample_frame():
+    df = pd.DataFrame(
+        {
+            "Timestamp": pd.date_range("2024-11-01", periods=3_000, freq="min"),
+            "Energy": np.linspace(0, 1, 3_000),
+        }
+    )
+    assert downsample(df, 5_000) is df
+    reduced = downsample(df, 300)
+    assert len(reduced) == 300
+    assert reduced["Timestamp"].is_monotonic_increasing
+    assert len(downsample(df, 300, method="minmax")) <= 300
+    with pytest.raises(ValueError):
+        downsample(df, 300, method="every_nth")
+
+
+def test_visible_range():
+    class Event:
+        selection = {"box": [{"x": ["2024-11-02 12:00", "2024-11-01 06:00"]}]}
+
+    Event.selection = type("Selection", (), Event.selection)
+    start, end = visible_range(Event)
+    assert (start.day, end.day) == (1, 2)
+    assert visible_range(None) is None
@@ -1,9 +1,11 @@
 import os
+import time
 import pandas as pd
 import pytest
 from datetime import datetime
+from data_aquisition import file_operations
 from data_aquisition.da_config import STATION
-from data_aquisition.file_operations import append_to_csv
+from data_aquisition.file_operations import CsvWriter, append_to_csv
 
 
 @pytest.fixture
@@ -40,3 +42,47 @@ def test_append_to_csv(sample_data):
 
     # Cleanup the file after testing
     os.remove(expected_filename)
+
+
+def test_csv_writer_appends_rows(sample_data, tmp_path):
+    path = tmp_path / "readings.csv"
+    with CsvWriter(str(path)) as writer:
+        writer.write(sample_data)
+        writer.write(sample_data)
+    with CsvWriter(str(path)) as writer:
+        writer.write(sample_data)
+
+    df = pd.read_csv(path)
+    assert df.shape[0] == 3, "Rows were not appended under a single header."
+    assert df.columns.tolist() == list(sample_data)
+
+
+def test_csv_writer_rolls_over_at_midnight(sample_data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    days = iter([datetime(2024, 11, 12, 23, 59), datetime(2024, 11, 13, 0, 0)])
+    with CsvWriter(now=lambda: next(days)) as writer:
+        writer.write(sample_data)
+        writer.write(sample_data)
+
+    assert os.path.exists(f"{STATION}_12_11_24_temp.csv")
+    assert os.path.exists(f"{STATION}_13_11_24_temp.csv")
+
+
+def test_csv_writer_flushes_quiet_file_on_a_timer(sample_data, tmp_path):
+    path = tmp_path / "readings.csv"
+    with CsvWriter(str(path), flush_interval=0.05) as writer:
+        writer.write(sample_data)
+        deadline = time.monotonic() + 2
+        while len(path.read_text().splitlines()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert pd.read_csv(path).shape[0] == 1, "Buffered row was not flushed."
+
+
+def test_csv_writer_uses_configured_temp_file(sample_data, tmp_path, monkeypatch):
+    path = tmp_path / "configured.csv"
+    monkeypatch.setattr(file_operations, "CSV_FILE", str(path))
+    with CsvWriter(now=lambda: datetime(2024, 11, 12)) as writer:
+        writer.write(sample_data)
+
+    assert writer.path == str(path)
+    assert pd.read_csv(path).shape[0] == 1
@@ -0,0 +1,113 @@
+import threading
+import pandas as pd
+import pytest
+from data_aquisition.frame_cache import FrameCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_frame(rows=3):
+    return pd.DataFrame({"Energy": [float(i) for i in range(rows)]})
+
+
+def test_hit_within_ttl_and_reload_after():
+    clock = Clock()
+    cache = FrameCache(ttl=10, clock=clock)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return make_frame()
+
+    cache.get("station01", load)
+    cache.get("station01", load)
+    clock.now = 11
+    cache.get("station01", load)
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+    assert stats["bytes"] > 0
+
+
+def test_frames_share_data_but_edits_stay_private():
+    cache = FrameCache()
+    first = cache.get("key", make_frame)
+    first["Predicted_Energy"] = 1.0
+    first.loc[0, "Energy"] = 99.0
+    second = cache.get("key", make_frame)
+    assert list(second.columns) == ["Energy"]
+    assert second["Energy"].iloc[0] == 0.0
+
+
+def test_in_place_edits_leave_the_cached_frame_unchanged():
+    cache = FrameCache()
+    frame = cache.get("key", lambda: make_frame(4))
+    frame.iloc[1, 0] = 99.0
+    frame["Energy"] *= 2
+    frame.sort_values("Energy", ascending=False, inplace=True)
+    frame.drop(index=0, inplace=True)
+    cached = cache._entries["key"].frame
+    pd.testing.assert_frame_equal(cached, make_frame(4))
+    pd.testing.assert_frame_equal(cache.get("key", make_frame), make_frame(4))
+
+
+def test_concurrent_loads_are_deduplicated():
+    cache = FrameCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return make_frame()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("key", slow_load)))
+        for _ in range(8)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while cache.stats()["waits"] < 7:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert len(results) == 8
+
+
+def test_failed_load_is_not_cached():
+    cache = FrameCache()
+
+    def failing():
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        cache.get("key", failing)
+    assert cache.get("key", lambda: None) is None
+    assert len(cache.get("key", make_frame)) == 3
+    assert cache.stats()["errors"] == 1
+
+
+def test_memory_bound_evicts_least_recently_used():
+    frame_bytes = int(make_frame(100).memory_usage(deep=True).sum())
+    cache = FrameCache(max_bytes=frame_bytes * 2)
+    cache.get("a", lambda: make_frame(100))
+    cache.get("b", lambda: make_frame(100))
+    cache.get("a", lambda: make_frame(100))
+    cache.get("c", lambda: make_frame(100))
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= frame_bytes * 2
+    cache.get("a", make_frame)
+    assert cache.stats()["hits"] == 2
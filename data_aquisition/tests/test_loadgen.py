@@ -0,0 +1,84 @@
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+import pytest
+from data_aquisition.data_acquisition import SerialReader
+from data_aquisition.loadgen import (
+    PtyDevices,
+    main,
+    paced,
+    replay_readings,
+    run,
+    synthetic_readings,
+)
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "cleaned_45.csv")
+
+
+def test_synthetic_readings_cover_every_station():
+    start = datetime(2024, 11, 12)
+    readings = list(islice(synthetic_readings(3, interval=2, start=start, seed=1), 6))
+    assert [r["Process_ID"] for r in readings[:3]] == [
+        "station01",
+        "station02",
+        "station03",
+    ]
+    assert readings[3]["Timestamp"] == start + timedelta(seconds=2)
+    assert all(215 < r["Voltage"] < 245 for r in readings)
+
+
+def test_replay_csv():
+    readings = list(islice(replay_readings(CSV_PATH, chunk_rows=100), 250))
+    assert len(readings) == 250
+    assert readings[0]["Process_ID"] == "station01"
+    assert isinstance(readings[0]["Timestamp"], datetime)
+
+
+def test_paced_sleeps_by_timestamp_and_speed():
+    start = datetime(2024, 11, 12)
+    readings = [{"Timestamp": start + timedelta(seconds=10 * i)} for i in range(3)]
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    out = list(paced(readings, speed=10, sleep=sleep, clock=lambda: now[0]))
+    assert len(out) == 3
+    assert sleeps == pytest.approx([1.0, 1.0])
+    assert list(paced(readings, speed=0, sleep=sleeps.append)) == readings
+    assert len(sleeps) == 2
+
+
+def test_pty_devices_feed_serial_reader():
+    readings = list(islice(synthetic_readings(2, seed=1), 4))
+    with PtyDevices() as devices:
+        # Opening a port discards pending input, so open it before writing
+        with SerialReader(devices.open("station02"), timeout=1) as reader:
+            reader.open()
+            run(readings, devices.write, report_interval=0)
+            records = list(islice(reader.records(), 2))
+    assert [record["Process_ID"] for record in records] == ["station02"] * 2
+    assert records[1]["Voltage"] == readings[3]["Voltage"]
+
+
+def test_pty_devices_are_created_up_front_and_wait_for_readers():
+    with PtyDevices(["station01", "station02"]) as devices:
+        assert sorted(devices.ports) == ["station01", "station02"]
+        assert devices.waiting() == ["station01", "station02"]
+        with SerialReader(devices.ports["station01"], timeout=1) as reader:
+            reader.open()
+            assert devices.waiting() == ["station02"]
+            assert not devices.wait_for_readers(timeout=0.05, interval=0.01)
+            with SerialReader(devices.ports["station02"], timeout=1) as other:
+                other.open()
+                assert devices.wait_for_readers(timeout=1, interval=0.01)
+
+
+@pytest.mark.parametrize("rate", ["0", "-2"])
+def test_rate_must_be_positive(rate, capsys):
+    with pytest.raises(SystemExit) as error:
+        main(["--rate", rate])
+    assert error.value.code == 2
+    assert "must be positive" in capsys.readouterr().err
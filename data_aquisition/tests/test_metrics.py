@@ -0,0 +1,82 @@
+import json
+import urllib.request
+import pytest
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_counter_and_histogram_snapshot():
+    metrics.counter("frames_total", port="a").inc()
+    metrics.counter("frames_total", port="a").inc(2)
+    histogram = metrics.histogram("query_seconds")
+    for value in (0.002, 0.003, 0.2):
+        histogram.observe(value)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['frames_total{port="a"}'] == {"type": "counter", "value": 3}
+    timings = snapshot["query_seconds"]
+    assert timings["count"] == 3
+    assert timings["p50"] == 0.005
+    assert timings["p99"] == 0.5
+    assert timings["max"] == 0.2
+
+
+def test_timer_and_decorator_observe_calls():
+    @metrics.timed("call_seconds", function="double")
+    def double(x):
+        return 2 * x
+
+    assert double(4) == 8
+    with metrics.timer("call_seconds", function="block"):
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot['call_seconds{function="double"}']["count"] == 1
+    assert snapshot['call_seconds{function="block"}']["count"] == 1
+
+
+def test_prometheus_text_has_cumulative_buckets():
+    metrics.counter("rows_total").inc(5)
+    metrics.histogram("flush_seconds", table="readings").observe(0.0002)
+
+    lines = metrics.prometheus_text().splitlines()
+    assert "# TYPE rows_total counter" in lines
+    assert "rows_total 5" in lines
+    assert 'flush_seconds_bucket{table="readings",le="0.0001"} 0' in lines
+    assert 'flush_seconds_bucket{table="readings",le="0.0005"} 1' in lines
+    assert 'flush_seconds_bucket{table="readings",le="+Inf"} 1' in lines
+    assert 'flush_seconds_count{table="readings"} 1' in lines
+
+
+def test_disabled_metrics_do_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    def work():
+        return 1
+
+    assert metrics.timed("work_seconds")(work) is work
+    with metrics.timer("block_seconds"):
+        pass
+    metrics.counter("rows_total").inc()
+
+    assert metrics.snapshot() == {"rows_total": {"type": "counter", "value": 0}}
+
+
+def test_serve_exposes_text_and_json():
+    metrics.counter("rows_total").inc()
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert "rows_total 1" in response.read().decode()
+        with urllib.request.urlopen(f"{url}/metrics.json") as response:
+            assert json.load(response)["rows_total"]["value"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,107 @@
+import threading
+import time
+import pytest
+from datetime import datetime
+from data_aquisition.pipeline import Pipeline, SinkWorker
+
+
+@pytest.fixture
+def sample_data():
+    return {
+        "Process_ID": "station01",
+        "ID": 1,
+        "Timestamp": datetime.now(),
+        "Voltage": 220.0,
+        "Current": 0.02,
+        "Power": 1.2,
+        "Energy": 0.003,
+        "Frequency": 50.0,
+        "PF": 0.99,
+    }
+
+
+def test_pipeline_fans_out_to_every_sink(sample_data):
+    csv_rows, db_rows = [], []
+    with Pipeline({"csv": csv_rows.append, "db": db_rows.append}) as pipeline:
+        for _ in range(5):
+            pipeline.put(sample_data)
+    assert len(csv_rows) == 5
+    assert len(db_rows) == 5
+    assert pipeline.stats()["db"]["processed"] == 5
+
+
+def test_slow_sink_does_not_block_other_sinks(sample_data):
+    release = threading.Event()
+    csv_rows = []
+    with Pipeline(
+        {"csv": csv_rows.append, "db": lambda record: release.wait()},
+        maxsize=100,
+    ) as pipeline:
+        for _ in range(10):
+            pipeline.put(sample_data)
+        while len(csv_rows) < 10:
+            time.sleep(0.01)
+        assert pipeline.stats()["db"]["depth"] >= 9
+        release.set()
+
+
+def test_drop_oldest_policy(sample_data):
+    worker = SinkWorker("db", lambda record: None, maxsize=2, policy="drop_oldest")
+    for i in range(5):
+        worker.put(dict(sample_data, ID=i))
+    assert worker.stats()["dropped"] == 3
+    assert [record["ID"] for _, record in list(worker.queue.queue)] == [3, 4]
+
+
+def test_spill_policy_replays_records(sample_data, tmp_path):
+    rows = []
+    worker = SinkWorker(
+        "db", rows.append, maxsize=1, policy="spill", spill_dir=str(tmp_path)
+    )
+    for i in range(4):
+        worker.put(dict(sample_data, ID=i))
+    assert worker.stats()["spilled"] == 3
+    worker.start()
+    worker.close()
+    assert sorted(record["ID"] for record in rows) == [0, 1, 2, 3]
+    assert isinstance(rows[-1]["Timestamp"], datetime)
+
+
+def test_spill_keeps_record_order_under_load(sample_data, tmp_path):
+    rows = []
+
+    def slow_sink(record):
+        time.sleep(0.001)
+        rows.append(record["ID"])
+
+    worker = SinkWorker(
+        "db", slow_sink, maxsize=5, policy="spill", spill_dir=str(tmp_path)
+    )
+    worker.start()
+    for i in range(200):
+        worker.put(dict(sample_data, ID=i))
+    worker.close()
+    assert worker.stats()["spilled"] > 0
+    assert rows == list(range(200))
+
+
+def test_spill_from_previous_run_is_replayed(sample_data, tmp_path):
+    first = SinkWorker("db", print, maxsize=1, policy="spill", spill_dir=str(tmp_path))
+    first.put(dict(sample_data, ID=0))
+    first.put(dict(sample_data, ID=1))
+
+    rows = []
+    second = SinkWorker(
+        "db", rows.append, maxsize=1, policy="spill", spill_dir=str(tmp_path)
+    )
+    second.put(dict(sample_data, ID=2))
+    second.start()
+    second.close()
+    assert [record["ID"] for record in rows] == [1, 2]
+    # Lag is measured from the wall-clock time the record was first put
+    assert 0 <= second.stats()["max_lag_ms"] < 5000
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SinkWorker("db", print, policy="ignore")
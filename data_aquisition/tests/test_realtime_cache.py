@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+from data_aquisition.realtime_cache import RealTimeCache
+
+
+class FakeReadings:
+    """Stand-in for load_readings over an in-memory list of rows."""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = []
+
+    def add(self, reading_id, timestamp, station="station01"):
+        self.rows.append(
+            {"Process_ID": station, "ID": reading_id, "Timestamp": timestamp}
+        )
+
+    def __call__(self, station=None, start=None, latest=None, after=None):
+        self.calls.append({"start": start, "latest": latest, "after": after})
+        rows = [
+            row
+            for row in sorted(self.rows, key=lambda row: row["Timestamp"])
+            if (station is None or row["Process_ID"] == station)
+            and (start is None or row["Timestamp"] >= start)
+            and (after is None or row["Timestamp"] > after)
+        ]
+        if latest is not None:
+            rows = rows[-latest:]
+        return pd.DataFrame(rows, columns=["Process_ID", "ID", "Timestamp"])
+
+
+@pytest.fixture
+def readings():
+    fake = FakeReadings()
+    now = datetime.now()
+    for i in range(10):
+        fake.add(i, now - timedelta(seconds=60 - i))
+    return fake
+
+
+def test_first_get_loads_latest_rows(readings):
+    cache = RealTimeCache(size=5, load=readings)
+    df = cache.get("station01")
+    assert df["ID"].tolist() == [5, 6, 7, 8, 9]
+    assert readings.calls[0]["latest"] == 5
+
+
+def test_refresh_fetches_only_new_rows(readings):
+    cache = RealTimeCache(size=5, overlap=timedelta(0), load=readings)
+    cache.get("station01")
+    last_seen = readings.rows[-1]["Timestamp"]
+    readings.add(10, last_seen + timedelta(seconds=1))
+    df = cache.get("station01")
+    assert readings.calls[-1]["after"] == last_seen
+    assert df["ID"].tolist() == [6, 7, 8, 9, 10]
+    assert cache.rows_fetched == 6
+
+
+def test_refresh_picks_up_late_committed_rows(readings):
+    cache = RealTimeCache(size=20, overlap=timedelta(seconds=5), load=readings)
+    cache.get("station01")
+    last_seen = readings.rows[-1]["Timestamp"]
+    readings.add(11, last_seen + timedelta(seconds=1))
+    readings.add(10, last_seen - timedelta(seconds=1) + timedelta(milliseconds=500))
+    df = cache.get("station01")
+    assert df["ID"].tolist()[-3:] == [10, 9, 11]
+    assert len(df) == 12
@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta
+from data_aquisition.rollups import RollupWriter, truncate
+
+
+def make_reading(timestamp, voltage, station="station01"):
+    return {
+        "Process_ID": station,
+        "ID": 1,
+        "Timestamp": timestamp,
+        "Voltage": voltage,
+        "Current": 0.02,
+        "Power": 1.2,
+        "Energy": 0.003,
+        "Frequency": 50.0,
+        "PF": 0.99,
+    }
+
+
+@pytest.fixture
+def merged():
+    rows = {}
+
+    def write_rows(resolution, partials):
+        rows.setdefault(resolution, []).extend(partials)
+        return True
+
+    return rows, write_rows
+
+
+def test_truncate():
+    timestamp = datetime(2024, 11, 12, 13, 45, 30, 500)
+    assert truncate(timestamp, "minute") == datetime(2024, 11, 12, 13, 45)
+    assert truncate(timestamp, "hour") == datetime(2024, 11, 12, 13)
+    assert truncate(timestamp, "day") == datetime(2024, 11, 12)
+    with pytest.raises(ValueError):
+        truncate(timestamp, "week")
+
+
+def test_rollup_writer_aggregates_per_bucket(merged):
+    rows, write_rows = merged
+    start = datetime(2024, 11, 12, 13, 0)
+    with RollupWriter(max_delay=60, write_rows=write_rows) as writer:
+        for i, voltage in enumerate([220.0, 224.0, 222.0]):
+            writer.write(make_reading(start + timedelta(seconds=20 * i), voltage))
+        writer.write(make_reading(start + timedelta(minutes=1), 230.0))
+
+    assert len(rows["minute"]) == 2
+    assert len(rows["hour"]) == 1
+    hour = rows["hour"][0]
+    assert hour["Count"] == 4
+    assert hour["Voltage_sum"] == pytest.approx(896.0)
+    assert hour["Voltage_min"] == 220.0
+    assert hour["Voltage_max"] == 230.0
+    assert hour["Voltage_last"] == 230.0
+
+
+def test_rollup_writer_last_follows_timestamp_not_arrival(merged):
+    rows, write_rows = merged
+    start = datetime(2024, 11, 12, 13, 0)
+    with RollupWriter(["day"], max_delay=60, write_rows=write_rows) as writer:
+        writer.write(make_reading(start + timedelta(seconds=10), 225.0))
+        writer.write(make_reading(start, 221.0))
+    assert rows["day"][0]["Voltage_last"] == 225.0
+
+
+def test_rollup_writer_retries_failed_merge():
+    results = [False, True]
+    written = []
+
+    def write_rows(resolution, partials):
+        ok = results.pop(0)
+        if ok:
+            written.extend(partials)
+        return ok
+
+    writer = RollupWriter(["day"], max_delay=60, write_rows=write_rows)
+    writer.write(make_reading(datetime(2024, 11, 12, 13, 0), 220.0))
+    writer.flush()
+    assert writer.pending() == 1
+    writer.write(make_reading(datetime(2024, 11, 12, 14, 0), 230.0))
+    writer.close()
+    assert written[0]["Count"] == 2
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import pty
+import threading
+import pytest
+from data_aquisition.da_config import parse_stations
+from data_aquisition.data_acquisition import format_data
+from data_aquisition.supervisor import AcquisitionSupervisor
+
+
+@pytest.fixture
+def fake_devices():
+    pairs = [pty.openpty() for _ in range(2)]
+    yield [(master, os.ttyname(slave)) for master, slave in pairs]
+    for master, slave in pairs:
+        os.close(master)
+        os.close(slave)
+
+
+async def wait_for(condition, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError("condition not met")
+
+
+def test_parse_stations():
+    assert parse_stations("station01=/dev/ttyACM0, station02=loop://") == {
+        "station01": "/dev/ttyACM0",
+        "station02": "loop://",
+    }
+    with pytest.raises(ValueError):
+        parse_stations("station01")
+
+
+def test_format_data_uses_station_from_frame():
+    data = format_data(1, ["station07", "220", "0.02", "1.2", "0.003", "50", "0.99"])
+    assert data["Process_ID"] == "station07"
+
+
+def test_supervisor_reads_stations_concurrently(fake_devices):
+    (master1, port1), (master2, port2) = fake_devices
+    records = []
+    supervisor = AcquisitionSupervisor(
+        {"station01": port1, "station02": port2, "station03": "/nonexistent/port"},
+        records.append,
+        report_interval=0,
+    )
+
+    async def scenario():
+        task = asyncio.create_task(supervisor.run())
+        await wait_for(lambda: supervisor.channels[1].connected)
+        os.write(master1, b"station01,220.1,0.02,1.2,0.003,50.0,0.99\nstation01,2")
+        os.write(master2, b"station02,221.5,0.03,1.4,0.004,49.9,0.98\nbad\n")
+        os.write(master1, b"21.0,0.02,1.2,0.003,50.0,0.99\n")
+        await wait_for(lambda: len(records) == 3)
+        stats = supervisor.stats()
+        supervisor.stop()
+        await task
+        return stats
+
+    stats = asyncio.run(scenario())
+    by_station = {}
+    for record in records:
+        by_station.setdefault(record["Process_ID"], []).append(record["ID"])
+    assert by_station == {"station01": [1, 2], "station02": [1]}
+    assert stats["station01"]["frames"] == 2
+    assert stats["station01"]["health"] == "ok"
+    assert stats["station02"]["malformed"] == 1
+    assert stats["station03"]["health"] == "disconnected"
+    assert stats["station03"]["errors"] >= 1
+
+
+def test_blocking_sink_runs_off_the_event_loop(fake_devices):
+    (master1, port1), (master2, port2) = fake_devices
+    records = []
+    release = threading.Event()
+
+    def sink(record):
+        # station01's sink is stuck until station02 has been read
+        if record["Process_ID"] == "station01":
+            release.wait(5)
+        records.append(record)
+
+    supervisor = AcquisitionSupervisor(
+        {"station01": port1, "station02": port2},
+        sink,
+        report_interval=0,
+        blocking_sink=True,
+    )
+
+    async def scenario():
+        task = asyncio.create_task(supervisor.run())
+        await wait_for(lambda: supervisor.channels[1].connected)
+        os.write(master1, b"station01,220.1,0.02,1.2,0.003,50.0,0.99\n")
+        await wait_for(lambda: supervisor.channels[0].delivering)
+        os.write(master2, b"station09,221.5,0.03,1.4,0.004,49.9,0.98\n")
+        await wait_for(lambda: len(records) == 1)
+        release.set()
+        await wait_for(lambda: len(records) == 2)
+        stats = supervisor.stats()
+        supervisor.stop()
+        await task
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert [record["Process_ID"] for record in records] == ["station09", "station01"]
+    assert stats["station02"]["mismatched"] == 1
+    assert stats["station01"]["mismatched"] == 0
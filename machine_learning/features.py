@@ -0,0 +1,206 @@
+"""Model features shared by training, inference and forecasting.
+
+Besides the raw readings, models see the time of day and week, lags of Power
+and rolling means and standard deviations of Power, all per station:
+
+- ``make_features`` computes them for a whole frame in one vectorized pass.
+- ``FeatureStream`` does the same chunk by chunk, carrying each station's
+  last rows across chunks, for training on data that does not fit in memory.
+- ``FeatureState`` updates them one reading at a time in O(1), for live
+  inference and for stepping a forecast forward in time.
+
+Rows must be in time order within each station. Before a station has enough
+history, missing lags fall back to the current value and windows shrink to
+the rows seen so far, so every row gets features.
+"""
+
+from collections import deque
+import numpy as np
+import pandas as pd
+
+BASE_FEATURES = ["Voltage", "Current", "Power", "Frequency", "PF"]
+LAG_COLUMN = "Power"
+LAGS = (1, 2, 3)
+WINDOWS = (6, 12)
+TIME_FEATURES = ["Hour_Sin", "Hour_Cos", "Day_Of_Week"]
+LAG_FEATURES = [f"{LAG_COLUMN}_Lag{lag}" for lag in LAGS]
+WINDOW_FEATURES = [
+    f"{LAG_COLUMN}_{statistic}{window}"
+    for window in WINDOWS
+    for statistic in ["Mean", "Std"]
+]
+FEATURES = BASE_FEATURES + TIME_FEATURES + LAG_FEATURES + WINDOW_FEATURES
+
+# Rows of history any feature looks back over
+LOOKBACK = max(max(LAGS), max(WINDOWS))
+
+# Running window sums are recomputed this often to shed rounding drift
+RESUM_INTERVAL = 1000
+
+
+def station_column(df):
+    """Return the column naming each row's station, or None."""
+    for column in ["Process_ID", "Station"]:
+        if column in df.columns:
+            return column
+    return None
+
+
+def model_features(model):
+    """Return the feature names ``model`` expects, in order.
+
+    Models fitted on a DataFrame know their feature names, and prediction
+    clients report their server's. A model that only knows how many features
+    it takes is assumed to use the raw readings if it takes five of them.
+    """
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        names = getattr(model, "features", None)
+    if names is not None:
+        return list(names)
+    count = getattr(model, "n_features_in_", getattr(model, "n_features", None))
+    return BASE_FEATURES if count == len(BASE_FEATURES) else FEATURES
+
+
+def time_features(hours, weekday):
+    """Encode hours since midnight cyclically, keeping the day of the week."""
+    angle = 2 * np.pi * np.asarray(hours, dtype=float) / 24
+    return np.sin(angle), np.cos(angle), np.asarray(weekday, dtype=float)
+
+
+def make_features(df):
+    """Return a frame of FEATURES for every row of ``df``, keeping its index."""
+    base = df[BASE_FEATURES].to_numpy(dtype=float)
+    timestamps = pd.to_datetime(df["Timestamp"]).to_numpy(dtype="datetime64[ns]")
+    days = timestamps.astype("datetime64[D]")
+    hours = (timestamps - days) / np.timedelta64(1, "h")
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    times = np.column_stack(time_features(hours, weekday))
+
+    # Rows of each station become contiguous, in their original order
+    column = station_column(df)
+    codes = pd.factorize(df[column])[0] if column else np.zeros(len(df), int)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    power = base[order, BASE_FEATURES.index(LAG_COLUMN)]
+    positions = np.arange(len(df))
+    starts = np.r_[True, codes[1:] != codes[:-1]] if len(df) else np.array([], bool)
+    rank = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+
+    # Column k holds the value k rows back, or the current value before that
+    back = np.empty((len(df), LOOKBACK))
+    for k in range(LOOKBACK):
+        back[:, k] = np.where(rank >= k, power[np.maximum(positions - k, 0)], power)
+    lags = back[:, list(LAGS)]
+    windows = []
+    for window in WINDOWS:
+        count = np.minimum(rank + 1, window)
+        inside = np.arange(window) < count[:, None]
+        values = back[:, :window]
+        mean = (values * inside).sum(axis=1) / count
+        variance = (((values - mean[:, None]) * inside) ** 2).sum(axis=1) / count
+        windows += [mean, np.sqrt(variance)]
+
+    engineered = np.empty((len(df), len(LAG_FEATURES) + len(WINDOW_FEATURES)))
+    engineered[order] = np.column_stack([lags, *windows])
+    return pd.DataFrame(
+        np.hstack([base, times, engineered]), index=df.index, columns=FEATURES
+    )
+
+
+def select_features(X, names):
+    """Return the columns of a FEATURES matrix that ``names`` asks for."""
+    return X[:, [FEATURES.index(name) for name in names]]
+
+
+class FeatureStream:
+    """Compute features for consecutive chunks of one time-ordered stream."""
+
+    def __init__(self):
+        self._tail = None
+
+    def transform(self, chunk):
+        """Return the features of ``chunk``, using earlier chunks for history."""
+        data = chunk.reset_index(drop=True)
+        carried = 0
+        if self._tail is not None:
+            carried = len(self._tail)
+            data = pd.concat([self._tail, data], ignore_index=True)
+        column = station_column(data)
+        self._tail = (
+            data.groupby(column, sort=False).tail(LOOKBACK)
+            if column
+            else data.tail(LOOKBACK)
+        )
+        features = make_features(data).iloc[carried:]
+        features.index = chunk.index
+        return features
+
+
+class _History:
+    """The last LOOKBACK values of one station, with running window sums."""
+
+    __slots__ = ("values", "sums", "squares", "updates")
+
+    def __init__(self):
+        self.values = deque(maxlen=LOOKBACK)
+        self.sums = [0.0] * len(WINDOWS)
+        self.squares = [0.0] * len(WINDOWS)
+        self.updates = 0
+
+    def resum(self):
+        values = list(self.values)
+        for i, window in enumerate(WINDOWS):
+            recent = values[-window:]
+            self.sums[i] = sum(recent)
+            self.squares[i] = sum(value * value for value in recent)
+
+
+class FeatureState:
+    """Per-station features for one new reading at a time.
+
+    Each update costs the same however long the stream, since only the last
+    LOOKBACK values and running window sums are kept per station.
+    """
+
+    def __init__(self):
+        self._stations = {}
+
+    def update(self, row):
+        """Add a reading (a dict or Series) and return its FEATURES as an array."""
+        station = row.get("Process_ID", row.get("Station"))
+        history = self._stations.get(station)
+        if history is None:
+            history = self._stations[station] = _History()
+        values = history.values
+        value = float(row[LAG_COLUMN])
+
+        lags = [values[-lag] if len(values) >= lag else value for lag in LAGS]
+        for i, window in enumerate(WINDOWS):
+            if len(values) >= window:
+                old = values[-window]
+                history.sums[i] -= old
+                history.squares[i] -= old * old
+            history.sums[i] += value
+            history.squares[i] += value * value
+        values.append(value)
+        history.updates += 1
+        if history.updates % RESUM_INTERVAL == 0:
+            history.resum()
+
+        windows = []
+        for i, window in enumerate(WINDOWS):
+            count = min(len(values), window)
+            mean = history.sums[i] / count
+            windows += [mean, np.sqrt(max(history.squares[i] / count - mean**2, 0.0))]
+
+        timestamp = pd.Timestamp(row["Timestamp"])
+        hours = (timestamp - timestamp.normalize()) / pd.Timedelta(hours=1)
+        times = [float(part) for part in time_features(hours, timestamp.dayofweek)]
+        base = [float(row[column]) for column in BASE_FEATURES]
+        return np.array(base + times + lags + windows)
+
+    def extend(self, df):
+        """Add every row of ``df`` and return their features as a matrix."""
+        rows = [self.update(row) for row in df.to_dict("records")]
+        return np.array(rows).reshape(-1, len(FEATURES))
@@ -0,0 +1,195 @@
+"""Compact, pure-NumPy inference for a fitted RandomForestRegressor.
+
+All trees are flattened into shared contiguous arrays (feature, threshold,
+left/right child and leaf value), so a forest loads from one ``.npz`` file
+without unpickling sklearn objects and predicts without sklearn's per-call
+validation. It is fastest for the small batches the dashboard sends; for
+batches of thousands of rows sklearn's own traversal catches up.
+
+Export a pickled model with:
+    python -m machine_learning.forest model/random_forest.pkl model/random_forest.npz
+"""
+
+import argparse
+import os
+import struct
+import zipfile
+import numpy as np
+
+LEAF = -1
+
+
+class CompiledForest:
+    """Batched evaluator over a forest flattened into NumPy arrays."""
+
+    def __init__(
+        self, feature, threshold, left, right, value, roots, max_depth, n_features
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.version = None
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten the trees of a fitted sklearn forest regressor."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, LEAF, tree.feature))
+            thresholds.append(tree.threshold)
+            # Leaves point at themselves so a walk can run a fixed number of steps
+            nodes = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+            n_features=model.n_features_in_,
+        )
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+        )
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a forest saved by ``save``.
+
+        With ``mmap_mode="r"`` the arrays are memory-mapped straight from the
+        (uncompressed) ``.npz``, so processes loading the same file share its
+        pages instead of each holding a copy.
+        """
+        if mmap_mode is None:
+            with np.load(path) as arrays:
+                forest = cls(**{name: arrays[name] for name in arrays.files})
+        else:
+            forest = cls(**_map_npz(path, mmap_mode))
+        forest.version = os.path.basename(path)
+        return forest
+
+    @property
+    def nbytes(self):
+        """Return the memory held by the flattened arrays."""
+        return sum(
+            array.nbytes
+            for array in [
+                self.feature,
+                self.threshold,
+                self.left,
+                self.right,
+                self.value,
+                self.roots,
+            ]
+        )
+
+    def predict(self, X):
+        """Predict a 2-D batch of rows, matching sklearn's predict."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1 or X.shape[0] == 1:
+            return np.array([self.predict_one(X.reshape(-1))])
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        # One walker per (row, tree) pair; walkers that reach a leaf drop out
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), n_trees)
+        active = np.arange(nodes.size)
+        for _ in range(self.max_depth):
+            current = nodes[active]
+            feature = self.feature[current]
+            internal = feature != LEAF
+            active = active[internal]
+            current = current[internal]
+            feature = feature[internal]
+            if not active.size:
+                break
+            go_left = X[rows[active], feature] <= self.threshold[current]
+            nodes[active] = np.where(go_left, self.left[current], self.right[current])
+        return self.value[nodes].reshape(n_rows, n_trees).mean(axis=1)
+
+    def predict_one(self, row):
+        """Predict a single row without building a 2-D batch."""
+        row = np.asarray(row, dtype=np.float32)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            go_left = row[np.maximum(feature, 0)] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return float(self.value[nodes].mean())
+
+
+def _map_npz(path, mmap_mode):
+    """Memory-map each array stored uncompressed in an ``.npz`` file."""
+    arrays = {}
+    with open(path, "rb") as file, zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            name = info.filename[: -len(".npy")]
+            with archive.open(info) as member:
+                version = np.lib.format.read_magic(member)
+                if version == (1, 0):
+                    header = np.lib.format.read_array_header_1_0(member)
+                else:
+                    header = np.lib.format.read_array_header_2_0(member)
+                shape, fortran_order, dtype = header
+                header_size = member.tell()
+            if info.compress_type != zipfile.ZIP_STORED or shape == ():
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # The member's data follows its local header, whose extra field
+            # may differ from the one in the central directory
+            file.seek(info.header_offset + 26)
+            name_size, extra_size = struct.unpack("<HH", file.read(4))
+            data = info.header_offset + 30 + name_size + extra_size
+            arrays[name] = np.memmap(
+                path,
+                dtype=dtype,
+                mode=mmap_mode,
+                shape=shape,
+                offset=data + header_size,
+                order="F" if fortran_order else "C",
+            )
+    return arrays
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("model", help="pickled RandomForestRegressor")
+    parser.add_argument("output", help="path of the .npz file to write")
+    args = parser.parse_args()
+    forest = CompiledForest.from_sklearn(joblib.load(args.model))
+    forest.save(args.output)
+    print(
+        f"Wrote {len(forest.roots)} trees, {len(forest.feature)} nodes "
+        f"({forest.nbytes / 1e6:.1f} MB) to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
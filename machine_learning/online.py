@@ -0,0 +1,318 @@
+"""Keep the active forest current by growing trees on readings as they land.
+
+Every poll fetches the readings newer than the last one seen, re-reading a
+short overlap so rows committed late with older timestamps are not missed;
+readings already seen are skipped by (station, Timestamp, ID). Once enough
+have arrived, the model gains a few trees fitted on that mini-batch with
+``warm_start``, so recent behaviour is reflected within minutes without
+retraining on all history. Trees from the base model are kept, and only the
+newest ``--max-recent-trees`` grown trees are, so the forest stays bounded.
+Each update is written to model/ under a new version. An update learned from
+all stations is activated, which the dashboard's ModelRegistry picks up with
+a warm hot-swap; a ``--station`` update is only saved, for ``registry
+activate``, so one station's model never replaces the shared one. A backlog
+is paged through oldest first, ``--max-rows`` readings per poll, without
+sleeping between polls until it is caught up.
+
+    python -m machine_learning.online --interval 300 --min-rows 500
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+import metrics
+from machine_learning.features import (
+    BASE_FEATURES,
+    FeatureStream,
+    model_features,
+    station_column,
+)
+from machine_learning.predict import load_model, model_input
+from machine_learning.registry import (
+    MODEL_DIR,
+    get_active,
+    list_versions,
+    set_active,
+)
+from machine_learning.train_model import TARGET
+
+ONLINE_PREFIX = "random_forest_energy_model_online"
+
+
+def load_new_readings(station=None, after=None, window=timedelta(hours=1), limit=None):
+    """Return the oldest ``limit`` readings newer than ``after``.
+
+    On the first call (``after`` None) the readings start ``window`` ago.
+    """
+    from data_aquisition.db_operations import load_readings
+
+    if after is None:
+        return load_readings(
+            station=station, start=datetime.now() - window, limit=limit
+        )
+    return load_readings(station=station, after=after, limit=limit)
+
+
+class OnlineTrainer:
+    """Grow trees on mini-batches of new readings and publish each update.
+
+    ``load_rows(after)`` returns at most ``max_rows`` of the oldest readings
+    newer than ``after`` (None on the first call), oldest first. ``after``
+    trails the newest reading seen by ``overlap``, and rows seen before are
+    dropped. A full page means more are waiting, so ``behind`` is set. Rows
+    gather until ``min_rows`` are pending, then ``trees_per_update`` trees are
+    fitted on them. Before fitting, the current model is scored on the batch,
+    so the metadata of every version carries its error on data it had not
+    seen.
+    """
+
+    def __init__(
+        self,
+        model_dir=MODEL_DIR,
+        load_rows=None,
+        station=None,
+        min_rows=500,
+        max_rows=50_000,
+        trees_per_update=10,
+        max_recent_trees=50,
+        keep_versions=5,
+        overlap=timedelta(minutes=5),
+    ):
+        self.model_dir = model_dir
+        self.load_rows = load_rows or (
+            lambda after: load_new_readings(station, after, limit=max_rows)
+        )
+        self.station = station
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.trees_per_update = trees_per_update
+        self.max_recent_trees = max_recent_trees
+        self.keep_versions = keep_versions
+        self.overlap = overlap
+        self.base_version = get_active(model_dir)
+        if self.base_version is None:
+            raise FileNotFoundError(f"No model files in {model_dir}")
+        self.model = self._load_forest(self.base_version)
+        self.base_trees = getattr(
+            self.model, "online_base_trees_", len(self.model.estimators_)
+        )
+        self.features = model_features(self.model)
+        self.version = self.base_version
+        self.last_timestamp = None
+        self.behind = False
+        self.updates = 0
+        self.rows_seen = 0
+        self.last_mae = None
+        self._pending = []
+        self._seen = set()  # (station, Timestamp, ID) within the overlap
+        self._skip_overlap = False
+        self._stream = FeatureStream()
+
+    def _load_forest(self, version):
+        # A compiled .npz cannot grow trees; use the pickle it was exported from
+        name, extension = os.path.splitext(version)
+        if extension == ".npz":
+            version = f"{name}.pkl"
+        model = load_model(os.path.join(self.model_dir, version))
+        if not isinstance(model, RandomForestRegressor):
+            raise TypeError(f"{version} is not a RandomForestRegressor")
+        return model
+
+    def pending(self):
+        """Return the number of readings waiting for the next update."""
+        return sum(len(rows) for rows in self._pending)
+
+    def poll(self):
+        """Fetch new readings, updating and publishing once enough have landed.
+
+        Returns the new version, or None if no update was made.
+        """
+        after = self.last_timestamp
+        if after is not None and not self._skip_overlap:
+            after -= self.overlap
+        df = self.load_rows(after)
+        if df is None or df.empty:
+            self.behind = False
+            return None
+        full = len(df) >= self.max_rows
+        df = self._unseen(df)
+        self.behind = full
+        # A full page of rows already seen: page on past the overlap
+        self._skip_overlap = full and df.empty
+        if df.empty:
+            return None
+        rows = df.dropna(subset=BASE_FEATURES + [TARGET])
+        self.rows_seen += len(rows)
+        # The stream carries each station's recent rows, so lags span polls
+        features = self._stream.transform(rows)[self.features]
+        self._pending.append(
+            np.column_stack([features.to_numpy(dtype=float), rows[TARGET]])
+        )
+        if self.pending() < self.min_rows:
+            return None
+        # At most min_rows + max_rows rows: no page is trimmed away
+        batch = np.concatenate(self._pending)
+        self._pending = []
+        self.update(batch[:, :-1], batch[:, -1])
+        return self.publish(len(batch))
+
+    def _unseen(self, df):
+        """Drop readings seen by an earlier poll and remember the rest."""
+        column = station_column(df)
+        stations = df[column] if column else [None] * len(df)
+        keys = list(zip(stations, df["Timestamp"], df["ID"]))
+        new = [key not in self._seen for key in keys]
+        df = df[new]
+        if df.empty:
+            return df
+        newest = df["Timestamp"].max()
+        if self.last_timestamp is None or newest > self.last_timestamp:
+            self.last_timestamp = newest
+        # Only readings inside the next overlap can be returned again
+        cutoff = self.last_timestamp - self.overlap
+        self._seen = {key for key in self._seen if key[1] >= cutoff}
+        self._seen.update(key for key in keys if key[1] >= cutoff)
+        return df
+
+    @metrics.timed("model_update_seconds")
+    def update(self, X, y):
+        """Score the model on a batch, then grow trees on it."""
+        model = self.model
+        self.last_mae = float(
+            mean_absolute_error(y, model.predict(model_input(model, X)))
+        )
+        model.set_params(
+            warm_start=True,
+            n_estimators=len(model.estimators_) + self.trees_per_update,
+        )
+        model.fit(model_input(model, X), y)
+        # Drop the oldest grown trees, never the base model's
+        excess = len(model.estimators_) - self.base_trees - self.max_recent_trees
+        if excess > 0:
+            del model.estimators_[self.base_trees : self.base_trees + excess]
+            model.n_estimators = len(model.estimators_)
+        model.online_base_trees_ = self.base_trees
+        self.updates += 1
+
+    def publish(self, batch_rows):
+        """Save the model as a new version, activating it unless per station."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        name = f"{ONLINE_PREFIX}_{timestamp}"
+        if self.station is not None:
+            name = f"{ONLINE_PREFIX}_{self.station}_{timestamp}"
+        metadata = {
+            "name": name,
+            "station": self.station or "all",
+            "features": self.features,
+            "target": TARGET,
+            "base_version": self.base_version,
+            "trees": len(self.model.estimators_),
+            "metrics": {"mae": self.last_mae},
+            "train_rows": int(batch_rows),
+            "trained_at": datetime.now().isoformat(timespec="seconds"),
+            "sklearn_version": sklearn.__version__,
+        }
+        with open(os.path.join(self.model_dir, f"{name}.json"), "w") as metadata_file:
+            json.dump(metadata, metadata_file, indent=2)
+        # Written under a name the registry ignores, then renamed into place
+        temporary_path = os.path.join(self.model_dir, f".{name}.pkl.tmp")
+        joblib.dump(self.model, temporary_path)
+        os.replace(temporary_path, os.path.join(self.model_dir, f"{name}.pkl"))
+        if self.station is None:
+            set_active(f"{name}.pkl", self.model_dir)
+        self.version = f"{name}.pkl"
+        self.prune()
+        return self.version
+
+    def prune(self):
+        """Delete all but the newest ``keep_versions`` of this trainer's versions.
+
+        Versions learned from other stations, or from all of them, are kept.
+        """
+        station = self.station or "all"
+        online = [
+            version
+            for version in list_versions(self.model_dir)
+            if version["version"].startswith(ONLINE_PREFIX)
+            and version["metadata"].get("station") == station
+            and version["version"] != self.version
+        ]
+        for version in online[: max(0, len(online) - self.keep_versions + 1)]:
+            os.remove(version["path"])
+            name = os.path.splitext(version["path"])[0]
+            if os.path.exists(f"{name}.json"):
+                os.remove(f"{name}.json")
+
+    def stats(self):
+        """Return update counts and the size of the current forest."""
+        return {
+            "version": self.version,
+            "updates": self.updates,
+            "rows_seen": self.rows_seen,
+            "rows_pending": self.pending(),
+            "trees": len(self.model.estimators_),
+            "last_mae": self.last_mae,
+        }
+
+    def run(self, interval, sleep=time.sleep):
+        """Poll every ``interval`` seconds (at once while behind) until interrupted."""
+        while True:
+            try:
+                version = self.poll()
+            except Exception as e:
+                print(f"Online update error: {e}")
+                version = None
+                self.behind = False
+            if version is not None:
+                stats = self.stats()
+                print(
+                    f"Published {version}: {stats['trees']} trees, "
+                    f"MAE before update {stats['last_mae']:.4f}"
+                )
+            if not self.behind:
+                sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--station", help="learn from one station only")
+    parser.add_argument("--interval", type=float, default=300, help="seconds")
+    parser.add_argument("--min-rows", type=int, default=500)
+    parser.add_argument("--max-rows", type=int, default=50_000)
+    parser.add_argument("--trees", type=int, default=10, help="trees per update")
+    parser.add_argument("--max-recent-trees", type=int, default=50)
+    parser.add_argument("--keep-versions", type=int, default=5)
+    parser.add_argument(
+        "--overlap", type=float, default=300, help="seconds re-read each poll"
+    )
+    args = parser.parse_args()
+
+    trainer = OnlineTrainer(
+        args.model_dir,
+        station=args.station,
+        min_rows=args.min_rows,
+        max_rows=args.max_rows,
+        trees_per_update=args.trees,
+        max_recent_trees=args.max_recent_trees,
+        keep_versions=args.keep_versions,
+        overlap=timedelta(seconds=args.overlap),
+    )
+    print(f"Updating {trainer.base_version} every {args.interval}s")
+    try:
+        trainer.run(args.interval)
+    except KeyboardInterrupt:
+        print(f"Stopped: {trainer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,208 @@
-import pandas as pd
+import http.client
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
+from urllib.parse import urlsplit
+import joblib
+import numpy as np
+import pandas as pd
+import metrics
+from machine_learning.features import (
+    LOOKBACK,
+    FeatureState,
+    make_features,
+    model_features,
+    select_features,
+    station_column,
+)
+from machine_learning.forest import CompiledForest
+
+FORECAST_STEPS = 12
+FORECAST_INTERVAL = timedelta(minutes=5)
+
+# Forecasts keyed by (view, last timestamp, model version), newest last
+_forecast_cache = OrderedDict()
+_forecast_cache_lock = threading.Lock()
+FORECAST_CACHE_SIZE = 128
+_forecast_cache_hits = metrics.counter("forecast_cache_total", result="hit")
+_forecast_cache_misses = metrics.counter("forecast_cache_total", result="miss")
+
+
+@metrics.timed("model_load_seconds")
+def load_model(path, mmap_mode=None):
+    """Load a pickled model, or a CompiledForest from an ``.npz`` export.
+
+    ``mmap_mode`` memory-maps a CompiledForest's arrays so processes share
+    its pages. It does not apply to pickles: sklearn copies each tree's node
+    arrays into memory it owns while unpickling.
+    """
+    if path.endswith(".npz"):
+        return CompiledForest.load(path, mmap_mode)
+    model = joblib.load(path)
+    model.version = os.path.basename(path)
+    return model
+
+
+class PredictionClient:
+    """Model stand-in that sends predictions to a machine_learning.server.
+
+    It has the ``predict`` method the functions below call, so passing a
+    client instead of a model runs inference in the shared server process.
+    ``version`` follows the server's model: every prediction reports it, and
+    it is re-read from /health once it is ``version_ttl`` seconds old.
+    """
+
+    def __init__(self, url, timeout=10, version_ttl=5.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.version_ttl = version_ttl
+        self._local = threading.local()
+        self._refresh()
+
+    def _refresh(self):
+        health = self._request("GET", "/health")
+        self.features = health.get("features")
+        self._set_version(health["version"])
+
+    def _set_version(self, version):
+        self._version = version
+        self._version_checked = time.monotonic()
+
+    @property
+    def version(self):
+        if time.monotonic() - self._version_checked >= self.version_ttl:
+            self._refresh()
+        return self._version
+
+    def _request(self, method, path, body=None):
+        # One keep-alive connection per thread, reopened if the server dropped it
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+                self._local.conn = conn
+            try:
+                payload = json.dumps(body).encode("utf-8") if body else None
+                conn.request(
+                    method, path, payload, {"Content-Type": "application/json"}
+                )
+                response = conn.getresponse()
+                result = json.loads(response.read())
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"Prediction server error: {result.get('error')}")
+            return result
+
+    def predict(self, X):
+        rows = np.asarray(X, dtype=float).tolist()
+        result = self._request("POST", "/predict", {"rows": rows})
+        if "version" in result:
+            self._set_version(result["version"])
+        return np.asarray(result["predictions"])
 
 
+def model_version(model):
+    """Return a key identifying the model that produced a prediction."""
+    return getattr(model, "version", id(model))
+
+
+def clear_forecast_cache():
+    """Forget every memoized forecast."""
+    with _forecast_cache_lock:
+        _forecast_cache.clear()
+
+
+def model_input(model, X):
+    """Return ``X`` in the form the model was fitted on."""
+    # Models fitted on a DataFrame warn when given a bare array
+    if hasattr(model, "feature_names_in_"):
+        return pd.DataFrame(X, columns=model.feature_names_in_)
+    return X
+
+
+def feature_matrix(model, df):
+    """Return the features ``model`` expects for every row of ``df``."""
+    names = model_features(model)
+    if set(names).issubset(df.columns):
+        return df[names].to_numpy(dtype=float)
+    return make_features(df)[names].to_numpy(dtype=float)
+
+
+def _view(df):
+    """Return the one station ``df`` holds, or None for a frame of several."""
+    column = station_column(df)
+    if column is None or df[column].nunique() != 1:
+        return None
+    return df[column].iloc[-1]
+
+
+@metrics.timed("predict_seconds", function="forecast_energy")
 def forecast_energy(model, df):
-    """Forecast energy for the next hour using the model and dataframe."""
-    X = df[["Voltage", "Current", "Power", "Frequency", "PF"]]
-    # Forecast energy for the next hour
-    last_row = df.iloc[-1][
-        ["Voltage", "Current", "Power", "Frequency", "PF"]
-    ]  # Ensure this matches the training features
-
-    future_predictions = []
-    for i in range(12):
-        pred = model.predict([last_row])[0]
-        future_predictions.append(pred)
-        # import pdb
-
-        # pdb.set_trace()
-        last_row["Energy"] = pred
-        last_row = last_row.drop(
-            "Energy"
-        )  # Drop the 'Energy' column to maintain the correct number of features
-
-    # Display forecasted energy for the next hour
-    future_times = [
-        df["Timestamp"].iloc[-1] + timedelta(minutes=5 * i) for i in range(1, 13)
-    ]
+    """Forecast energy for the next hour using the model and dataframe.
+
+    The latest reading is carried forward through each future timestamp, so
+    time-of-day features advance and lag and rolling features fill with it.
+    All horizon inputs are predicted in one batched call, and the result is
+    reused for the same view (the station, or None for a frame mixing
+    stations), last timestamp and model version.
+    """
+    last_timestamp = df["Timestamp"].iloc[-1]
+    key = (_view(df), last_timestamp, model_version(model))
+    with _forecast_cache_lock:
+        if key in _forecast_cache:
+            _forecast_cache.move_to_end(key)
+            _forecast_cache_hits.inc()
+            return _forecast_cache[key].copy()
+    _forecast_cache_misses.inc()
+
+    future_times = pd.date_range(
+        last_timestamp + FORECAST_INTERVAL,
+        periods=FORECAST_STEPS,
+        freq=FORECAST_INTERVAL,
+    )
+    state = FeatureState()
+    history = df.tail(LOOKBACK)
+    state.extend(history)
+    last_row = history.iloc[-1].to_dict()
+    X = np.array(
+        [
+            state.update({**last_row, "Timestamp": timestamp})
+            for timestamp in future_times
+        ]
+    )
+    X = select_features(X, model_features(model))
+    future_predictions = model.predict(model_input(model, X))
+
     forecast_df = pd.DataFrame(
         {"Timestamp": future_times, "Predicted_Energy": future_predictions}
     )
 
-    return forecast_df
+    # A prediction server may have swapped models while predicting
+    key = (key[0], last_timestamp, model_version(model))
+    with _forecast_cache_lock:
+        _forecast_cache[key] = forecast_df
+        while len(_forecast_cache) > FORECAST_CACHE_SIZE:
+            _forecast_cache.popitem(last=False)
+    return forecast_df.copy()
 
 
+@metrics.timed("predict_seconds", function="predict_energy")
 def predict_energy(model, df):
     """Predict energy for all data points in the dataframe using the model."""
-    X = df[["Voltage", "Current", "Power", "Frequency", "PF"]]
-    predictions = model.predict(X)
+    X = feature_matrix(model, df)
+    predictions = model.predict(model_input(model, X))
     return pd.DataFrame({"Timestamp": df["Timestamp"], "Predicted_Energy": predictions})
 
 
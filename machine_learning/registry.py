@@ -0,0 +1,158 @@
+"""Registry of the model versions under model/ and the one the dashboard uses.
+
+A version is a model file (.pkl or .npz) in the model directory, described by
+the JSON metadata train_model writes beside it. The active version is named in
+model/ACTIVE, which is replaced atomically, so a running dashboard picks up a
+newly activated model without a restart.
+
+    python -m machine_learning.registry list
+    python -m machine_learning.registry activate <version>
+"""
+
+import argparse
+import json
+import os
+import threading
+import numpy as np
+from config import MODEL
+from machine_learning.features import model_features
+from machine_learning.predict import load_model, model_input
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model")
+MODEL_EXTENSIONS = (".pkl", ".npz")
+ACTIVE_FILE = "ACTIVE"
+
+
+def list_versions(model_dir=MODEL_DIR):
+    """Return every model file in ``model_dir`` with its metadata, oldest first."""
+    versions = []
+    if not os.path.isdir(model_dir):
+        return versions
+    for filename in os.listdir(model_dir):
+        name, extension = os.path.splitext(filename)
+        if extension not in MODEL_EXTENSIONS:
+            continue
+        path = os.path.join(model_dir, filename)
+        metadata = {}
+        metadata_path = os.path.join(model_dir, f"{name}.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as metadata_file:
+                metadata = json.load(metadata_file)
+        versions.append(
+            {
+                "version": filename,
+                "path": path,
+                "size": os.path.getsize(path),
+                "modified": os.path.getmtime(path),
+                "metadata": metadata,
+            }
+        )
+    return sorted(versions, key=lambda version: version["modified"])
+
+
+def get_active(model_dir=MODEL_DIR):
+    """Return the active version: model/ACTIVE, else config.MODEL, else newest."""
+    active_path = os.path.join(model_dir, ACTIVE_FILE)
+    if os.path.exists(active_path):
+        with open(active_path) as active_file:
+            version = active_file.read().strip()
+        if os.path.exists(os.path.join(model_dir, version)):
+            return version
+    if os.path.exists(os.path.join(model_dir, os.path.basename(MODEL))):
+        return os.path.basename(MODEL)
+    versions = list_versions(model_dir)
+    return versions[-1]["version"] if versions else None
+
+
+def set_active(version, model_dir=MODEL_DIR):
+    """Make ``version`` the active model, replacing model/ACTIVE atomically."""
+    if not os.path.exists(os.path.join(model_dir, version)):
+        raise FileNotFoundError(f"No model {version!r} in {model_dir}")
+    temporary_path = os.path.join(model_dir, f".{ACTIVE_FILE}.tmp")
+    with open(temporary_path, "w") as active_file:
+        active_file.write(version)
+    os.replace(temporary_path, os.path.join(model_dir, ACTIVE_FILE))
+
+
+class ModelRegistry:
+    """Serve the active model and hot-swap to a newly activated one.
+
+    ``get`` always returns a ready model. When ``refresh`` sees a new active
+    version, it loads and warms it on a background thread and swaps it in only
+    once it has predicted, so requests never wait on a load.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, mmap_mode="r"):
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.version = get_active(model_dir)
+        if self.version is None:
+            raise FileNotFoundError(f"No model files in {model_dir}")
+        self._model = self._load(self.version)
+        self._lock = threading.Lock()
+        self._loading = None
+        self.swaps = 0
+
+    def _load(self, version):
+        model = load_model(os.path.join(self.model_dir, version), self.mmap_mode)
+        # Warm up: the first predict touches every page the model needs
+        X = np.zeros((1, len(model_features(model))))
+        model.predict(model_input(model, X))
+        return model
+
+    def get(self):
+        return self._model
+
+    def refresh(self):
+        """Start loading the active version in the background if it changed."""
+        version = get_active(self.model_dir)
+        with self._lock:
+            if version in (self.version, self._loading) or version is None:
+                return False
+            self._loading = version
+        threading.Thread(target=self._swap, args=(version,), daemon=True).start()
+        return True
+
+    def _swap(self, version):
+        try:
+            model = self._load(version)
+        except Exception as e:
+            print(f"Could not load model {version}: {e}")
+            with self._lock:
+                self._loading = None
+            return
+        with self._lock:
+            self._model = model
+            self.version = version
+            self._loading = None
+            self.swaps += 1
+        print(f"Switched to model {version}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list model versions")
+    activate = commands.add_parser("activate", help="make a version active")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "activate":
+        set_active(args.version, args.model_dir)
+        print(f"Active model: {args.version}")
+        return
+    active = get_active(args.model_dir)
+    for version in list_versions(args.model_dir):
+        marker = "*" if version["version"] == active else " "
+        metrics = version["metadata"].get("metrics", {})
+        print(
+            f"{marker} {version['version']}  {version['size'] / 1e6:.1f} MB  "
+            f"{metrics or ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Local prediction server that loads the model once for every dashboard session.
+
+Requests arriving within a short window are merged into one ``model.predict``
+call. Start it with:
+    python -m machine_learning.server --model model/<file>.pkl --port 8765
+
+and point the dashboard at it with PREDICTION_SERVER=http://127.0.0.1:8765.
+
+Endpoints (JSON bodies):
+    POST /predict   {"rows": [[feature, ...], ...]}
+                    replies {"predictions": [...], "version": <model file>}
+    GET  /health    the model version and the features each row holds, in order
+    GET  /metrics   Prometheus text, or /metrics.json
+
+Rows hold the model's features in the order /health lists them. Forecasts
+are built by the client (see machine_learning.predict.forecast_energy), which
+steps the features over future timestamps and sends them as /predict rows.
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import metrics
+from machine_learning.features import model_features
+from machine_learning.predict import load_model, model_input
+
+
+class MicroBatcher:
+    """Merge concurrent prediction requests into batched model calls.
+
+    The first request starts a window of ``window`` seconds; everything queued
+    before it closes, up to ``max_rows`` rows, is predicted in one call.
+    """
+
+    def __init__(self, model, window=0.005, max_rows=4096):
+        self.model = model
+        self.n_features = len(model_features(model))
+        self.window = window
+        self.max_rows = max_rows
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def predict(self, X):
+        """Queue rows for prediction and wait for their results.
+
+        Raises ValueError unless every row has the model's number of features.
+        """
+        X = np.asarray(X, dtype=float)
+        if X.size == 0:
+            X = X.reshape(0, self.n_features)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected rows of {self.n_features} features, got shape {X.shape}"
+            )
+        future = Future()
+        self._queue.put((X, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            rows = len(pending[0][0])
+            deadline = time.monotonic() + self.window
+            while rows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            self._predict(pending)
+
+    def _predict(self, pending):
+        try:
+            with metrics.timer("predict_seconds", function="server_batch"):
+                batch = np.vstack([X for X, _ in pending])
+                predictions = self.model.predict(model_input(self.model, batch))
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.requests += len(pending)
+        start = 0
+        for X, future in pending:
+            future.set_result(predictions[start : start + len(X)])
+            start += len(X)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            payload = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        if self.path == "/metrics.json":
+            return self._reply(200, metrics.snapshot())
+        if self.path != "/health":
+            return self._reply(404, {"error": "not found"})
+        batcher = self.server.batcher
+        self._reply(
+            200,
+            {
+                "version": self.server.version,
+                "features": model_features(batcher.model),
+                "requests": batcher.requests,
+                "batches": batcher.batches,
+            },
+        )
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path != "/predict":
+                return self._reply(404, {"error": "not found"})
+            predictions = self.server.batcher.predict(body["rows"])
+        except (KeyError, TypeError, ValueError) as e:
+            return self._reply(400, {"error": str(e)})
+        except Exception as e:
+            return self._reply(500, {"error": str(e)})
+        self._reply(
+            200, {"predictions": predictions.tolist(), "version": self.server.version}
+        )
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(model, host="127.0.0.1", port=8765, window=0.005, max_rows=4096):
+    """Return an HTTP server predicting with ``model``; call serve_forever()."""
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(model, window=window, max_rows=max_rows)
+    server.version = str(getattr(model, "version", None))
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model", required=True, help="model file (.pkl or .npz)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-rows", type=int, default=4096)
+    args = parser.parse_args()
+
+    server = create_server(
+        load_model(args.model),
+        args.host,
+        args.port,
+        window=args.window_ms / 1000,
+        max_rows=args.max_rows,
+    )
+    print(f"Serving predictions on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from machine_learning.features import (
+    BASE_FEATURES,
+    FEATURES,
+    FeatureState,
+    FeatureStream,
+    make_features,
+    model_features,
+)
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), "..", "sample_data.csv")
+
+
+@pytest.fixture
+def sample_df():
+    return pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"])
+
+
+def test_lags_and_windows_stay_within_a_station():
+    df = pd.DataFrame(
+        {
+            "Process_ID": ["a", "b", "a", "b", "a"],
+            "Timestamp": pd.date_range("2024-11-12 06:00", periods=5, freq="6h"),
+            "Voltage": 230.0,
+            "Current": 1.0,
+            "Power": [1.0, 10.0, 2.0, 20.0, 3.0],
+            "Frequency": 50.0,
+            "PF": 0.9,
+        }
+    )
+    features = make_features(df)
+    assert list(features.columns) == FEATURES
+    assert features["Power_Lag1"].tolist() == [1.0, 10.0, 1.0, 10.0, 2.0]
+    assert features["Power_Lag3"].tolist() == [1.0, 10.0, 2.0, 20.0, 3.0]
+    assert features["Power_Mean6"].tolist() == [1.0, 10.0, 1.5, 15.0, 2.0]
+    assert features["Hour_Sin"].iloc[0] == pytest.approx(1.0)
+    assert features["Hour_Cos"].iloc[1] == pytest.approx(-1.0)
+
+
+def test_incremental_state_matches_batch(sample_df):
+    expected = make_features(sample_df).to_numpy()
+    np.testing.assert_allclose(FeatureState().extend(sample_df), expected)
+
+
+def test_stream_matches_batch_across_chunks(sample_df):
+    stream = FeatureStream()
+    chunks = [sample_df.iloc[:100], sample_df.iloc[100:350], sample_df.iloc[350:]]
+    streamed = pd.concat([stream.transform(chunk) for chunk in chunks])
+    pd.testing.assert_frame_equal(streamed, make_features(sample_df))
+
+
+def test_model_features():
+    class Model:
+        pass
+
+    model = Model()
+    assert model_features(model) == FEATURES
+    model.n_features_in_ = len(BASE_FEATURES)
+    assert model_features(model) == BASE_FEATURES
+    model.feature_names_in_ = np.array(["Power", "Hour_Sin"])
+    assert model_features(model) == ["Power", "Hour_Sin"]
@@ -0,0 +1,66 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from benchmarks import bench_forest
+from machine_learning.features import BASE_FEATURES
+from machine_learning.forest import CompiledForest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.uniform([220, 0, 0, 49.8, 0], [240, 5, 500, 50.2, 1], size=(500, 5))
+    y = X[:, 2] / 100 + rng.normal(0, 0.05, 500)
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+    return model, X
+
+
+def test_compiled_forest_matches_sklearn(fitted):
+    model, X = fitted
+    forest = CompiledForest.from_sklearn(model)
+    np.testing.assert_allclose(forest.predict(X), model.predict(X), rtol=1e-9)
+
+
+def test_single_row_fast_path(fitted):
+    model, X = fitted
+    forest = CompiledForest.from_sklearn(model)
+    assert forest.predict_one(X[7]) == pytest.approx(model.predict(X[7:8])[0])
+    assert forest.predict(X[7:8])[0] == pytest.approx(model.predict(X[7:8])[0])
+
+
+def test_save_and_load(fitted, tmp_path):
+    model, X = fitted
+    path = tmp_path / "forest.npz"
+    CompiledForest.from_sklearn(model).save(path)
+    forest = CompiledForest.load(path)
+    assert forest.version == "forest.npz"
+    np.testing.assert_allclose(forest.predict(X[:50]), model.predict(X[:50]))
+
+
+def test_load_memory_maps_the_arrays(fitted, tmp_path):
+    model, X = fitted
+    path = tmp_path / "forest.npz"
+    CompiledForest.from_sklearn(model).save(path)
+    forest = CompiledForest.load(path, mmap_mode="r")
+    for array in [forest.feature, forest.threshold, forest.left, forest.value]:
+        assert isinstance(array, np.memmap)
+    np.testing.assert_allclose(forest.predict(X[:50]), model.predict(X[:50]))
+    assert forest.predict_one(X[7]) == pytest.approx(model.predict(X[7:8])[0])
+
+
+def test_benchmark_runs_on_a_raw_reading_model(tmp_path, monkeypatch, capsys):
+    # Like the repo's model: fitted on a frame of the five raw readings
+    df = pd.read_csv(os.path.join(ROOT, "machine_learning", "sample_data.csv"))
+    df = df.dropna(subset=BASE_FEATURES + ["Energy"])
+    model = RandomForestRegressor(n_estimators=5, random_state=0)
+    model.fit(df[BASE_FEATURES], df["Energy"])
+    joblib.dump(model, tmp_path / "raw.pkl")
+
+    monkeypatch.chdir(ROOT)
+    bench_forest.main([str(tmp_path / "raw.pkl"), "--repeats", "1"])
+    assert "max abs difference" in capsys.readouterr().out
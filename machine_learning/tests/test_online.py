@@ -0,0 +1,183 @@
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from machine_learning.online import ONLINE_PREFIX, OnlineTrainer
+from machine_learning.features import BASE_FEATURES, FEATURES, make_features
+from machine_learning.registry import ModelRegistry, get_active, set_active
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), "..", "sample_data.csv")
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    df = pd.read_csv(SAMPLE_DATA).dropna()
+    model = RandomForestRegressor(n_estimators=4, random_state=0)
+    model.fit(df[BASE_FEATURES].iloc[:200].to_numpy(), df["Energy"].iloc[:200])
+    joblib.dump(model, tmp_path / "base.pkl")
+    set_active("base.pkl", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def readings():
+    """Serve the sample data in chunks of 100 rows newer than ``after``."""
+    df = pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"]).iloc[200:]
+    df = df.sort_values("Timestamp", kind="stable")
+
+    def load_rows(after):
+        newer = df if after is None else df[df["Timestamp"] > after]
+        return newer.head(100)
+
+    return load_rows
+
+
+def test_updates_once_enough_rows_land(model_dir, readings):
+    trainer = OnlineTrainer(
+        model_dir, load_rows=readings, min_rows=150, trees_per_update=3
+    )
+    assert trainer.poll() is None
+    assert trainer.pending() == 100
+
+    version = trainer.poll()
+    assert version is not None
+    assert get_active(model_dir) == version
+    assert trainer.stats()["trees"] == 7
+    assert trainer.pending() == 0
+    with open(model_dir / version.replace(".pkl", ".json")) as metadata_file:
+        metadata = json.load(metadata_file)
+    assert metadata["base_version"] == "base.pkl"
+    # The second poll re-read the last five minutes, so 58 of its rows were new
+    assert metadata["train_rows"] == 158
+    assert metadata["metrics"]["mae"] >= 0
+
+
+def test_grown_trees_and_versions_stay_bounded(model_dir, readings):
+    trainer = OnlineTrainer(
+        model_dir,
+        load_rows=readings,
+        min_rows=1,
+        trees_per_update=3,
+        max_recent_trees=5,
+        keep_versions=2,
+    )
+    for _ in range(4):
+        assert trainer.poll() is not None
+    assert trainer.stats()["trees"] == 4 + 5
+    assert trainer.stats()["updates"] == 4
+    online = [name for name in os.listdir(model_dir) if name.endswith(".pkl")]
+    # The base model, the active update and the one before it
+    assert len(online) == 3
+    assert "base.pkl" in online
+    assert trainer.version in online
+
+    # A restarted trainer keeps the base trees of the original model
+    assert OnlineTrainer(model_dir, load_rows=readings).base_trees == 4
+
+
+def test_late_rows_inside_the_overlap_are_picked_up(model_dir):
+    df = pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"]).iloc[200:300]
+    # A reading commits only after the first poll has seen newer ones
+    late = df.iloc[[95]]
+    committed = [df.drop(late.index)]
+
+    def load_rows(after):
+        rows = pd.concat(committed).sort_values("Timestamp")
+        return rows if after is None else rows[rows["Timestamp"] > after]
+
+    trainer = OnlineTrainer(model_dir, load_rows=load_rows, min_rows=1000)
+    trainer.poll()
+    assert trainer.pending() == 99
+    committed.append(late)
+    trainer.poll()
+    assert trainer.pending() == 100
+    assert trainer.poll() is None
+    assert trainer.stats()["rows_seen"] == 100
+
+
+def test_station_versions_are_saved_but_not_activated(model_dir, readings):
+    trainer = OnlineTrainer(
+        model_dir, load_rows=readings, station="station01", min_rows=1
+    )
+    version = trainer.poll()
+    assert version.startswith(f"{ONLINE_PREFIX}_station01_")
+    assert (model_dir / version).exists()
+    assert get_active(model_dir) == "base.pkl"
+
+
+def test_prune_keeps_other_trainers_versions(model_dir, readings):
+    published = {}
+    for station in [None, "station01", "station02"]:
+        trainer = OnlineTrainer(
+            model_dir,
+            load_rows=readings,
+            station=station,
+            min_rows=1,
+            keep_versions=1,
+        )
+        for _ in range(3):
+            trainer.poll()
+        published[station] = trainer.version
+    models = sorted(name for name in os.listdir(model_dir) if name.endswith(".pkl"))
+    # Each trainer pruned only its own older versions
+    assert models == sorted(["base.pkl", *published.values()])
+
+
+def test_backlog_is_paged_oldest_first_without_sleeping(model_dir, readings):
+    # Pages of 100 rows are full, so the trainer knows more are waiting
+    trainer = OnlineTrainer(model_dir, load_rows=readings, min_rows=10**6, max_rows=100)
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        trainer.run(60, sleep)
+    # Every reading of the backlog was read before the first sleep
+    df = pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"]).iloc[200:]
+    rows = df.dropna(subset=BASE_FEATURES + ["Energy"])
+    assert trainer.stats()["rows_seen"] == len(rows)
+    assert trainer.last_timestamp == df["Timestamp"].max()
+    assert sleeps == [60]
+    assert not trainer.behind
+
+
+def test_registry_swaps_to_published_update(model_dir, readings):
+    registry = ModelRegistry(model_dir)
+    trainer = OnlineTrainer(model_dir, load_rows=readings, min_rows=1)
+    version = trainer.poll()
+    assert registry.refresh()
+    for _ in range(100):
+        if registry.version == version:
+            break
+        time.sleep(0.05)
+    assert registry.get().version == version
+    assert len(registry.get().estimators_) == 14
+
+
+def test_engineered_features_span_polls(tmp_path, readings):
+    df = pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"]).iloc[:200]
+    model = RandomForestRegressor(n_estimators=4, random_state=0)
+    model.fit(make_features(df), df["Energy"])
+    joblib.dump(model, tmp_path / "base.pkl")
+
+    trainer = OnlineTrainer(tmp_path, load_rows=readings, min_rows=150)
+    assert trainer.features == FEATURES
+    batches = []
+    update = trainer.update
+    trainer.update = lambda X, y: (batches.append(X), update(X, y))
+    trainer.poll()
+    trainer.poll()
+
+    # The second chunk's lags and windows reach back into the first chunk
+    first = readings(None)
+    last = first["Timestamp"].iloc[-1]
+    second = readings(last - trainer.overlap)
+    second = second[second["Timestamp"] > last]
+    expected = make_features(pd.concat([first, second]))
+    np.testing.assert_allclose(batches[0], expected.to_numpy())
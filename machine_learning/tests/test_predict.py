@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from machine_learning.features import BASE_FEATURES, FEATURES
+from machine_learning.predict import (
+    FORECAST_STEPS,
+    clear_forecast_cache,
+    forecast_energy,
+    predict_energy,
+)
+
+
+class CountingModel:
+    """Stand-in regressor that records how it is called."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        X = np.asarray(X)
+        self.calls.append(X.shape)
+        return X.sum(axis=1)
+
+
+@pytest.fixture(autouse=True)
+def empty_forecast_cache():
+    clear_forecast_cache()
+
+
+@pytest.fixture
+def sample_df():
+    return pd.DataFrame(
+        {
+            "Process_ID": ["station01"] * 3,
+            "Timestamp": pd.date_range("2024-11-12 10:00", periods=3, freq="5min"),
+            "Voltage": [220.0, 221.0, 222.0],
+            "Current": [0.02, 0.03, 0.04],
+            "Power": [1.2, 1.3, 1.4],
+            "Energy": [0.003, 0.004, 0.005],
+            "Frequency": [50.0, 50.0, 50.0],
+            "PF": [0.99, 0.98, 0.97],
+        }
+    )
+
+
+def test_forecast_energy_predicts_in_one_batch(sample_df):
+    model = CountingModel()
+    forecast = forecast_energy(model, sample_df)
+    assert model.calls == [(FORECAST_STEPS, len(FEATURES))]
+    assert len(forecast) == FORECAST_STEPS
+    assert forecast["Timestamp"].iloc[0] == pd.Timestamp("2024-11-12 10:15")
+    # Time-of-day features advance with each step
+    assert forecast["Predicted_Energy"].nunique() == FORECAST_STEPS
+
+
+def test_forecast_energy_with_raw_reading_model(sample_df):
+    model = CountingModel()
+    model.n_features_in_ = len(BASE_FEATURES)
+    forecast = forecast_energy(model, sample_df)
+    assert model.calls == [(FORECAST_STEPS, len(BASE_FEATURES))]
+    assert forecast["Predicted_Energy"].tolist() == pytest.approx(
+        [sample_df[BASE_FEATURES].iloc[-1].sum()] * FORECAST_STEPS
+    )
+
+
+def test_forecast_energy_is_memoized_per_snapshot(sample_df):
+    model = CountingModel()
+    first = forecast_energy(model, sample_df)
+    first["Predicted_Energy"] = 0
+    second = forecast_energy(model, sample_df)
+    assert len(model.calls) == 1
+    assert (second["Predicted_Energy"] != 0).all()
+
+    newer = pd.concat(
+        [
+            sample_df,
+            sample_df.tail(1).assign(Timestamp=pd.Timestamp("2024-11-12 10:15")),
+        ]
+    )
+    forecast_energy(model, newer)
+    assert len(model.calls) == 2
+
+
+def test_predict_energy(sample_df):
+    predictions = predict_energy(CountingModel(), sample_df)
+    assert predictions["Timestamp"].tolist() == sample_df["Timestamp"].tolist()
+    assert len(predictions) == 3
+
+
+def test_forecast_memo_separates_overall_from_station(sample_df):
+    model = CountingModel()
+    overall = pd.concat(
+        [sample_df.assign(Process_ID="station02", Voltage=230.0), sample_df]
+    ).sort_values("Timestamp", kind="stable")
+    forecast_energy(model, overall)
+    forecast_energy(model, sample_df)
+    assert len(model.calls) == 2
@@ -0,0 +1,71 @@
+import json
+import time
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from machine_learning.forest import CompiledForest
+from machine_learning.registry import (
+    ModelRegistry,
+    get_active,
+    list_versions,
+    set_active,
+)
+
+
+def save_model(model_dir, name, n_estimators):
+    rng = np.random.default_rng(n_estimators)
+    X = rng.random((50, 5))
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=0)
+    model.fit(X, X.sum(axis=1))
+    joblib.dump(model, model_dir / f"{name}.pkl")
+    with open(model_dir / f"{name}.json", "w") as metadata_file:
+        json.dump({"name": name, "metrics": {"mae": 0.1}}, metadata_file)
+
+
+def test_list_versions_reads_metadata(tmp_path):
+    save_model(tmp_path, "model_a", 2)
+    (tmp_path / "notes.txt").write_text("not a model")
+    versions = list_versions(tmp_path)
+    assert [version["version"] for version in versions] == ["model_a.pkl"]
+    assert versions[0]["metadata"]["metrics"] == {"mae": 0.1}
+
+
+def test_set_active_switches_version(tmp_path):
+    save_model(tmp_path, "model_a", 2)
+    save_model(tmp_path, "model_b", 3)
+    set_active("model_a.pkl", tmp_path)
+    assert get_active(tmp_path) == "model_a.pkl"
+    set_active("model_b.pkl", tmp_path)
+    assert get_active(tmp_path) == "model_b.pkl"
+    with pytest.raises(FileNotFoundError):
+        set_active("missing.pkl", tmp_path)
+
+
+def test_registry_hot_swaps_after_warm_load(tmp_path):
+    save_model(tmp_path, "model_a", 2)
+    save_model(tmp_path, "model_b", 3)
+    set_active("model_a.pkl", tmp_path)
+    registry = ModelRegistry(tmp_path)
+    assert registry.get().version == "model_a.pkl"
+    assert not registry.refresh()
+
+    set_active("model_b.pkl", tmp_path)
+    assert registry.refresh()
+    deadline = time.monotonic() + 5
+    while registry.version != "model_b.pkl" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    model = registry.get()
+    assert model.version == "model_b.pkl"
+    assert len(model.estimators_) == 3
+    assert registry.swaps == 1
+
+
+def test_registry_memory_maps_a_compiled_forest(tmp_path):
+    save_model(tmp_path, "model_a", 3)
+    model = joblib.load(tmp_path / "model_a.pkl")
+    CompiledForest.from_sklearn(model).save(tmp_path / "model_a.npz")
+    set_active("model_a.npz", tmp_path)
+    forest = ModelRegistry(tmp_path).get()
+    assert isinstance(forest.threshold, np.memmap)
+    assert isinstance(forest.value, np.memmap)
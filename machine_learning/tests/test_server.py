@@ -0,0 +1,132 @@
+import threading
+import urllib.error
+import urllib.request
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from machine_learning.features import BASE_FEATURES
+from machine_learning.predict import PredictionClient, forecast_energy
+from machine_learning.server import MicroBatcher, create_server
+
+
+class SlowSumModel:
+    """Stand-in model that is slow enough for requests to pile up."""
+
+    version = "sum-v1"
+    n_features_in_ = 5
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X):
+        self.batch_sizes.append(len(X))
+        threading.Event().wait(0.02)
+        return np.asarray(X).sum(axis=1)
+
+
+@pytest.fixture
+def server():
+    model = SlowSumModel()
+    server = create_server(model, port=0, window=0.02)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, model, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_predicts_through_server(server):
+    _, _, url = server
+    client = PredictionClient(url)
+    assert client.version == "sum-v1"
+    predictions = client.predict([[1, 2, 3, 4, 5], [1, 1, 1, 1, 1]])
+    assert predictions.tolist() == [15.0, 5.0]
+
+
+def test_concurrent_requests_are_batched(server):
+    _, model, url = server
+    client = PredictionClient(url)
+    results = {}
+
+    def request(i):
+        results[i] = client.predict([[i, 0, 0, 0, 0]])[0]
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {i: float(i) for i in range(20)}
+    assert len(model.batch_sizes) < 20
+
+
+def test_forecast_energy_in_client_mode(server):
+    _, _, url = server
+    df = pd.DataFrame(
+        {
+            "Timestamp": pd.date_range("2024-11-12", periods=2, freq="5min"),
+            "Voltage": [220.0, 230.0],
+            "Current": [1.0, 1.0],
+            "Power": [1.0, 1.0],
+            "Frequency": [50.0, 50.0],
+            "PF": [1.0, 1.0],
+        }
+    )
+    forecast = forecast_energy(PredictionClient(url), df)
+    assert forecast["Predicted_Energy"].tolist() == [283.0] * 12
+
+
+def test_bad_request_is_rejected(server):
+    _, _, url = server
+    with pytest.raises(RuntimeError):
+        PredictionClient(url).predict([[1, 2]])
+
+
+def test_metrics_route_reports_batch_timings(server):
+    _, _, url = server
+    PredictionClient(url).predict([[1, 2, 3, 4, 5]])
+    with urllib.request.urlopen(f"{url}/metrics") as response:
+        text = response.read().decode()
+    assert 'predict_seconds_count{function="server_batch"}' in text
+
+
+def test_rows_of_the_wrong_width_are_rejected(server):
+    _, model, url = server
+    with pytest.raises(RuntimeError, match="5 features"):
+        PredictionClient(url).predict([list(range(10))])
+    assert model.batch_sizes == []
+
+
+def test_client_follows_the_server_version(server):
+    server, _, url = server
+    client = PredictionClient(url, version_ttl=60)
+    server.version = "sum-v2"
+    client.predict([[1, 2, 3, 4, 5]])
+    assert client.version == "sum-v2"
+
+    server.version = "sum-v3"
+    assert client.version == "sum-v2"
+    client.version_ttl = 0
+    assert client.version == "sum-v3"
+
+
+def test_forecast_route_is_gone(server):
+    _, _, url = server
+    request = urllib.request.Request(f"{url}/forecast", data=b"{}", method="POST")
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+    assert error.value.code == 404
+    error.value.close()
+
+
+def test_frame_fitted_model_is_given_named_features():
+    df = pd.DataFrame(np.random.default_rng(0).random((50, 5)), columns=BASE_FEATURES)
+    model = RandomForestRegressor(n_estimators=3, random_state=0)
+    model.fit(df, df.sum(axis=1))
+    batcher = MicroBatcher(model, window=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        predictions = batcher.predict(df.to_numpy()[:2])
+    assert predictions.shape == (2,)
@@ -0,0 +1,66 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from machine_learning.train_model import Reservoir, sample_source, train_station
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), "..", "sample_data.csv")
+
+
+def test_reservoir_keeps_a_bounded_uniform_sample():
+    reservoir = Reservoir(100, 1, np.random.default_rng(0))
+    for start in range(0, 10000, 1000):
+        reservoir.add(np.arange(start, start + 1000, dtype=float).reshape(-1, 1))
+    sample = reservoir.sample()
+    assert sample.shape == (100, 1)
+    assert reservoir.seen == 10000
+    # A uniform sample of 0..9999 should reach well past the first chunk
+    assert sample.max() > 5000
+    assert 3000 < sample.mean() < 7000
+
+
+def test_sample_source_splits_by_station():
+    samples = sample_source(
+        SAMPLE_DATA,
+        per_station=True,
+        max_rows=50,
+        test_size=0.2,
+        chunk_rows=100,
+        table=None,
+        seed=0,
+    )
+    assert len(samples) > 1
+    for train, test in samples.values():
+        assert len(train.sample()) <= 50
+        assert len(test.sample()) <= 10
+
+
+def test_train_station_writes_model_and_metadata(tmp_path):
+    samples = sample_source(SAMPLE_DATA, False, 200, 0.2, 100, None, 0)
+    train, test = samples["all"]
+    metadata = train_station(
+        "all",
+        train.sample(),
+        test.sample(),
+        {"n_estimators": 5, "random_state": 0},
+        str(tmp_path),
+        compile_forest=True,
+    )
+    for extension in ["pkl", "npz", "json"]:
+        assert os.path.exists(tmp_path / f"{metadata['name']}.{extension}")
+    with open(tmp_path / f"{metadata['name']}.json") as metadata_file:
+        assert json.load(metadata_file)["metrics"]["mse"] >= 0
+
+
+def test_sample_source_tests_on_the_latest_readings(tmp_path):
+    df = pd.read_csv(SAMPLE_DATA, parse_dates=["Timestamp"]).dropna()
+    df["Energy"] = df.groupby("Process_ID").cumcount().astype(float)
+    path = tmp_path / "readings.csv"
+    df.to_csv(path, index=False)
+
+    samples = sample_source(str(path), True, 1000, 0.25, 50, None, 0)
+    for station, (train, test) in samples.items():
+        count = (df["Process_ID"] == station).sum()
+        # The target counts each station's readings, so it orders them in time
+        assert train.sample()[:, -1].max() < test.sample()[:, -1].min()
+        assert len(test.sample()) == count - int(count * 0.75)
@@ -1,70 +1,239 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
-import joblib
-from datetime import timedelta
+"""Train energy models from the database, a CSV file or a Parquet archive.
+
+Data is streamed in chunks, turned into features (see
+machine_learning.features) and kept as a fixed-size random sample per
+station, so memory stays bounded however much history the source holds.
+The latest ``--test-size`` of each station's readings are held out for
+testing, so models are scored on a period they were not trained on. Lag
+and rolling features, and that split, need the source in time order within
+each station. Per-station models are trained in parallel processes, each
+forest using ``--n-jobs`` cores, and every model is written with a JSON
+metadata file beside it.
+
+Examples, run from the repository root:
+    python -m machine_learning.train_model --source data/2_all_data.csv
+    python -m machine_learning.train_model --source db --per-station --workers 4
+    python -m machine_learning.train_model --source archive/ --max-rows 2000000
+"""
+
+import argparse
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from machine_learning.features import BASE_FEATURES, FEATURES, FeatureStream
+from machine_learning.forest import CompiledForest
+
+TARGET = "Energy"
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model")
+
+
+class Reservoir:
+    """Uniform random sample of at most ``capacity`` rows from a stream."""
+
+    def __init__(self, capacity, n_columns, rng):
+        self.capacity = capacity
+        self.rows = np.empty((capacity, n_columns))
+        self.seen = 0
+        self.rng = rng
+
+    def add(self, chunk):
+        positions = np.arange(self.seen, self.seen + len(chunk))
+        self.seen += len(chunk)
+        fill = positions < self.capacity
+        self.rows[positions[fill]] = chunk[fill]
+        # Row i of the stream replaces a random slot with probability capacity/(i+1)
+        rest = chunk[~fill]
+        if len(rest):
+            slots = self.rng.integers(0, positions[~fill] + 1)
+            keep = slots < self.capacity
+            self.rows[slots[keep]] = rest[keep]
+
+    def sample(self):
+        return self.rows[: min(self.seen, self.capacity)]
+
+
+def iter_chunks(source, chunk_rows, table=None, columns=None):
+    """Yield DataFrames of Process_ID, readings and target from a data source."""
+    columns = columns or ["Process_ID", "Timestamp"] + BASE_FEATURES + [TARGET]
+    if source == "db":
+        from data_aquisition.da_config import HISTORICAL_TABLE, db_connection
+
+        names = ", ".join(f'"{column}"' for column in columns)
+        query = f"SELECT {names} FROM {table or HISTORICAL_TABLE}"
+        with db_connection() as conn:
+            streaming = conn.execution_options(stream_results=True)
+            yield from pd.read_sql(query, streaming, chunksize=chunk_rows)
+    elif os.path.isdir(source):
+        from data_aquisition.archive import ds
+
+        if ds is None:
+            raise ImportError("Reading a Parquet archive requires pyarrow")
+        dataset = ds.dataset(source, format="parquet", partitioning="hive")
+        for batch in dataset.to_batches(columns=columns, batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunk_rows)
+
+
+def count_rows(source, chunk_rows, table=None):
+    """Return the number of rows of each station in a data source."""
+    counts = pd.Series(dtype=float)
+    for chunk in iter_chunks(source, chunk_rows, table, columns=["Process_ID"]):
+        counts = counts.add(chunk["Process_ID"].value_counts(), fill_value=0)
+    return counts
+
+
+def sample_source(source, per_station, max_rows, test_size, chunk_rows, table, seed):
+    """Stream a source into train and test reservoirs keyed by station.
+
+    A first pass counts each station's rows, so the second can send the last
+    ``test_size`` of them, in time order, to the test reservoir.
+    """
+    rng = np.random.default_rng(seed)
+    n_columns = len(FEATURES) + 1
+    samples = {}
+    stream = FeatureStream()
+    counts = count_rows(source, chunk_rows, table)
+    first_test = (counts * (1 - test_size)).astype(int)
+    passed = pd.Series(0.0, index=counts.index)
+    for chunk in iter_chunks(source, chunk_rows, table):
+        stations = chunk["Process_ID"]
+        position = stations.groupby(stations).cumcount() + stations.map(passed)
+        passed = passed.add(stations.value_counts(), fill_value=0)
+        chunk = chunk.assign(Test=position >= stations.map(first_test))
+        chunk = chunk.dropna(subset=BASE_FEATURES + [TARGET])
+        chunk = pd.concat(
+            [chunk[["Process_ID", TARGET, "Test"]], stream.transform(chunk)], axis=1
+        )
+        groups = chunk.groupby("Process_ID") if per_station else [("all", chunk)]
+        for station, rows in groups:
+            if station not in samples:
+                samples[station] = (
+                    Reservoir(max_rows, n_columns, rng),
+                    Reservoir(max(1, int(max_rows * test_size)), n_columns, rng),
+                )
+            train, test = samples[station]
+            values = rows[FEATURES + [TARGET]].to_numpy(dtype=float)
+            is_test = rows["Test"].to_numpy(dtype=bool)
+            train.add(values[~is_test])
+            test.add(values[is_test])
+    return samples
+
+
+def train_station(station, train, test, params, output_dir, compile_forest):
+    """Fit, evaluate and save one model; returns its metadata."""
+    start = time.perf_counter()
+    model = RandomForestRegressor(**params)
+    # Fitted on a frame, the model knows the names of the features it expects
+    model.fit(pd.DataFrame(train[:, :-1], columns=FEATURES), train[:, -1])
+    training_seconds = time.perf_counter() - start
+
+    y_pred = (
+        model.predict(pd.DataFrame(test[:, :-1], columns=FEATURES))
+        if len(test)
+        else np.array([])
+    )
+    metrics = {}
+    if len(test):
+        metrics = {
+            "mse": float(mean_squared_error(test[:, -1], y_pred)),
+            "mae": float(mean_absolute_error(test[:, -1], y_pred)),
+            "r2": float(r2_score(test[:, -1], y_pred)) if len(test) > 1 else None,
+        }
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = f"random_forest_energy_model_{timestamp}"
+    if station != "all":
+        name = f"random_forest_energy_model_{station}_{timestamp}"
+    model_path = os.path.join(output_dir, f"{name}.pkl")
+    joblib.dump(model, model_path)
+    if compile_forest:
+        CompiledForest.from_sklearn(model).save(os.path.join(output_dir, f"{name}.npz"))
+
+    metadata = {
+        "name": name,
+        "station": station,
+        "features": FEATURES,
+        "target": TARGET,
+        "params": params,
+        "metrics": metrics,
+        "train_rows": int(len(train)),
+        "test_rows": int(len(test)),
+        "training_seconds": training_seconds,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+    }
+    with open(os.path.join(output_dir, f"{name}.json"), "w") as metadata_file:
+        json.dump(metadata, metadata_file, indent=2)
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--source", required=True, help='"db", a CSV file or a Parquet archive dir'
+    )
+    parser.add_argument("--table", help="table to read when --source is db")
+    parser.add_argument("--per-station", action="store_true")
+    parser.add_argument(
+        "--max-rows", type=int, default=1_000_000, help="sampled rows per model"
+    )
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores per forest")
+    parser.add_argument("--workers", type=int, default=1, help="models in parallel")
+    parser.add_argument("--output-dir", default=MODEL_DIR)
+    parser.add_argument("--compile", action="store_true", help="also write .npz")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    samples = sample_source(
+        args.source,
+        args.per_station,
+        args.max_rows,
+        args.test_size,
+        args.chunk_rows,
+        args.table,
+        args.seed,
+    )
+    params = {
+        "n_estimators": args.n_estimators,
+        "n_jobs": args.n_jobs,
+        "random_state": args.seed,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(
+                train_station,
+                station,
+                train.sample(),
+                test.sample(),
+                params,
+                args.output_dir,
+                args.compile,
+            )
+            for station, (train, test) in samples.items()
+        ]
+        for future in futures:
+            metadata = future.result()
+            print(
+                f"{metadata['station']}: {metadata['train_rows']} rows, "
+                f"{metadata['training_seconds']:.1f}s, metrics {metadata['metrics']} "
+                f"-> {metadata['name']}.pkl"
+            )
+
 
-# Load data
-df = pd.read_csv("/Users/nlishivha_sandtech/Desktop/energy/data/2_all_data.csv")
-
-# Convert Timestamp to datetime
-df["Timestamp"] = pd.to_datetime(df["Timestamp"])
-
-# Set up features and target
-X = df[["Voltage", "Current", "Power", "Frequency", "PF"]]
-y = df["Energy"]
-
-# Split data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-# Train Random Forest Regressor
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-# Predict on the test set
-y_pred = model.predict(X_test)
-
-# Calculate and display Mean Squared Error
-mse = mean_squared_error(y_test, y_pred)
-print(f"Mean Squared Error: {mse}")
-
-# Save the model to a file
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-model_filename = f"../model/random_forest_energy_model_{timestamp}.pkl"
-os.makedirs("model", exist_ok=True)  # Create the directory if it doesn't exist
-joblib.dump(model, model_filename)
-
-print(f"Model saved to {model_filename}")
-print(X.columns.tolist())
-print(X_test.columns.tolist())
-# Forecast energy for the next hour
-last_row = df.iloc[-1][
-    ["Voltage", "Current", "Power", "Frequency", "PF"]
-]  # Ensure this matches the training features
-future_predictions = []
-for i in range(12):
-    pred = model.predict([last_row])[0]
-    future_predictions.append(pred)
-    # import pdb
-
-    # pdb.set_trace()
-    last_row["Energy"] = pred
-    last_row = last_row.drop(
-        "Energy"
-    )  # Drop the 'Energy' column to maintain the correct number of features
-
-# Display forecasted energy for the next hour
-future_times = [
-    df["Timestamp"].iloc[-1] + timedelta(minutes=5 * i) for i in range(1, 13)
-]
-forecast_df = pd.DataFrame(
-    {"Timestamp": future_times, "Predicted_Energy": future_predictions}
-)
-
-print("\nForecasted Energy for the Next Hour:")
-print(forecast_df)
+if __name__ == "__main__":
+    main()
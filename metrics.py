@@ -0,0 +1,248 @@
+"""Counters, histograms and timers for the acquisition and dashboard hot paths.
+
+Metrics are created on first use and kept in one process-wide registry:
+
+    metrics.counter("serial_frames_total").inc()
+    with metrics.timer("db_query_seconds", query="load_readings"):
+        ...
+    @metrics.timed("predict_seconds", function="predict_energy")
+    def predict_energy(...): ...
+
+Set METRICS=0 to disable them: decorators then return the function unchanged
+and timers and counters return before touching any state. ``snapshot`` gives
+the values as a dict, ``prometheus_text`` in Prometheus exposition format,
+and ``serve`` publishes both over HTTP.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("METRICS", "1") != "0"
+
+# Upper bounds in seconds, from a fast in-memory operation to a slow query
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Histogram:
+    """Counts of observations in fixed buckets, with their sum and maximum."""
+
+    kind = "histogram"
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        if not ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket holding it."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class _Timer:
+    """Context manager observing its duration into a histogram."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _get(kind, name, labels):
+    key = (name, tuple(sorted(labels.items())))
+    metric = _metrics.get(key)
+    if metric is None:
+        with _metrics_lock:
+            metric = _metrics.setdefault(key, kind())
+    return metric
+
+
+def counter(name, **labels):
+    """Return the counter called ``name`` with the given labels."""
+    return _get(Counter, name, labels)
+
+
+def histogram(name, **labels):
+    """Return the histogram called ``name`` with the given labels."""
+    return _get(Histogram, name, labels)
+
+
+def timer(name, **labels):
+    """Return a context manager timing its block into a histogram."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(histogram(name, **labels))
+
+
+def timed(name, **labels):
+    """Decorate a function to time every call into a histogram."""
+
+    def decorate(function):
+        if not ENABLED:
+            return function
+        metric = histogram(name, **labels)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def _label_text(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def snapshot():
+    """Return every metric as {"name{labels}": {...}}."""
+    with _metrics_lock:
+        items = sorted(_metrics.items())
+    return {
+        f"{name}{_label_text(labels)}": {"type": metric.kind, **metric.snapshot()}
+        for (name, labels), metric in items
+    }
+
+
+def prometheus_text():
+    """Return every metric in the Prometheus text exposition format."""
+    with _metrics_lock:
+        items = sorted(_metrics.items())
+    lines, typed = [], set()
+    for (name, labels), metric in items:
+        if name not in typed:
+            lines.append(f"# TYPE {name} {metric.kind}")
+            typed.add(name)
+        if metric.kind == "counter":
+            lines.append(f"{name}{_label_text(labels)} {metric.value}")
+            continue
+        cumulative = 0
+        for bound, count in zip(metric.buckets, metric.counts):
+            cumulative += count
+            le = _label_text(labels, [("le", bound)])
+            lines.append(f"{name}_bucket{le} {cumulative}")
+        le = _label_text(labels, [("le", "+Inf")])
+        lines.append(f"{name}_bucket{le} {metric.count}")
+        lines.append(f"{name}_sum{_label_text(labels)} {metric.sum}")
+        lines.append(f"{name}_count{_label_text(labels)} {metric.count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget every metric."""
+    with _metrics_lock:
+        _metrics.clear()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics and /metrics.json from a background thread."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server